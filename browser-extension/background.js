@@ -130,6 +130,15 @@ chrome.runtime.onMessage.addListener((message, _sender, sendResponse) => {
                 break;
             }
 
+            case 'EXTRACT_JOB': {
+                const result = await apiFetch('jobs/extract/', {
+                    method: 'POST',
+                    body: JSON.stringify({ url: message.url, html: message.html }),
+                });
+                sendResponse(result);
+                break;
+            }
+
             case 'GET_API_BASE': {
                 sendResponse({ apiBase: base });
                 break;
@@ -157,57 +157,66 @@ document.getElementById('btnBackToEmail').addEventListener('click', () => {
     showView('login-email');
 });
 
-/** ── ADD JOB — Scrape & populate ───────────────────────────────────────────── */
+/** ── ADD JOB — Extract & populate ──────────────────────────────────────────── */
+
+// Runs inside the job page. The backend does the extraction, so this only
+// trims what it never reads (keeping JSON-LD scripts) to keep the upload small.
+function snapshotPage() {
+    const clone = document.documentElement.cloneNode(true);
+    clone.querySelectorAll('script:not([type="application/ld+json"]), style, svg, noscript, iframe, link')
+        .forEach(el => el.remove());
+    return { url: window.location.href, html: clone.outerHTML };
+}
+
 async function loadJobData() {
     const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
     const url = tab?.url || '';
 
-    const supportedHosts = ['linkedin.com', 'indeed.com', 'glassdoor.com', 'naukri.com'];
-    const isSupported = supportedHosts.some(h => url.includes(h));
-
     const notJobPage = document.getElementById('notJobPage');
     const scrapeNotice = document.getElementById('scrapeNotice');
     const sourceBadge = document.getElementById('jobSourceBadge');
-    const jobForm = document.getElementById('jobForm');
 
-    if (!isSupported) {
+    const showManualEntry = () => {
         if (notJobPage) notJobPage.style.display = 'block';
         if (scrapeNotice) scrapeNotice.style.display = 'none';
         if (sourceBadge) sourceBadge.style.display = 'none';
         // Still show the form so user can manually enter data
-        if (jobForm) {
-            document.getElementById('jobUrl').value = url;
-        }
-        return;
-    }
-
-    if (notJobPage) notJobPage.style.display = 'none';
+        document.getElementById('jobUrl').value = url;
+    };
 
+    let page;
     try {
-        const data = await chrome.tabs.sendMessage(tab.id, { type: 'GET_JOB_DATA' });
-        if (data) {
-            populateJobForm(data);
-            if (scrapeNotice) scrapeNotice.style.display = 'block';
-            if (sourceBadge && data.source) {
-                sourceBadge.textContent = `📄 Detected: ${data.source}`;
-                sourceBadge.style.display = 'inline-block';
-            }
-        }
+        const [injection] = await chrome.scripting.executeScript({ target: { tabId: tab.id }, func: snapshotPage });
+        page = injection?.result;
     } catch {
-        // Content script hasn't loaded yet (e.g. page just navigated)
-        if (scrapeNotice) scrapeNotice.style.display = 'none';
-        if (sourceBadge) sourceBadge.style.display = 'none';
-        document.getElementById('jobUrl').value = url;
+        // Browser pages (chrome://, the web store) can't be scripted.
+    }
+    if (!page) { showManualEntry(); return; }
+
+    const res = await sendBg({ type: 'EXTRACT_JOB', url: page.url, html: page.html });
+    const job = res?.ok ? res.data.job : null;
+    if (!job || !job.job_title) { showManualEntry(); return; }
+
+    if (notJobPage) notJobPage.style.display = 'none';
+    populateJobForm(job);
+    if (scrapeNotice) scrapeNotice.style.display = 'block';
+    if (sourceBadge) {
+        sourceBadge.textContent = `📄 Detected: ${res.data.extracted_by.job_title}`;
+        sourceBadge.style.display = 'inline-block';
     }
 }
 
-function populateJobForm(data) {
-    const set = (id, val) => { const el = document.getElementById(id); if (el) el.value = val || ''; };
-    set('jobTitle', data.title);
-    set('jobCompany', data.company);
-    set('jobLocation', data.location);
-    set('jobUrl', data.url);
-    set('jobNotes', data.description ? `Description:\n${data.description.slice(0, 500)}` : '');
+function populateJobForm(job) {
+    const set = (id, val) => { const el = document.getElementById(id); if (el) el.value = val ?? ''; };
+    set('jobTitle', job.job_title);
+    set('jobRoleType', job.role_type);
+    set('jobCompany', job.company);
+    set('jobDuration', job.duration);
+    set('jobLocation', job.location);
+    set('jobSalary', job.salary_est);
+    set('jobUrl', job.application_link);
+    set('jobNotes', job.notes);
+    set('jobSource', job.source);
 }
 
 /** ── ADD JOB — Save ────────────────────────────────────────────────────────── */
@@ -257,6 +266,9 @@ document.getElementById('btnSaveJob').addEventListener('click', async () => {
         });
         document.getElementById('scrapeNotice').style.display = 'none';
         document.getElementById('jobSourceBadge').style.display = 'none';
+    } else if (res?.status === 409) {
+        const existing = res.data.duplicate;
+        showAlert('alert-add-job', `Already tracked: ${existing.job_title} at ${existing.company} (${existing.status}).`, 'info');
     } else if (res?.status === 401) {
         showAlert('alert-add-job', 'Session expired. Please sign in again.');
         setTimeout(() => { showTabs(false); showView('login-email'); }, 1500);
@@ -266,15 +278,6 @@ document.getElementById('btnSaveJob').addEventListener('click', async () => {
     }
 });
 
-function getSourceFromUrl(url) {
-    if (!url) return 'OTHER';
-    if (url.includes('linkedin.com')) return 'LINKEDIN';
-    if (url.includes('glassdoor.com')) return 'JOB_PORTAL';
-    if (url.includes('indeed.com')) return 'JOB_PORTAL';
-    if (url.includes('naukri.com')) return 'JOB_PORTAL';
-    return 'OTHER';
-}
-
 /** ── SETTINGS ──────────────────────────────────────────────────────────────── */
 document.getElementById('btnSaveSettings').addEventListener('click', async () => {
     const apiBase = document.getElementById('apiBaseInput').value.trim();
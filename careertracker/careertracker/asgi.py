@@ -12,5 +12,17 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'careertracker.settings')
+# Serve the hot endpoints from their async views (see settings.ASYNC_VIEWS).
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from jobs.events import EVENTS_PATH, events_app  # noqa: E402 (needs the app registry)
+
+
+async def application(scope, receive, send):
+    # Event streams stay open for as long as a tab does; they are answered
+    # outside Django's request cycle to keep thousands of idle ones cheap.
+    if scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] == EVENTS_PATH:
+        return await events_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,15 @@
+from django.urls import path
+from jobs import async_views as jobs_views
+from users import async_views as users_views
+from .urls import urlpatterns as sync_urlpatterns
+
+# URLconf when ASYNC_VIEWS is on (the default under asgi.py): the I/O-bound
+# endpoints resolve to native async views, everything else to the same views
+# as urls.py.
+urlpatterns = [
+    path('api/users/send-otp/', users_views.send_otp, name='send_otp'),
+    path('api/users/verify-otp/', users_views.verify_otp, name='verify_otp'),
+    path('api/jobs/', jobs_views.job_list, name='job_list'),
+    path('api/jobs/stats/', jobs_views.job_analytics, name='job_analytics'),
+    path('api/jobs/documents/<int:pk>/download/', jobs_views.document_download, name='document_download'),
+] + sync_urlpatterns
@@ -18,6 +18,7 @@ ALLOWED_HOSTS = ['*']  # permissive — Railway health checks require this
 INSTALLED_APPS = [
     'users',
     'jobs',
+    'outbox',
     'rest_framework',
     'rest_framework.authtoken',
     'django.contrib.admin',
@@ -42,12 +43,15 @@ SITE_ID = 1
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Proxies in front of the app (Railway has one); throttles key on the
+    # client address they append to X-Forwarded-For.
+    'NUM_PROXIES': config('NUM_PROXIES', default=1, cast=int),
 }
 
 REST_AUTH = {
@@ -60,6 +64,19 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
 }
+# How long token auth trusts a cached "user is active" before checking again;
+# 0 checks on every request.
+JWT_USER_STATUS_TTL = config('JWT_USER_STATUS_TTL', default=60, cast=int)
+
+# Token buckets on send/verify OTP: "N/period" allows N at once, refilled at
+# N per period (s, m, h or d). The buckets live in the cache, so with several
+# web workers they need the shared cache below (jobs.E001), or each worker
+# would grant the full rate.
+OTP_THROTTLE_RATES = {
+    'otp_ip': config('OTP_IP_RATE', default='30/hour'),
+    'otp_email': config('OTP_EMAIL_RATE', default='5/hour'),
+    'otp_verify': config('OTP_VERIFY_RATE', default='10/hour'),
+}
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
@@ -75,7 +92,12 @@ MIDDLEWARE = [
 
 APPEND_SLASH = False  # prevent POST→redirect→GET (405)
 
-ROOT_URLCONF = 'careertracker.urls'
+# Set by asgi.py. Routes send/verify OTP, the job list, stats and document
+# downloads to async views, and turns off persistent database connections:
+# ASGI runs each request's sync code in a fresh thread, so they would leak.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
+ROOT_URLCONF = 'careertracker.asgi_urls' if ASYNC_VIEWS else 'careertracker.urls'
 
 TEMPLATES = [
     {
@@ -99,7 +121,7 @@ WSGI_APPLICATION = 'careertracker.wsgi.application'
 # Locally, falls back to SQLite. Railway injects DATABASE_URL automatically.
 DATABASE_URL = config('DATABASE_URL', default=None)
 if DATABASE_URL:
-    DATABASES = {'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)}
+    DATABASES = {'default': dj_database_url.parse(DATABASE_URL, conn_max_age=0 if ASYNC_VIEWS else 600)}
 else:
     DATABASES = {
         'default': {
@@ -109,6 +131,37 @@ else:
     }
 
 
+# ── Cache ─────────────────────────────────────────────────────────────────────
+# locmem is per-process, so invalidation does not reach other workers. Point
+# CACHE_BACKEND at a shared backend (e.g. django.core.cache.backends.redis.RedisCache)
+# when running more than one; the jobs.E001 check refuses to start otherwise.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='careertracker'),
+    }
+}
+# Web server worker processes; gunicorn and the start commands read the same variable
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+# jobs/extract/ results, per user and posting URL
+JOB_EXTRACT_CACHE_TIMEOUT = config('JOB_EXTRACT_CACHE_TIMEOUT', default=24 * 3600, cast=int)
+JOB_EXTRACT_MAX_HTML = config('JOB_EXTRACT_MAX_HTML', default=5 * 1024 * 1024, cast=int)
+# Interview calendar bodies; outlives the polling interval so quiet feeds stay off the database
+CALENDAR_CACHE_TIMEOUT = config('CALENDAR_CACHE_TIMEOUT', default=7 * 24 * 3600, cast=int)
+# Deletes are kept this long for jobs/sync/; older sync tokens get a full resync
+SYNC_TOMBSTONE_DAYS = config('SYNC_TOMBSTONE_DAYS', default=30, cast=int)
+# Live change events (jobs.events): jobs.events.PostgresBroker fans out across
+# worker processes; the in-process broker only reaches streams in the same
+# process, so it is only the default without Postgres (see jobs.W001)
+EVENT_BROKER = config('EVENT_BROKER', default=(
+    'jobs.events.PostgresBroker' if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+    else 'jobs.events.InProcessBroker'
+))
+EVENT_HEARTBEAT = config('EVENT_HEARTBEAT', default=25, cast=int)
+EVENT_TICKET_MAX_AGE = config('EVENT_TICKET_MAX_AGE', default=3600, cast=int)
+
+
 # ── Password validation ───────────────────────────────────────────────────────
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -128,7 +181,16 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_ROOT = Path(config('MEDIA_ROOT', default=str(BASE_DIR / 'media')))
+
+# Resumable document uploads are assembled here before being saved to MEDIA_ROOT.
+DOCUMENT_UPLOAD_TEMP_DIR = config('DOCUMENT_UPLOAD_TEMP_DIR', default=str(MEDIA_ROOT / 'uploads_in_progress'))
+DOCUMENT_UPLOAD_MAX_SIZE = config('DOCUMENT_UPLOAD_MAX_SIZE', default=100 * 1024 * 1024, cast=int)
+DOCUMENT_UPLOAD_CHUNK_SIZE = config('DOCUMENT_UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+# 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd) hands document
+# downloads to the proxy; empty streams them from Django.
+DOCUMENT_DOWNLOAD_OFFLOAD = config('DOCUMENT_DOWNLOAD_OFFLOAD', default='')
+DOCUMENT_ACCEL_REDIRECT_PREFIX = config('DOCUMENT_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -140,16 +202,32 @@ CORS_ALLOW_METHODS = [
 ]
 CORS_ALLOW_HEADERS = [
     'accept', 'accept-encoding', 'authorization', 'content-type',
-    'dnt', 'origin', 'user-agent', 'x-csrftoken', 'x-requested-with',
+    'dnt', 'if-none-match', 'origin', 'range', 'upload-offset', 'user-agent', 'x-csrftoken', 'x-requested-with',
 ]
 
 # ── Email ─────────────────────────────────────────────────────────────────────
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+# Offline: EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend writes
+# each message under EMAIL_FILE_PATH, or point EMAIL_HOST/EMAIL_PORT at a local
+# debugging server (python -m aiosmtpd -n -l localhost:1025) with EMAIL_USE_TLS=False.
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=str(BASE_DIR / 'sent_emails'))
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER or 'webmaster@localhost'
+
+# Mail is queued in the outbox table and sent by `manage.py process_outbox`,
+# which must run next to the web process (the "worker" process in Procfile).
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+OUTBOX_RETRY_BASE_SECONDS = config('OUTBOX_RETRY_BASE_SECONDS', default=30, cast=int)
+# Sent and failed emails (OTP codes included) are deleted after this many hours
+OUTBOX_RETENTION_HOURS = config('OUTBOX_RETENTION_HOURS', default=24, cast=int)
+
+# `manage.py ghost_applications` marks APPLIED applications GHOSTED after this
+# many days without a status change or interview.
+GHOSTED_AFTER_DAYS = config('GHOSTED_AFTER_DAYS', default=30, cast=int)
 
 # ── allauth ───────────────────────────────────────────────────────────────────
 ACCOUNT_SIGNUP_FIELDS = ['first_name', 'last_name']
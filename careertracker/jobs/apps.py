@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class JobsConfig(AppConfig):
     name = 'jobs'
+    
+    def ready(self):
+        import jobs.checks
+        import jobs.signals
+        post_migrate.connect(restore_search_triggers, sender=self)
+
+
+def restore_search_triggers(sender, using, **kwargs):
+    from django.db import connections
+    from jobs.search import ensure_sqlite_triggers
+    ensure_sqlite_triggers(connections[using])
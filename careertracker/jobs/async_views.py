@@ -0,0 +1,66 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.renderers import JSONRenderer
+from users.async_api import async_api_view, authenticate, error_response
+from .cache import auser_version, response_keys, revalidated
+from .models import JobDocument
+from .stats import arollup_stats, stats_payload
+from .uploads import document_response
+from .views import JobAnalyticsView, JobListView
+
+# Async versions of the hot read endpoints, routed by careertracker.asgi_urls
+# when the app is served over ASGI.
+
+renderer = JSONRenderer()
+
+
+def cached_api_view(view_class, build=None):
+    """
+    Serves GETs of a CachedResponseMixin view on the event loop while they
+    are cached: a matching If-None-Match gets its 304 and a hit is rendered
+    straight from the cache. A miss is built by the build(request) coroutine
+    when given, otherwise by the DRF view in a worker thread, which also
+    handles every other method and browsable-API requests.
+    """
+    sync_view = sync_to_async(view_class.as_view())
+    
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET' or 'text/html' in request.headers.get('Accept', ''):
+            return await sync_view(request, *args, **kwargs)
+        user, error = await authenticate(request)
+        if error is not None:
+            return error
+        
+        etag, key = response_keys(user.pk, await auser_version(user.pk), request.get_full_path())
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return revalidated(HttpResponseNotModified(), etag)
+        data = await cache.aget(key)
+        if data is None:
+            if build is None:
+                return await sync_view(request, *args, **kwargs)
+            data = await build(request)
+            await cache.aset(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+        return revalidated(HttpResponse(renderer.render(data), content_type='application/json'), etag)
+    
+    return csrf_exempt(view)
+
+
+async def build_stats(request):
+    return stats_payload(await arollup_stats(request.user))
+
+
+job_list = cached_api_view(JobListView)
+job_analytics = cached_api_view(JobAnalyticsView, build_stats)
+
+
+@async_api_view(['GET'])
+async def document_download(request, pk):
+    document = await JobDocument.objects.filter(pk=pk, job__user=request.user).afirst()
+    if document is None:
+        return error_response('No JobDocument matches the given query.', 404)
+    # Opening the file and stat()ing it are blocking calls too.
+    return await sync_to_async(document_response, thread_sensitive=False)(request, document, asynchronous=True)
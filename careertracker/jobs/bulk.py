@@ -0,0 +1,147 @@
+import codecs
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Case, F, When
+from django.db.models.functions import Now
+from rest_framework import serializers
+from .models import JobApplication
+from .serializers import JobApplicationSerializer
+from .signals import bulk_change, bulk_changed
+
+# Columns written by the export, in order. The import accepts the writable subset.
+EXPORT_FIELDS = tuple(field.attname for field in JobApplication._meta.concrete_fields if field.name != 'user')
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+MAX_REPORTED_ERRORS = 1000
+
+
+def upload_format(upload):
+    name = upload.name.lower()
+    if name.endswith('.csv') or upload.content_type == FORMATS['csv']:
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')) or upload.content_type == FORMATS['ndjson']:
+        return 'ndjson'
+    return None
+
+
+def read_rows(upload, kind):
+    """
+    Yields (row number, row dict or None, parse error or None), reading the
+    upload line by line so large files are never held in memory.
+    """
+    lines = codecs.iterdecode(upload, 'utf-8-sig')
+    if kind == 'csv':
+        reader = csv.DictReader(lines)
+        for number, row in enumerate(reader, start=1):
+            # An empty cell means "not given", so optional columns can be left blank.
+            yield number, {name: value for name, value in row.items() if name and value != ''}, None
+        return
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, None, str(e)
+            continue
+        if not isinstance(row, dict):
+            yield number, None, 'Expected a JSON object.'
+            continue
+        yield number, row, None
+
+
+def import_rows(user, rows, batch_size=500):
+    """
+    Validates rows one at a time with the API serializer and inserts them in
+    batches. All or nothing: any invalid row rolls the whole import back.
+    Returns (created count, per-row errors).
+    """
+    serializer = JobApplicationSerializer()
+    created, errors, batch = [], [], []
+    with transaction.atomic():
+        for number, row, parse_error in rows:
+            try:
+                if parse_error is not None:
+                    raise serializers.ValidationError({'non_field_errors': [parse_error]})
+                # The same per-item validation ListSerializer(many=True) runs, minus
+                # holding every row in memory.
+                validated = serializer.run_validation(row)
+            except serializers.ValidationError as e:
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'row': number, 'errors': e.detail})
+                else:
+                    break
+                continue
+            if errors:
+                continue  # keep validating to report errors, but stop inserting
+            job = JobApplication(user=user, **validated)
+            job.fill_fingerprints()
+            batch.append(job)
+            if len(batch) >= batch_size:
+                created += JobApplication.objects.bulk_create(batch)
+                batch = []
+        if errors:
+            transaction.set_rollback(True)
+            return 0, errors
+        created += JobApplication.objects.bulk_create(batch)
+        # bulk_create sends no post_save.
+        bulk_changed.send(JobApplication, user_id=user.pk, ids=[job.pk for job in created], action='create')
+    return len(created), errors
+
+
+def update_rows(user, ids, changes):
+    """
+    Applies already-validated changes to the user's applications among ids in
+    one UPDATE. Returns the ids that were changed; ids the user does not own
+    are left alone.
+    """
+    with transaction.atomic():
+        rows = JobApplication.objects.select_for_update().filter(user=user, pk__in=ids)
+        changed = list(rows.order_by('pk').values_list('pk', flat=True))
+        if 'status' in changes:
+            # SET reads the row as it was, so only rows whose status moves get a new activity time.
+            activity = Case(When(status=changes['status'], then=F('last_activity_at')), default=Now())
+            changes = {**changes, 'last_activity_at': activity}
+        JobApplication.objects.filter(pk__in=changed).update(**changes, updated_at=Now())
+        if set(JobApplication.FINGERPRINT_SOURCES) & set(changes):
+            jobs = list(JobApplication.objects.filter(pk__in=changed).only('id', *JobApplication.FINGERPRINT_SOURCES))
+            for job in jobs:
+                job.fill_fingerprints()
+            JobApplication.objects.bulk_update(jobs, ['normalized_link', 'title_fingerprint'])
+        bulk_changed.send(JobApplication, user_id=user.pk, ids=changed, action='update', fields=list(changes))
+    return changed
+
+
+def delete_rows(user, ids):
+    """Deletes the user's applications among ids, with their interviews and documents."""
+    with transaction.atomic(), bulk_change():
+        rows = JobApplication.objects.select_for_update().filter(user=user, pk__in=ids)
+        deleted = list(rows.order_by('pk').values_list('pk', flat=True))
+        JobApplication.objects.filter(pk__in=deleted).delete()
+        bulk_changed.send(JobApplication, user_id=user.pk, ids=deleted, action='delete')
+    return deleted
+
+
+class Echo:
+    # csv.writer wants a file; this hands each formatted line straight back.
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, kind):
+    """Yields the export line by line, streaming rows from a server-side cursor."""
+    rows = queryset.order_by('id').values_list(*EXPORT_FIELDS).iterator(chunk_size=2000)
+    if kind == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,137 @@
+import hashlib
+import secrets
+from datetime import UTC, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from .cache import user_version
+from .models import CalendarFeed, Interview
+
+# Interview calendar served at a secret per-user URL that calendar apps poll
+# every few minutes. A poll normally costs three cache reads: the token, the
+# user's data version and the body built at that version. The database is
+# only read when the version moved since the body was built.
+
+PRODID = '-//CareerTracker//Interviews//EN'
+EVENT_LENGTH = timedelta(hours=1)
+# Tokens are looked up at most this often. Unknown ones are remembered so a
+# stale subscription doesn't query on every poll, and known ones expire so a
+# rotation reaches workers whose cache its delete didn't: with a per-process
+# cache, an old URL keeps working there for up to this long.
+TOKEN_TIMEOUT = 300
+TYPE_LABELS = dict(Interview.interview_types)
+
+
+def token_key(token):
+    return f'jobs:calendar:token:{token}'
+
+
+def body_key(user_id):
+    return f'jobs:calendar:{user_id}'
+
+
+def feed_for(user, rotate=False):
+    """The user's CalendarFeed, created on first use. rotate=True swaps in a new token."""
+    feed = CalendarFeed.objects.filter(user=user).first()
+    if feed is None:
+        return CalendarFeed.objects.create(user=user, token=secrets.token_urlsafe(32))
+    if rotate:
+        old_token, feed.token = feed.token, secrets.token_urlsafe(32)
+        feed.save(update_fields=['token'])
+        cache.delete(token_key(old_token))
+    return feed
+
+
+def feed_user(token):
+    """The user id a feed token belongs to, or None."""
+    key = token_key(token)
+    user_id = cache.get(key)
+    if user_id is None:
+        user_id = CalendarFeed.objects.filter(token=token).values_list('user_id', flat=True).first() or 0
+        cache.set(key, user_id, TOKEN_TIMEOUT)
+    return user_id or None
+
+
+def ics_text(value):
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+    )
+
+
+def ics_time(value):
+    return value.astimezone(UTC).strftime('%Y%m%dT%H%M%SZ')
+
+
+def fold(line):
+    """Splits a content line into 75-octet pieces (RFC 5545 3.1), never inside a UTF-8 sequence."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line
+    pieces, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and data[end] & 0xC0 == 0x80:
+            end -= 1
+        pieces.append(data[start:end].decode())
+        start, limit = end, 74
+    return '\r\n '.join(pieces)
+
+
+def event_lines(pk, interview_at, interview_with, meeting_link, kind, company, job_title):
+    start = ics_time(interview_at)
+    summary = f'{TYPE_LABELS.get(kind, kind)} interview: {company}'
+    description = f'{job_title} at {company}\nWith {interview_with}\n{meeting_link}'
+    return [
+        'BEGIN:VEVENT',
+        f'UID:interview-{pk}@careertracker',
+        # DTSTAMP is required; the interview time keeps unchanged events byte-identical.
+        f'DTSTAMP:{start}',
+        f'DTSTART:{start}',
+        f'DTEND:{ics_time(interview_at + EVENT_LENGTH)}',
+        fold(f'SUMMARY:{ics_text(summary)}'),
+        fold(f'DESCRIPTION:{ics_text(description)}'),
+        fold(f'LOCATION:{ics_text(meeting_link)}'),
+        fold(f'URL:{meeting_link}'),
+        'END:VEVENT',
+    ]
+
+
+def build_calendar(user_id):
+    rows = (
+        Interview.objects.filter(job__user_id=user_id).order_by('interview_at', 'id')
+        .values_list('id', 'interview_at', 'interview_with', 'meeting_link', 'type', 'job__company', 'job__job_title')
+    )
+    lines = [
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN', 'METHOD:PUBLISH',
+        'X-WR-CALNAME:CareerTracker interviews',
+    ]
+    for row in rows:
+        lines.extend(event_lines(*row))
+    lines.append('END:VCALENDAR')
+    return ('\r\n'.join(lines) + '\r\n').encode()
+
+
+def calendar_body(user_id):
+    """
+    (body, ETag, Last-Modified timestamp) for the user's feed. The body is
+    rebuilt only when the user's data version has moved on, and the ETag is a
+    hash of its bytes, so edits that don't show up in the calendar keep both
+    validators and clients go on getting 304s.
+    """
+    version = user_version(user_id)
+    key = body_key(user_id)
+    entry = cache.get(key)
+    if entry is not None and entry['version'] == version:
+        return entry['body'], entry['etag'], entry['last_modified']
+    body = build_calendar(user_id)
+    etag = quote_etag(hashlib.md5(body).hexdigest())
+    if entry is not None and entry['etag'] == etag:
+        last_modified = entry['last_modified']
+    else:
+        last_modified = int(timezone.now().timestamp())
+    cache.set(key, {'version': version, 'body': body, 'etag': etag, 'last_modified': last_modified}, settings.CALENDAR_CACHE_TIMEOUT)
+    return body, etag, last_modified
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.utils.module_loading import import_string
+
+from .cache import shared_cache
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    # User versions, cached responses and throttle buckets live in the cache;
+    # with a per-process one, a write on one worker never reaches the others.
+    if settings.WEB_CONCURRENCY > 1 and not shared_cache():
+        return [Error(
+            f'WEB_CONCURRENCY={settings.WEB_CONCURRENCY} with a per-process cache.',
+            hint='Set CACHE_BACKEND to a shared cache such as django.core.cache.backends.redis.RedisCache, or run one worker.',
+            id='jobs.E001',
+        )]
+    return []
+
+
+@register()
+def check_event_broker(app_configs, **kwargs):
+    # Imported here: jobs.events pulls in the ASGI and auth machinery.
+    from .events import InProcessBroker
+
+    if settings.WEB_CONCURRENCY > 1 and import_string(settings.EVENT_BROKER) is InProcessBroker:
+        return [Warning(
+            f'WEB_CONCURRENCY={settings.WEB_CONCURRENCY} with the in-process event broker.',
+            hint='Events only reach streams on the worker that handled the write. Use Postgres, '
+                 'whose jobs.events.PostgresBroker is then the default, or run one worker.',
+            id='jobs.W001',
+        )]
+    return []
@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from .fingerprints import link_key, title_key
+from .history import summarize
+from .models import Interview, JobApplication, JobDocument, StatusTransition
+from .signals import bulk_change, bulk_changed
+
+# Later statuses win when duplicates are merged.
+STATUS_PROGRESS = ('APPLIED', 'GHOSTED', 'REPLIED', 'REJECTED', 'INTERVIEW', 'OFFER')
+# Taken from a duplicate when the kept application has none.
+FILLED_FIELDS = ('application_link', 'salary_est', 'contacts', 'source', 'location')
+MERGED_FIELDS = FILLED_FIELDS + ('status', 'notes', 'normalized_link', 'title_fingerprint', 'last_activity_at', 'updated_at')
+
+
+def duplicate_probes(user, job_title, company, application_link=None):
+    """
+    (match, queryset) per key the new application has. SQLite only uses the
+    partial indexes when the query repeats their condition and has no ORDER
+    BY of its own, so the few rows sharing a key come back unordered.
+    """
+    for match, field, key in (
+        ('application_link', 'normalized_link', link_key(application_link)),
+        ('title', 'title_fingerprint', title_key(company, job_title)),
+    ):
+        if key:
+            yield match, JobApplication.objects.filter(~Q(**{field: ''}), user=user, **{field: key}).order_by()
+
+
+def find_duplicate(user, job_title, company, application_link=None):
+    """
+    The user's earliest application with the same normalized link or title
+    fingerprint, and which of the two matched, or (None, None). One probe of
+    each partial index.
+    """
+    found = [
+        (job.applied_at, job.pk, job, match)
+        for match, queryset in duplicate_probes(user, job_title, company, application_link)
+        for job in queryset
+    ]
+    if not found:
+        return None, None
+    return min(found, key=lambda entry: entry[:2])[2:]
+
+
+def duplicated_keys(queryset, field):
+    return (
+        queryset.exclude(**{field: ''}).values('user_id', field).order_by()
+        .annotate(copies=Count('id')).filter(copies__gt=1)
+    )
+
+
+def duplicate_groups(queryset):
+    """
+    Yields (user_id, ids) for each set of applications that share a link or a
+    title fingerprint with another, directly or through a third, oldest first.
+    """
+    links = duplicated_keys(queryset, 'normalized_link').values('normalized_link')
+    titles = duplicated_keys(queryset, 'title_fingerprint').values('title_fingerprint')
+    rows = (
+        queryset.filter(Q(normalized_link__in=links) | Q(title_fingerprint__in=titles))
+        .order_by('user_id', 'applied_at', 'id').values_list('user_id', 'id', 'normalized_link', 'title_fingerprint')
+    )
+    # Union-find over ids, joined through every key they carry. Roots are the
+    # oldest member, so each group comes out in age order.
+    parent, owners, first_with, position = {}, {}, {}, {}
+
+    def root(job_id):
+        while parent[job_id] != job_id:
+            parent[job_id] = parent[parent[job_id]]
+            job_id = parent[job_id]
+        return job_id
+
+    for user_id, job_id, link, title in rows.iterator():
+        parent[job_id], owners[job_id], position[job_id] = job_id, user_id, len(position)
+        for key in (('link', user_id, link), ('title', user_id, title)):
+            if not key[2]:
+                continue
+            other = first_with.setdefault(key, job_id)
+            if other != job_id:
+                a, b = root(other), root(job_id)
+                if a != b:
+                    parent[max(a, b, key=position.get)] = min(a, b, key=position.get)
+    groups = {}
+    for job_id in position:
+        groups.setdefault(root(job_id), []).append(job_id)
+    for ids in groups.values():
+        if len(ids) > 1:
+            yield owners[ids[0]], ids
+
+
+def merge_into(keeper, duplicate):
+    for field in FILLED_FIELDS:
+        if getattr(keeper, field) in (None, '') and getattr(duplicate, field) not in (None, ''):
+            setattr(keeper, field, getattr(duplicate, field))
+    if STATUS_PROGRESS.index(duplicate.status) > STATUS_PROGRESS.index(keeper.status):
+        keeper.status = duplicate.status
+    keeper.last_activity_at = max(keeper.last_activity_at, duplicate.last_activity_at)
+    if duplicate.notes and duplicate.notes not in (keeper.notes or ''):
+        keeper.notes = f'{keeper.notes}\n\n{duplicate.notes}' if keeper.notes else duplicate.notes
+
+
+def merge_duplicates(user_id, groups):
+    """
+    Folds each group into its first (oldest) application in one transaction:
+    interviews, documents and status history move over, empty fields are filled in, the most
+    advanced status and all distinct notes are kept, and the rest are deleted.
+    Returns how many applications were removed.
+    """
+    with transaction.atomic(), bulk_change():
+        ids = [job_id for group in groups for job_id in group]
+        jobs = JobApplication.objects.select_for_update().filter(user_id=user_id, pk__in=ids).in_bulk()
+        keepers, removed, now = [], [], timezone.now()
+        for group in groups:
+            members = [jobs[job_id] for job_id in group if job_id in jobs]
+            if len(members) < 2:
+                continue
+            keeper, duplicates = members[0], members[1:]
+            for duplicate in duplicates:
+                merge_into(keeper, duplicate)
+            duplicate_ids = [duplicate.pk for duplicate in duplicates]
+            Interview.objects.filter(job_id__in=duplicate_ids).update(job=keeper, updated_at=now)
+            JobDocument.objects.filter(job_id__in=duplicate_ids).update(job=keeper, updated_at=now)
+            StatusTransition.objects.filter(job_id__in=duplicate_ids).update(job=keeper)
+            keeper.fill_fingerprints()
+            keeper.updated_at = now
+            keepers.append(keeper)
+            removed.extend(duplicate_ids)
+        if not removed:
+            return 0
+        JobApplication.objects.bulk_update(keepers, MERGED_FIELDS)
+        JobApplication.objects.filter(pk__in=removed).delete()
+        keeper_ids = [keeper.pk for keeper in keepers]
+        summarize(keeper_ids)
+        bulk_changed.send(JobApplication, user_id=user_id, ids=keeper_ids, action='update', fields=list(MERGED_FIELDS))
+        bulk_changed.send(JobApplication, user_id=user_id, ids=removed, action='delete')
+    return len(removed)
@@ -0,0 +1,80 @@
+import re
+import zipfile
+from xml.etree import ElementTree
+
+# Text pulled out of JobDocument files for search. Nothing here touches the
+# database, so extract_file() can run in worker processes.
+
+MAX_CHARS = 200_000
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class UnsupportedDocument(Exception):
+    pass
+
+
+def compact(text):
+    # Search only needs the words: collapse whitespace and cap the size.
+    return WHITESPACE_RE.sub(' ', text).strip()[:MAX_CHARS]
+
+
+def pdf_text(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedDocument('PDF extraction needs the pypdf package.')
+    reader = PdfReader(path)
+    parts, size = [], 0
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        parts.append(text)
+        size += len(text)
+        if size >= MAX_CHARS:
+            break
+    return '\n'.join(parts)
+
+
+def docx_text(path):
+    parts = []
+    with zipfile.ZipFile(path) as archive, archive.open('word/document.xml') as xml:
+        # iterparse keeps memory flat on large documents.
+        for _, element in ElementTree.iterparse(xml):
+            if element.tag == f'{WORD_NS}t' and element.text:
+                parts.append(element.text)
+            elif element.tag == f'{WORD_NS}p':
+                parts.append('\n')
+                element.clear()
+    return ''.join(parts)
+
+
+def plain_text(path):
+    with open(path, 'rb') as file:
+        data = file.read(MAX_CHARS * 4)
+    if b'\0' in data[:8192]:
+        raise UnsupportedDocument('Binary file with no extractable text.')
+    return data.decode('utf-8', errors='replace')
+
+
+def extract_file(path):
+    """
+    Returns (text, error) for the file at path. The type is sniffed from the
+    content, since content-addressed blobs have no extension.
+    """
+    try:
+        with open(path, 'rb') as file:
+            head = file.read(8)
+        if head.startswith(b'%PDF'):
+            text = pdf_text(path)
+        elif head.startswith(b'PK') and zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                if 'word/document.xml' not in archive.namelist():
+                    raise UnsupportedDocument('Zip archive is not a DOCX document.')
+            text = docx_text(path)
+        else:
+            text = plain_text(path)
+    except UnsupportedDocument as e:
+        return '', str(e)
+    except Exception as e:
+        return '', f'Extraction failed: {e.__class__.__name__}: {e}'
+    return compact(text), ''
@@ -0,0 +1,258 @@
+import asyncio
+import io
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager, suppress
+from functools import cache
+
+from asgiref.sync import sync_to_async
+from corsheaders.middleware import CorsMiddleware
+from django.conf import settings
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connections, transaction
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from users.async_api import error_response, jwt_authentication
+from users.authentication import ACTIVE, user_status
+
+# Live change events for the api/jobs/events/ stream (events_app below).
+# Writes publish {'kind', 'action', 'ids'} once their transaction commits.
+# The broker named by settings.EVENT_BROKER carries events to the streams
+# the user has open. A client catches up through sync/ when an event
+# arrives, so events carry ids, not rows. A 'resync' event means some
+# events were lost.
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PATH = '/api/jobs/events/'
+CHANNEL = 'careertracker_events'
+# Bulk changes past this many ids go out as ids=None ("several, resync"),
+# which also keeps NOTIFY payloads far below Postgres' 8000-byte cap.
+MAX_IDS = 200
+RESYNC = {'kind': 'resync'}
+# Events held for a stream that isn't reading, before it is sent a resync instead.
+QUEUE_SIZE = 100
+# How long EventSource waits before reconnecting.
+RETRY_MS = 3000
+TICKET_SALT = 'jobs.events'
+
+
+def publish(user_id, kind, action, ids):
+    event = {'kind': kind, 'action': action, 'ids': list(ids) if len(ids) <= MAX_IDS else None}
+    # robust: the write has committed, so a broker outage must not fail the request.
+    transaction.on_commit(lambda: broker().publish(user_id, event), robust=True)
+
+
+@cache
+def broker():
+    return import_string(settings.EVENT_BROKER)()
+
+
+def stream_ticket(user_id):
+    """
+    A signed, short-lived credential for the event stream alone. EventSource
+    can't send an Authorization header, and it keeps access tokens out of URLs.
+    """
+    return signing.dumps(user_id, salt=TICKET_SALT)
+
+
+def ticket_user(ticket):
+    """The user id a valid ticket was issued to, or None."""
+    try:
+        user_id = signing.loads(ticket, salt=TICKET_SALT, max_age=settings.EVENT_TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return user_id if user_status(user_id) == ACTIVE else None
+
+
+def push(queue, event):
+    if queue.full():
+        # A client this far behind gets one resync instead of the backlog.
+        while not queue.empty():
+            queue.get_nowait()
+        event = RESYNC
+    queue.put_nowait(event)
+
+
+class InProcessBroker:
+    """
+    Delivers to the streams open in this process: runserver, tests and
+    single-worker deployments. Each stream is an asyncio.Queue on its
+    event loop, so an idle client costs a queue and a suspended coroutine.
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self.lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        self.deliver(user_id, event)
+
+    def deliver(self, user_id, event):
+        # Called from request threads as well as the event loop.
+        with self.lock:
+            streams = list(self.streams.get(int(user_id), ()))
+        for loop, queue in streams:
+            try:
+                loop.call_soon_threadsafe(push, queue, event)
+            except RuntimeError:
+                pass  # the loop has shut down; the stream is going away with it
+
+    def deliver_all(self, event):
+        with self.lock:
+            user_ids = list(self.streams)
+        for user_id in user_ids:
+            self.deliver(user_id, event)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        # Token-authenticated users carry the id from the JWT claim, a string.
+        user_id = int(user_id)
+        stream = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        with self.lock:
+            self.streams.setdefault(user_id, set()).add(stream)
+        try:
+            yield stream[1]
+        finally:
+            with self.lock:
+                streams = self.streams.get(user_id, set())
+                streams.discard(stream)
+                if not streams:
+                    self.streams.pop(user_id, None)
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Fans out across worker processes with LISTEN/NOTIFY. Publishing is one
+    NOTIFY. Each process holds a single listening connection, whatever its
+    number of streams. The event loop reads it when the socket has data, so
+    no thread waits on it. Written against psycopg2, which requirements.txt pins.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+
+    def publish(self, user_id, event):
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps({**event, 'user': user_id})])
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.get_running_loop().create_task(self.listen())
+        async with super().subscribe(user_id) as queue:
+            yield queue
+
+    def connect(self):
+        wrapper = connections['default']
+        connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return connection
+
+    async def listen(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                connection = await sync_to_async(self.connect, thread_sensitive=False)()
+            except Exception:
+                logger.exception('Could not LISTEN for job events; retrying')
+                await asyncio.sleep(settings.EVENT_HEARTBEAT)
+                continue
+            readable, fd = asyncio.Event(), connection.fileno()
+            loop.add_reader(fd, readable.set)
+            try:
+                while True:
+                    await readable.wait()
+                    readable.clear()
+                    connection.poll()
+                    while connection.notifies:
+                        event = json.loads(connection.notifies.pop(0).payload)
+                        self.deliver(event.pop('user'), event)
+            except Exception:
+                logger.exception('Lost the job events LISTEN connection; reconnecting')
+                # Anything sent while reconnecting is gone.
+                self.deliver_all(RESYNC)
+            finally:
+                loop.remove_reader(fd)
+                connection.close()
+
+
+async def event_stream(user_id):
+    """The text/event-stream body for one client, with comment heartbeats while idle."""
+    async with broker().subscribe(user_id) as queue:
+        yield f'retry: {RETRY_MS}\n\n'
+        while True:
+            try:
+                async with asyncio.timeout(settings.EVENT_HEARTBEAT):
+                    event = await queue.get()
+            except TimeoutError:
+                # Keeps proxies from closing the connection, and finds out that the client has left.
+                yield ':\n\n'
+                continue
+            name = 'resync' if event['kind'] == 'resync' else 'change'
+            yield f'event: {name}\ndata: {json.dumps(event)}\n\n'
+
+
+def stream_user(request):
+    """(user id, None) for a valid ?ticket= or bearer token, else (None, the 401 to send)."""
+    try:
+        if 'ticket' in request.GET:
+            user_id = ticket_user(request.GET['ticket'])
+            if user_id is None:
+                return None, error_response('Invalid or expired ticket.', 401)
+            return user_id, None
+        result = jwt_authentication.authenticate(request)
+        if result is None:
+            raise NotAuthenticated()
+        return result[0].pk, None
+    except (AuthenticationFailed, NotAuthenticated) as error:
+        return None, error_response(error.detail, 401, {'WWW-Authenticate': jwt_authentication.authenticate_header(request)})
+    finally:
+        # No request_finished will close the connection for this request.
+        close_old_connections()
+
+
+cors = CorsMiddleware(lambda request: None)
+
+
+async def events_app(scope, receive, send):
+    """
+    GET api/jobs/events/ as a bare ASGI app, which asgi.py puts in front of
+    Django. A Django request is built only to authenticate and add the CORS
+    headers. An open stream then holds a queue and two suspended coroutines
+    rather than a whole request/response cycle.
+    """
+    await receive()  # the empty GET body
+    request = ASGIRequest(scope, io.BytesIO())
+    user_id, response = await sync_to_async(stream_user)(request)
+    if response is None:
+        response = HttpResponse(content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stops nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+    cors.add_response_headers(request, response)
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.items()]
+    await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+    if user_id is None:
+        await send({'type': 'http.response.body', 'body': response.content})
+        return
+    
+    async def pump():
+        async for chunk in event_stream(user_id):
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+    
+    streaming = asyncio.create_task(pump())
+    try:
+        # Servers don't fail send() once the client is gone, they report it here.
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+    finally:
+        streaming.cancel()
+        with suppress(asyncio.CancelledError):
+            await streaming
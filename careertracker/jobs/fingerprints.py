@@ -0,0 +1,53 @@
+import hashlib
+import re
+import unicodedata
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Keys that identify the same posting across differently written copies, used
+# to catch duplicate applications. Nothing here touches the database, so
+# models and migrations can import it.
+
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|trk\w*|ref\w*|tracking\w*|src|from|fbclid|gclid)$', re.I)
+WORD_RE = re.compile(r'[a-z0-9+#]+')
+COMPANY_SUFFIXES = frozenset((
+    'inc', 'incorporated', 'llc', 'llp', 'ltd', 'limited', 'pvt', 'private', 'plc', 'corp', 'corporation',
+    'co', 'company', 'gmbh', 'ag', 'sa', 'bv', 'the',
+))
+TITLE_WORDS = {'sr': 'senior', 'jr': 'junior', 'engg': 'engineer', 'eng': 'engineer', 'dev': 'developer', 'mgr': 'manager'}
+TITLE_NOISE = frozenset(('a', 'an', 'the', 'of', 'and', 'for', 'remote', 'hybrid', 'onsite'))
+
+
+def normalize_url(url):
+    """The posting URL without fragment and tracking parameters."""
+    parts = urlsplit(url.strip())
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMS.match(key)]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', urlencode(query), ''))
+
+
+def link_key(url):
+    """normalize_url() minus the scheme, www. and a trailing slash, or '' for no link."""
+    if not url or not url.strip():
+        return ''
+    parts = urlsplit(normalize_url(url))
+    host = parts.netloc.removeprefix('www.')
+    path = parts.path.rstrip('/')
+    return f'{host}{path}?{parts.query}' if parts.query else f'{host}{path}'
+
+
+def words(text):
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    return WORD_RE.findall(text)
+
+
+def title_key(company, job_title):
+    """
+    A hash of the company and title with case, accents, punctuation, legal
+    suffixes, common abbreviations and word order ironed out, so "Acme Inc. /
+    Sr. Backend Engineer (Remote)" and "ACME - Backend Engineer, Senior" meet.
+    Returns '' when either is blank.
+    """
+    company_words = [word for word in words(company) if word not in COMPANY_SUFFIXES]
+    title_words = sorted({TITLE_WORDS.get(word, word) for word in words(job_title)} - TITLE_NOISE)
+    if not company_words or not title_words:
+        return ''
+    return hashlib.sha1(f'{" ".join(company_words)}|{" ".join(title_words)}'.encode()).hexdigest()
@@ -0,0 +1,196 @@
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+from django.db import connections
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import FunnelSummary, JobApplication, StatusTransition
+
+# The stages an application moves forward through. Every application starts
+# out applied; GHOSTED and REJECTED end it wherever it got to.
+FUNNEL = ('APPLIED', 'REPLIED', 'INTERVIEW', 'OFFER')
+PERCENTILES = (50, 75, 90)
+DAY = 86400
+# Statuses are numbered for the array work; 0 is the '' of a first event.
+STATUSES = ('', *(value for value, _ in JobApplication.STATUS_TYPES))
+STAGE_RANK = np.array([FUNNEL.index(status) if status in FUNNEL else -1 for status in STATUSES])
+# FunnelSummary.summary: the furthest stage's rank, seconds to reach each
+# stage after APPLIED (by rank), then seconds spent in each status (by number).
+STAYED = len(FUNNEL)
+SUMMARY_SIZE = STAYED + len(STATUSES) - 1
+
+
+def record_created(jobs):
+    """Logs the status each of jobs was created with, as of applied_at."""
+    jobs = list(jobs)
+    StatusTransition.objects.bulk_create([
+        StatusTransition(user_id=job.user_id, job_id=job.pk, to_status=job.status, at=job.applied_at)
+        for job in jobs
+    ], batch_size=1000)
+    summarize([job.pk for job in jobs])
+
+
+def record_change(job, from_status):
+    # Summarized by the post_save receiver in jobs.signals.
+    StatusTransition.objects.create(
+        user_id=job.user_id, job_id=job.pk, from_status=from_status, to_status=job.status, at=timezone.now(),
+    )
+
+
+def record_changed(user_id, ids):
+    """
+    Logs a transition for each of the user's applications among ids whose
+    status differs from the last one logged. For writes that don't have the
+    old status at hand, like QuerySet.update().
+    """
+    latest = StatusTransition.objects.filter(job=OuterRef('pk')).order_by('-at', '-id').values('to_status')[:1]
+    rows = JobApplication.objects.filter(user_id=user_id, pk__in=ids).annotate(previous=Subquery(latest))
+    at = timezone.now()
+    logged = StatusTransition.objects.bulk_create([
+        StatusTransition(user_id=user_id, job_id=pk, from_status=previous or '', to_status=status, at=at)
+        for pk, status, previous in rows.values_list('pk', 'status', 'previous')
+        if status != previous
+    ], batch_size=1000)
+    summarize([transition.job_id for transition in logged])
+
+
+def summary_of(events):
+    """
+    One application's FunnelSummary.summary from its (from_status, to_status,
+    at) events in time order: the furthest funnel stage it reached, seconds
+    from its first event to reaching each later stage, then seconds spent in
+    each status it has left, NaN where there are none.
+    """
+    values = np.full(SUMMARY_SIZE, np.nan)
+    furthest, started, previous = 0, None, None
+    for from_status, to_status, at in events:
+        if previous is None:
+            started = at
+        elif from_status:
+            # Time in a status runs from the event before to the one leaving it.
+            slot = STAYED + STATUSES.index(from_status) - 1
+            values[slot] = np.nan_to_num(values[slot]) + (at - previous).total_seconds()
+        rank = STAGE_RANK[STATUSES.index(to_status)]
+        if rank > 0 and np.isnan(values[rank]):
+            values[rank] = (at - started).total_seconds()
+        furthest, previous = max(furthest, rank), at
+    values[0] = furthest
+    return values.astype('<f8').tobytes()
+
+
+def summarize(job_ids, batch_size=1000):
+    """Rewrites the FunnelSummary of each of job_ids from its logged transitions."""
+    job_ids = list(job_ids)
+    for start in range(0, len(job_ids), batch_size):
+        events = (
+            StatusTransition.objects.filter(job_id__in=job_ids[start:start + batch_size])
+            .order_by('job_id', 'at', 'id').values_list('job_id', 'from_status', 'to_status', 'at')
+        )
+        FunnelSummary.objects.bulk_create([
+            FunnelSummary(job_id=job_id, summary=summary_of(event[1:] for event in group))
+            for job_id, group in groupby(events, key=itemgetter(0))
+        ], update_conflicts=True, unique_fields=['job'], update_fields=['summary'])
+
+
+def summary_rows(user_id):
+    """(source, role_type, summary) for each of the user's applications with a logged status."""
+    return (
+        JobApplication.objects.filter(user_id=user_id, funnel_summary__isnull=False).order_by()
+        .values_list('source', 'role_type', 'funnel_summary__summary')
+    )
+
+
+def day_percentiles(labels, statuses, seconds):
+    """
+    {(label, status): {'count', 'p50', ...}} in days, for every pair present.
+    One sort, then linear interpolation between closest ranks per segment,
+    as numpy.percentile does.
+    """
+    if not len(seconds):
+        return {}
+    order = np.lexsort((seconds, statuses, labels))
+    keys = labels[order] * len(STATUSES) + statuses[order]
+    days = seconds[order] / DAY
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(keys)])
+    position = starts[:, None] + (counts[:, None] - 1) * np.array(PERCENTILES) / 100
+    low = position.astype(int)
+    high = np.minimum(low + 1, (starts + counts - 1)[:, None])
+    values = np.round(days[low] + (days[high] - days[low]) * (position - low), 1)
+    return {
+        divmod(int(keys[start]), len(STATUSES)): {
+            'count': int(count), **{f'p{q}': float(value) for q, value in zip(PERCENTILES, row)},
+        }
+        for start, count, row in zip(starts, counts, values)
+    }
+
+
+def present(block, statuses):
+    """(row, status, seconds) for each number in block that isn't NaN; column i is statuses[i]."""
+    row, column = np.nonzero(~np.isnan(block))
+    return row, statuses[column], block[row, column]
+
+
+def funnel_payload(applications, furthest, reached, stayed):
+    """One group's response: furthest is a per-stage count, reached and stayed its day_percentiles()."""
+    reach = np.cumsum(furthest[::-1])[::-1]
+    return {
+        'applications': int(applications),
+        'stages': [
+            {
+                'status': status,
+                'reached': int(reach[i]),
+                # Percent of the applications reaching this stage that got further.
+                'conversion': round(reach[i + 1] / reach[i] * 100) if i + 1 < len(FUNNEL) and reach[i] else None,
+                'days_to_reach': reached.get(STATUSES.index(status)) if i else None,
+            }
+            for i, status in enumerate(FUNNEL)
+        ],
+        'days_in_stage': {STATUSES[code]: stayed[code] for code in sorted(stayed)},
+    }
+
+
+def funnel_stats(user_id):
+    """
+    Per-stage reach and conversion, days from applying to each stage and days
+    spent in each status, overall and by source and role type. Reads one
+    FunnelSummary per application, off an index that covers the application
+    side of the join; the rest is array arithmetic.
+    """
+    queryset = summary_rows(user_id)
+    # Straight off the cursor: the ORM's per-row converters would cost as much
+    # as the query itself here, and every column already has its Python type.
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(*queryset.query.sql_with_params())
+        rows = cursor.fetchall()
+    if not rows:
+        return {'funnel': funnel_payload(0, np.zeros(len(FUNNEL), int), {}, {}), 'by_source': {}, 'by_role_type': {}}
+    # One join and one frombuffer for all the summaries, rather than a call per row.
+    summaries = np.frombuffer(b''.join([row[2] for row in rows]), dtype='<f8').reshape(len(rows), SUMMARY_SIZE)
+    furthest = summaries[:, 0].astype(int)
+    reached = present(summaries[:, 1:STAYED], np.array([STATUSES.index(stage) for stage in FUNNEL[1:]]))
+    stayed = present(summaries[:, STAYED:], np.arange(1, len(STATUSES)))
+
+    groupings = {
+        'funnel': ([''], np.zeros(len(rows), int)),
+        'by_source': np.unique([row[0] or 'UNKNOWN' for row in rows], return_inverse=True),
+        'by_role_type': np.unique([row[1] for row in rows], return_inverse=True),
+    }
+    payload = {}
+    for name, (values, label) in groupings.items():
+        label = label.ravel()
+        reached_days = day_percentiles(label[reached[0]], reached[1], reached[2])
+        stayed_days = day_percentiles(label[stayed[0]], stayed[1], stayed[2])
+        furthest_counts = np.bincount(label * len(FUNNEL) + furthest, minlength=len(values) * len(FUNNEL)).reshape(-1, len(FUNNEL))
+        groups = {
+            str(value): funnel_payload(
+                counts.sum(), counts,
+                {status: days for (group, status), days in reached_days.items() if group == i},
+                {status: days for (group, status), days in stayed_days.items() if group == i},
+            )
+            for i, (value, counts) in enumerate(zip(values, furthest_counts))
+        }
+        payload[name] = groups[''] if name == 'funnel' else groups
+    return payload
@@ -0,0 +1,384 @@
+import hashlib
+import json
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models.functions import Mod
+from django.utils import timezone
+from django.test import RequestFactory
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from jobs.history import summarize
+from jobs.models import DocumentText, Interview, JobApplication, JobDocument, StatusTransition
+from jobs.pagination import KeysetPagination
+from jobs.postings import extract_posting
+from jobs.testing import PAGES_DIR, sample_docx, sample_pdf
+from jobs.views import JobListView
+from users.authentication import ClaimsJWTAuthentication
+from users.models import Profile
+from outbox.models import OutgoingEmail
+
+KEYWORDS = (
+    'kafka', 'kubernetes', 'django', 'react', 'postgres', 'rust', 'golang', 'terraform', 'spark', 'airflow',
+    'graphql', 'redis', 'android', 'swift', 'pytorch', 'tensorflow', 'snowflake', 'elixir', 'scala', 'fintech',
+    'healthcare', 'gaming', 'robotics', 'compilers', 'embedded', 'security', 'payments', 'search', 'ads', 'growth',
+)
+
+
+class Command(BaseCommand):
+    help = 'Runs a performance benchmark against a throwaway test database.'
+
+    def add_arguments(self, parser):
+        scenarios = sorted(name[len('bench_'):] for name in dir(self) if name.startswith('bench_'))
+        parser.add_argument('scenario', choices=scenarios)
+        parser.add_argument('--sizes', help='Comma-separated dataset sizes to grow through.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per measurement.')
+
+    def handle(self, *args, **options):
+        if options['sizes']:
+            options['sizes'] = [int(size) for size in options['sizes'].split(',')]
+        else:
+            del options['sizes']
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            getattr(self, f'bench_{options["scenario"]}')(**options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def measure(self, client, url, repeat):
+        timings = []
+        for _ in range(repeat):
+            cache.clear()  # time the database path, not the response cache
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.content[:200]
+        return statistics.median(timings), len(response.content)
+
+    def client_for(self, username):
+        user = User.objects.create(username=username, email=f'{username}@example.com')
+        client = APIClient()
+        client.force_authenticate(user)
+        return user, client
+
+    def grow_applications(self, user, total, batch_size=5000):
+        existing = JobApplication.objects.filter(user=user).count()
+        for start in range(existing, total, batch_size):
+            jobs = [
+                JobApplication(
+                    user=user, job_title=f'Engineer {i}', role_type='Full Time', company=f'Company {i % 500}',
+                    duration='Permanent', status='APPLIED', location='Remote', confidence='MEDIUM',
+                    source='LINKEDIN', application_link=f'https://jobs.example.com/{i}',
+                    notes=' '.join(random.Random(i).sample(KEYWORDS, 3)) + '. ' + 'Lorem ipsum dolor sit amet. ' * 40,
+                )
+                for i in range(start, min(start + batch_size, total))
+            ]
+            for job in jobs:
+                job.fill_fingerprints()
+            JobApplication.objects.bulk_create(jobs)
+
+    def bench_joblist(self, repeat, sizes=(100, 1000, 10000, 50000), **options):
+        user, client = self.client_for('bench')
+        page_url = '/api/jobs/?page_size=50&fields=id,company,job_title,status,applied_at'
+        self.stdout.write(f'{"rows":>8} {"first ms":>9} {"deep ms":>9} {"page bytes":>11} {"full ms":>9} {"full bytes":>11}')
+        for size in sizes:
+            self.grow_applications(user, size)
+            first_ms, first_bytes = self.measure(client, page_url, repeat)
+
+            middle = JobApplication.objects.filter(user=user).order_by(*KeysetPagination.ordering)[size // 2]
+            cursor = KeysetPagination().encode_cursor(middle)
+            deep_ms, _ = self.measure(client, f'{page_url}&cursor={cursor}', repeat)
+
+            # The unpaginated list grows linearly; only sample it where that stays tolerable.
+            full = self.measure(client, '/api/jobs/', 1) if size <= 10000 else None
+            self.stdout.write(
+                f'{size:>8} {first_ms:>9.1f} {deep_ms:>9.1f} {first_bytes:>11} '
+                f'{full[0] if full else float("nan"):>9.1f} {full[1] if full else "-":>11}'
+            )
+
+    def bench_search(self, repeat, sizes=(1000, 10000, 100000), **options):
+        user, client = self.client_for('bench')
+        queries = {
+            'page': '/api/jobs/?search=kafka&page_size=50&fields=id,company,job_title,status,applied_at',
+            'ranked': '/api/jobs/?search=kafka%20rust%20compilers&fields=id,company,job_title,status,applied_at',
+            'prefix': '/api/jobs/?search=Company%2042&page_size=50&fields=id,company',
+        }
+        self.stdout.write(f'{"rows":>8} ' + ' '.join(f'{name + " ms":>10}' for name in queries))
+        for size in sizes:
+            self.grow_applications(user, size)
+            timings = [self.measure(client, url, repeat)[0] for url in queries.values()]
+            self.stdout.write(f'{size:>8} ' + ' '.join(f'{ms:>10.1f}' for ms in timings))
+
+    def bench_reminders(self, repeat, sizes=(1000, 10000, 100000), workers='1,4', **options):
+        # Mail goes to the locmem backend, so this measures the queue rather than an SMTP
+        # server. Parallel outbox workers only apply on Postgres; SQLite runs them serially.
+        user, _ = self.client_for('bench')
+        self.grow_applications(user, 100)
+        jobs = list(JobApplication.objects.filter(user=user))
+        soon = timezone.now() + timedelta(hours=2)
+        for size in sizes:
+            for worker_count in workers.split(','):
+                Interview.objects.all().delete()
+                OutgoingEmail.objects.all().delete()
+                for start in range(0, size, 5000):
+                    Interview.objects.bulk_create([
+                        Interview(job=jobs[i % len(jobs)], interview_at=soon, interview_with='Recruiter',
+                                  meeting_link='https://meet.example.com/abc', type='TECHNICAL')
+                        for i in range(start, min(start + 5000, size))
+                    ])
+                mail.outbox = []
+                self.stdout.write(f'{size:>8} due, {worker_count} worker(s): ', ending='')
+                start = time.perf_counter()
+                call_command('send_reminders', stdout=StringIO())
+                self.stdout.write(f'queued in {time.perf_counter() - start:.2f}s, ', ending='')
+                call_command('process_outbox', once=True, workers=int(worker_count), batch_size=500, stdout=self.stdout)
+                assert len(mail.outbox) == size
+
+    def bench_documents(self, repeat, sizes=(1, 10), **options):
+        # sizes are MiB. Uploads the same file to `repeat` applications, then
+        # re-sends it through an upload session, where the hash alone is enough.
+        user, client = self.client_for('bench')
+        self.grow_applications(user, repeat + 1)
+        jobs = list(JobApplication.objects.filter(user=user))
+        self.stdout.write(f'{"MiB":>5} {"first ms":>9} {"repeat ms":>10} {"session ms":>11} {"disk MiB":>9}')
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            for size in sizes:
+                content = os.urandom(size * 1024 * 1024)
+                timings = []
+                for job in jobs[:repeat]:
+                    start = time.perf_counter()
+                    response = client.post('/api/jobs/documents/', {
+                        'job': job.pk, 'doc_types': 'RESUME', 'file': SimpleUploadedFile('resume.pdf', content),
+                    }, format='multipart')
+                    timings.append((time.perf_counter() - start) * 1000)
+                    assert response.status_code == 201, response.content[:200]
+                digest = hashlib.sha256(content).hexdigest()  # computed client-side
+                start = time.perf_counter()
+                response = client.post('/api/jobs/documents/uploads/', {
+                    'job': jobs[-1].pk, 'doc_types': 'RESUME', 'filename': 'resume.pdf',
+                    'size': len(content), 'sha256': digest,
+                }, format='json')
+                session_ms = (time.perf_counter() - start) * 1000
+                assert 'document' in response.data, response.data
+                disk = sum(
+                    os.path.getsize(os.path.join(directory, name))
+                    for directory, _, names in os.walk(media) for name in names
+                )
+                self.stdout.write(
+                    f'{size:>5} {timings[0]:>9.1f} {statistics.median(timings[1:]):>10.1f} '
+                    f'{session_ms:>11.1f} {disk / 1024 / 1024:>9.1f}'
+                )
+
+    def bench_extract(self, repeat, sizes=(1000, 3000), workers='1,4', **options):
+        # A generated corpus, a third each PDF, DOCX and plain text, extracted by
+        # extract_documents and then found through job search.
+        user, client = self.client_for('bench')
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            for size in sizes:
+                self.grow_applications(user, size)
+                jobs = list(JobApplication.objects.filter(user=user, documents__isnull=True))
+                for job in jobs:
+                    i = job.pk
+                    rng = random.Random(i)
+                    lines = [f'Resume {i}', ' '.join(rng.sample(KEYWORDS, 3))] + ['Lorem ipsum dolor sit amet.'] * 30
+                    kind = ('pdf', 'docx', 'txt')[i % 3]
+                    content = {'pdf': sample_pdf, 'docx': sample_docx, 'txt': lambda lines: '\n'.join(lines).encode()}[kind](lines)
+                    JobDocument(job=job, doc_types='RESUME', file=ContentFile(content, name=f'resume-{i}.{kind}')).save()
+                for worker_count in workers.split(','):
+                    DocumentText.objects.all().delete()
+                    self.stdout.write(f'{size:>8} documents, {worker_count} worker(s): ', ending='')
+                    call_command('extract_documents', once=True, workers=int(worker_count), stdout=self.stdout)
+                url = '/api/jobs/?search=kafka&page_size=50&fields=id,company'
+                self.stdout.write(f'{size:>8} documents, search {self.measure(client, url, repeat)[0]:.1f} ms')
+
+    def bench_matches(self, repeat, sizes=(1000, 10000, 50000), **options):
+        user, client = self.client_for('bench')
+        Profile.objects.create(user=user, skills='Django, Postgres, Kafka, Redis')
+        url = '/api/jobs/?ordering=-resume_match&fields=id,company,resume_match'
+        self.stdout.write(f'{"rows":>8} {"full score ms":>14} {"10 edits ms":>12} {"sorted list ms":>15}')
+        for size in sizes:
+            self.grow_applications(user, size)
+            JobApplication.objects.filter(user=user).update(resume_match=None)
+            start = time.perf_counter()
+            call_command('score_matches', once=True, stdout=StringIO())
+            full_ms = (time.perf_counter() - start) * 1000
+
+            for job in JobApplication.objects.filter(user=user)[:10]:
+                job.notes = f'{job.notes} rust'
+                job.save()
+            start = time.perf_counter()
+            call_command('score_matches', once=True, stdout=StringIO())
+            edits_ms = (time.perf_counter() - start) * 1000
+
+            sorted_ms, _ = self.measure(client, url, max(1, repeat // 10))
+            self.stdout.write(f'{size:>8} {full_ms:>14.1f} {edits_ms:>12.1f} {sorted_ms:>15.1f}')
+
+    def bench_duplicates(self, repeat, sizes=(1000, 10000, 100000), **options):
+        user, client = self.client_for('bench')
+        payload = {
+            'role_type': 'Full Time', 'company': 'Company 7 Inc.', 'duration': 'Permanent',
+            'status': 'APPLIED', 'location': 'Remote', 'confidence': 'MEDIUM', 'source': 'LINKEDIN',
+        }
+        self.stdout.write(f'{"rows":>8} {"409 ms":>8} {"new ms":>8} {"dedupe ms":>10}')
+        for size in sizes:
+            self.grow_applications(user, size)
+            timings = {'409': [], 'new': []}
+            for n in range(repeat):
+                for name, title in (('409', 'Engineer 7'), ('new', f'Staff Engineer {size}-{n}')):
+                    start = time.perf_counter()
+                    response = client.post('/api/jobs/', {**payload, 'job_title': title}, format='json')
+                    timings[name].append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 201, response.content[:200]
+
+            # One copy of every hundredth application for the batch command to fold back.
+            copies = list(JobApplication.objects.filter(user=user, job_title__startswith='Engineer')[::100])
+            for job in copies:
+                job.pk = None
+            JobApplication.objects.bulk_create(copies)
+            start = time.perf_counter()
+            call_command('dedupe_applications', stdout=StringIO())
+            dedupe_ms = (time.perf_counter() - start) * 1000
+            self.stdout.write(
+                f'{size:>8} {statistics.median(timings["409"]):>8.2f} {statistics.median(timings["new"]):>8.2f} {dedupe_ms:>10.1f}'
+            )
+
+    def bench_funnel(self, repeat, sizes=(1000, 10000, 20000), **options):
+        user, client = self.client_for('bench')
+        paths = (
+            (), (), (('GHOSTED', 21),), (('REJECTED', 9),), (('REPLIED', 5), ('REJECTED', 12)),
+            (('REPLIED', 3), ('INTERVIEW', 8), ('REJECTED', 15)), (('INTERVIEW', 6), ('OFFER', 20)),
+        )
+        sources = [value for value, _ in JobApplication.SOURCE_TYPES]
+        self.stdout.write(f'{"rows":>8} {"events":>8} {"funnel ms":>10}')
+        for size in sizes:
+            start_id = JobApplication.objects.filter(user=user).count()
+            self.grow_applications(user, size)
+            # grow_applications bulk-creates, so log the histories here.
+            jobs = JobApplication.objects.filter(user=user).order_by('id')[start_id:]
+            events = []
+            for n, job in enumerate(jobs.only('id', 'applied_at')):
+                previous, at = '', job.applied_at
+                for status, days in ((('APPLIED', 0),) + paths[n % len(paths)]):
+                    at += timedelta(days=days, hours=n % 24)
+                    events.append(StatusTransition(user=user, job_id=job.pk, from_status=previous, to_status=status, at=at))
+                    previous = status
+            StatusTransition.objects.bulk_create(events, batch_size=5000)
+            summarize(job.pk for job in jobs.only('id'))
+            for n, source in enumerate(sources):
+                JobApplication.objects.alias(slot=Mod('id', len(sources))).filter(user=user, slot=n).update(source=source)
+            funnel_ms, _ = self.measure(client, '/api/jobs/stats/funnel/', repeat)
+            self.stdout.write(f'{size:>8} {StatusTransition.objects.filter(user=user).count():>8} {funnel_ms:>10.1f}')
+
+    def bench_ghosts(self, repeat, sizes=(10000, 100000), **options):
+        users = [User.objects.create(username=f'bench{n}', email=f'bench{n}@example.com') for n in range(20)]
+        self.stdout.write(f'{"rows":>8} {"stale":>8} {"sweep ms":>9} {"rows/s":>8} {"no-op ms":>9}')
+        for size in sizes:
+            for user in users:
+                self.grow_applications(user, size // len(users))
+            call_command('rebuild_stats', stdout=StringIO())
+            # Every other application has been quiet for two months.
+            quiet = timezone.now() - timedelta(days=60)
+            stale = JobApplication.objects.alias(slot=Mod('id', 2)).filter(slot=0, status='APPLIED')
+            count = stale.update(last_activity_at=quiet)
+            start = time.perf_counter()
+            call_command('ghost_applications', stdout=StringIO())
+            sweep_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            call_command('ghost_applications', stdout=StringIO())
+            noop_ms = (time.perf_counter() - start) * 1000
+            assert JobApplication.objects.filter(status='GHOSTED').count() >= count
+            self.stdout.write(f'{size:>8} {count:>8} {sweep_ms:>9.0f} {count / sweep_ms * 1000:>8.0f} {noop_ms:>9.1f}')
+
+    def bench_auth(self, repeat, sizes=(1000, 100000), **options):
+        def timed(authenticate, requests, before=None):
+            timings = []
+            for _ in range(repeat):
+                for request in requests:
+                    if before:
+                        before()
+                    start = time.perf_counter()
+                    authenticate(request)
+                    timings.append((time.perf_counter() - start) * 1_000_000)
+            return statistics.median(timings)
+
+        factory = RequestFactory()
+        variants = {
+            'stock': (JWTAuthentication().authenticate, None),
+            'claims cold': (ClaimsJWTAuthentication().authenticate, cache.clear),
+            'claims warm': (ClaimsJWTAuthentication().authenticate, None),
+        }
+        self.stdout.write(f'{"users":>8} ' + ' '.join(f'{name + " us":>15}' for name in variants) + f' {"list stock ms":>14} {"list claims ms":>15}')
+        for size in sizes:
+            existing = User.objects.count()
+            User.objects.bulk_create([User(username=f'auth{i}', email=f'auth{i}@example.com') for i in range(existing, size)], batch_size=5000)
+            users = list(User.objects.order_by('?')[:50])
+            requests = [factory.get('/api/jobs/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}') for user in users]
+            timings = [timed(authenticate, requests, before) for authenticate, before in variants.values()]
+
+            # A cached list response end to end, where auth is most of the work left.
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(users[0])}')
+            lists = []
+            for auth in (JWTAuthentication, ClaimsJWTAuthentication):
+                with mock.patch.object(JobListView, 'authentication_classes', [auth]):
+                    client.get('/api/jobs/?fields=id')
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        client.get('/api/jobs/?fields=id')
+                    lists.append((time.perf_counter() - start) * 1000 / repeat)
+            self.stdout.write(f'{size:>8} ' + ' '.join(f'{timing:>15.1f}' for timing in timings) + f' {lists[0]:>14.2f} {lists[1]:>15.2f}')
+
+    def bench_postings(self, repeat, sizes=(0, 200, 1000), **options):
+        # The saved fixture pages, padded with sizes KB of navigation and script
+        # markup ahead of the posting the way real job sites are.
+        pages = json.loads((PAGES_DIR / 'index.json').read_text())
+        filler = (
+            '<div class="feed-shared-update"><a class="app-aware-link" href="/in/someone/">Someone</a>'
+            '<span class="t-12 t-black--light">Promoted</span><ul><li><a href="/jobs/">Jobs</a></li></ul></div>\n'
+            '<script>window.dataLayer.push({"event": "impression", "id": 42, "html": "<h1>x</h1>"});</script>\n'
+        )
+        user, client = self.client_for('bench')
+        self.stdout.write(f'{"KB pad":>7} {"page":<15} {"extract ms":>11} {"pages/s":>8} {"api ms":>8} {"cached ms":>10}')
+        for size in sizes:
+            padding = filler * (size * 1024 // len(filler))
+            for name, page in pages.items():
+                html = re.sub(r'<body[^>]*>', lambda body: body.group(0) + padding, (PAGES_DIR / name).read_text(), count=1)
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    extract_posting(page['url'], html)
+                extract_ms = (time.perf_counter() - start) * 1000 / repeat
+
+                timings = []
+                for _ in range(repeat):
+                    cache.clear()
+                    start = time.perf_counter()
+                    client.post('/api/jobs/extract/', {'url': page['url'], 'html': html}, format='json')
+                    timings.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                response = client.post('/api/jobs/extract/', {'url': page['url']}, format='json')
+                cached_ms = (time.perf_counter() - start) * 1000
+                assert response.status_code == 200, response.content[:200]
+                self.stdout.write(
+                    f'{size:>7} {name:<15} {extract_ms:>11.2f} {1000 / extract_ms:>8.0f} '
+                    f'{statistics.median(timings):>8.2f} {cached_ms:>10.2f}'
+                )
@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand
+from jobs.dedupe import duplicate_groups, merge_duplicates
+from jobs.models import JobApplication
+
+class Command(BaseCommand):
+    help = 'Merges duplicate applications (same link or company and title) with their interviews and documents.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only dedupe this user id.')
+        parser.add_argument('--batch-size', type=int, default=200, help='Duplicate groups merged per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Report the duplicates without merging them.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        queryset = JobApplication.objects.all()
+        if options['user']:
+            queryset = queryset.filter(user_id=options['user'])
+
+        pending, removed, groups, users = {}, 0, 0, set()
+        for user_id, ids in duplicate_groups(queryset):
+            groups += 1
+            users.add(user_id)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'user {user_id}: keeping {ids[0]}, merging {", ".join(map(str, ids[1:]))}')
+            if options['dry_run']:
+                removed += len(ids) - 1
+                continue
+            batch = pending.setdefault(user_id, [])
+            batch.append(ids)
+            if len(batch) >= options['batch_size']:
+                removed += merge_duplicates(user_id, pending.pop(user_id))
+        for user_id, batch in pending.items():
+            removed += merge_duplicates(user_id, batch)
+
+        verb = 'Would merge' if options['dry_run'] else 'Merged'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {removed} duplicates into {groups} applications for {len(users)} users '
+            f'in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,60 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from jobs.cache import invalidate_user
+from jobs.doctext import extract_file
+from jobs.matching import mark_stale
+from jobs.models import DocumentBlob, DocumentText, JobDocument
+from jobs.storage import blob_name
+
+class Command(BaseCommand):
+    help = 'Extracts searchable text from uploaded documents in a pool of worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Blobs extracted and saved per transaction.')
+        parser.add_argument('--workers', type=int, default=None, help='Extraction processes (default: one per CPU).')
+        parser.add_argument('--once', action='store_true', help='Extract the pending documents and exit instead of polling.')
+        parser.add_argument('--poll', type=float, default=10, help='Seconds to sleep when nothing is pending.')
+
+    def handle(self, *args, **options):
+        storage = JobDocument._meta.get_field('file').storage
+        pending = DocumentBlob.objects.filter(text__isnull=True, refcount__gt=0).order_by('updated_at')
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                started = time.perf_counter()
+                done = failed = size = 0
+                while True:
+                    blobs = list(pending.values_list('sha256', 'size')[:options['batch_size']])
+                    if not blobs:
+                        break
+                    paths = [storage.path(blob_name(digest)) for digest, _ in blobs]
+                    # Workers only parse files; all database work stays in this process.
+                    results = list(pool.map(extract_file, paths, chunksize=max(1, len(paths) // 32)))
+                    self.save_batch([digest for digest, _ in blobs], results)
+                    done += len(blobs)
+                    failed += sum(1 for _, error in results if error)
+                    size += sum(blob_size for _, blob_size in blobs)
+                if done:
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Extracted {done} documents ({failed} failed, {size / 1024 / 1024:.1f} MiB) in {elapsed:.2f}s, '
+                        f'{done / elapsed:.0f} docs/s'
+                    ))
+                if options['once']:
+                    return
+                time.sleep(options['poll'])
+
+    def save_batch(self, digests, results):
+        with transaction.atomic():
+            DocumentText.objects.bulk_create(
+                [DocumentText(blob_id=digest, text=text, error=error) for digest, (text, error) in zip(digests, results)],
+                ignore_conflicts=True,
+            )
+            # New text changes what these users' searches return.
+            owners = JobDocument.objects.filter(blob_id__in=digests).values_list('job__user_id', flat=True).distinct()
+            for user_id in owners:
+                invalidate_user(user_id)
+            # Resume text feeds resume_match scores.
+            resume_owners = JobDocument.objects.filter(blob_id__in=digests, doc_types='RESUME').values('job__user_id')
+            mark_stale(user_id__in=resume_owners)
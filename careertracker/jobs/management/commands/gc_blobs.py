@@ -0,0 +1,73 @@
+import os
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+from jobs.models import DocumentBlob, JobDocument
+from jobs.signals import refresh_blob_refcounts
+from jobs.storage import BLOB_DIR, blob_digest, blob_name
+
+class Command(BaseCommand):
+    help = 'Deletes stored document blobs that no JobDocument references any more.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=24, help='Hours a blob must have been unreferenced before it is deleted.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.storage = JobDocument._meta.get_field('file').storage
+        cutoff = timezone.now() - timedelta(hours=options['grace'])
+        size = options['batch_size']
+
+        digests = list(DocumentBlob.objects.order_by('pk').values_list('pk', flat=True))
+        fixed = sum(refresh_blob_refcounts(digests[start:start + size]) for start in range(0, len(digests), size))
+
+        deleted = freed = 0
+        orphans = DocumentBlob.objects.filter(refcount=0, updated_at__lt=cutoff)
+        for blob in orphans.iterator():
+            if self.delete_blob(blob, cutoff):
+                deleted += 1
+                freed += blob.size
+
+        strays = self.sweep_strays(cutoff.timestamp())
+        verb = 'Would delete' if self.dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'Corrected {fixed} refcounts. {verb} {deleted} orphaned blobs ({freed} bytes) and {strays} stray files'
+        ))
+
+    def delete_blob(self, blob, cutoff):
+        name = blob_name(blob.pk)
+        # A re-upload of the same content touches the file; leave it alone.
+        if self.storage.exists(name) and self.storage.get_modified_time(name) >= cutoff:
+            return False
+        if self.dry_run:
+            return True
+        try:
+            with transaction.atomic():
+                # PROTECT refuses this if a document started using the blob meanwhile.
+                blob.delete()
+                transaction.on_commit(lambda: self.storage.delete(name))
+        except ProtectedError:
+            return False
+        return True
+
+    def sweep_strays(self, cutoff):
+        # Files left by uploads whose document was never saved: no blob row,
+        # or a temp file from an interrupted write.
+        root = self.storage.path(BLOB_DIR)
+        stray = []
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                digest = blob_digest(os.path.relpath(path, self.storage.location).replace(os.sep, '/'))
+                if digest is None or not DocumentBlob.objects.filter(pk=digest).exists():
+                    stray.append(path)
+        if not self.dry_run:
+            for path in stray:
+                os.unlink(path)
+        return len(stray)
@@ -0,0 +1,66 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from jobs.models import JobApplication
+from jobs.signals import bulk_changed
+
+class Command(BaseCommand):
+    help = 'Marks APPLIED applications with no status change or interview for a while as GHOSTED. Run it daily, like send_reminders.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.GHOSTED_AFTER_DAYS, help='Days without activity before an application is ghosted.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Applications claimed and updated per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Count the stale applications without changing them.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        stale = JobApplication.objects.filter(status='APPLIED', last_activity_at__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'{stale.count()} applications would be ghosted')
+            return
+
+        ghosted, last = 0, None
+        while True:
+            changed, last = self.ghost_batch(stale, last, options['batch_size'])
+            if last is None:
+                break
+            ghosted += changed
+        self.stdout.write(self.style.SUCCESS(f'Ghosted {ghosted} applications in {time.perf_counter() - started:.2f}s'))
+
+    def ghost_batch(self, stale, after, size):
+        """
+        Claims up to size stale rows past the (last_activity_at, id) key after,
+        in index order, and flips them. Returns how many changed and the key
+        to continue from, or None once the range is exhausted.
+        """
+        if after is not None:
+            stale = stale.filter(Q(last_activity_at__gt=after[0]) | Q(last_activity_at=after[0], id__gt=after[1]))
+        with transaction.atomic():
+            # Rows a user or another sweeper holds are skipped, not waited on;
+            # the next run picks them up if they are still stale.
+            rows = list(
+                stale.select_for_update(skip_locked=True)
+                .order_by('last_activity_at', 'id')
+                .values_list('last_activity_at', 'id', 'user_id')[:size]
+            )
+            if not rows:
+                return 0, None
+            # stale's filter rides along, so a row that moved on since it was read
+            # is left alone; the rows this UPDATE changed are the ones carrying its timestamp.
+            now = timezone.now()
+            ids = [pk for _, pk, _ in rows]
+            stale.filter(pk__in=ids).update(status='GHOSTED', last_activity_at=now, updated_at=now)
+            per_user = {}
+            for user_id, pk in JobApplication.objects.filter(pk__in=ids, status='GHOSTED', last_activity_at=now).values_list('user_id', 'id'):
+                per_user.setdefault(user_id, []).append(pk)
+            for user_id, changed in per_user.items():
+                bulk_changed.send(
+                    JobApplication, user_id=user_id, ids=changed, action='update',
+                    fields=['status', 'last_activity_at'], moved={('APPLIED', 'GHOSTED'): len(changed)},
+                )
+        return sum(map(len, per_user.values())), rows[-1][:2]
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+from jobs.models import JobApplication, JobDocument
+from jobs.stats import rebuild_stats
+from .benchmark import Command as Benchmark
+
+ENDPOINTS = {
+    'list': ('GET', '/api/jobs/?page_size=20&fields=id,company,job_title,status,applied_at'),
+    'stats': ('GET', '/api/jobs/stats/'),
+    'download': ('GET', '/api/jobs/documents/{document}/download/'),
+    'otp': ('POST', '/api/users/send-otp/'),
+}
+SERVERS = {
+    'wsgi': ['gunicorn', 'careertracker.wsgi', '--bind', '127.0.0.1:{port}', '--workers', '{workers}', '--threads', '{threads}'],
+    'asgi': ['uvicorn', 'careertracker.asgi:application', '--port', '{port}', '--workers', '{workers}', '--no-access-log'],
+}
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+async def read_response(reader):
+    """(status, keep_alive) of one HTTP/1.1 response, with the body read off."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('server closed the connection')
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while size := int((await reader.readline()).split(b';')[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    return int(status_line.split()[1]), headers.get('connection') != 'close'
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests the WSGI (gunicorn) and ASGI (uvicorn) deployments one after the other against a '
+        'throwaway database, reporting requests per second and latency percentiles. The clients run in '
+        'this process, so on a small machine they compete with the servers for CPU.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='wsgi,asgi')
+        parser.add_argument('--endpoints', default='list,stats,download', help=f'Comma-separated, from {", ".join(ENDPOINTS)}.')
+        parser.add_argument('--clients', type=int, default=500, help='Concurrent keep-alive connections.')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds of load per mode.')
+        parser.add_argument('--workers', type=int, default=2, help='Server processes per mode.')
+        parser.add_argument('--threads', type=int, default=8, help='Threads per gunicorn worker.')
+        parser.add_argument('--rows', type=int, default=1000, help='Applications seeded for the load user.')
+        parser.add_argument('--database-url', help='Database to seed and serve from; a temporary SQLite file by default.')
+        parser.add_argument('--prepare', action='store_true', help='Internal: migrate and seed the current database.')
+
+    def handle(self, *args, **options):
+        if options['prepare']:
+            return self.prepare(options['rows'])
+        endpoints = options['endpoints'].split(',')
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+
+        workdir = tempfile.mkdtemp(prefix='careertracker-load-')
+        env = {
+            **os.environ, 'DEBUG': 'False', 'MEDIA_ROOT': os.path.join(workdir, 'media'),
+            'DATABASE_URL': options['database_url'] or f'sqlite:///{workdir}/load.sqlite3',
+        }
+        env.pop('ASYNC_VIEWS', None)
+        prepare = [sys.executable, 'manage.py', 'loadtest', '--prepare', '--rows', str(options['rows'])]
+        seeded = json.loads(subprocess.run(prepare, env=env, cwd=settings.BASE_DIR, capture_output=True, check=True, text=True).stdout)
+
+        self.stdout.write(f'{options["clients"]} clients for {options["duration"]:g}s per mode, endpoints: {", ".join(endpoints)}')
+        self.stdout.write(f'{"mode":<6} {"requests":>9} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7}')
+        for mode in options['modes'].split(','):
+            port = free_port()
+            command = [part.format(port=port, **options) for part in SERVERS[mode]]
+            server = subprocess.Popen(
+                [sys.executable, '-m', *command, '--log-level', 'warning'], env=env, cwd=settings.BASE_DIR,
+            )
+            try:
+                self.wait_for(port, server)
+                latencies, errors = asyncio.run(self.load(port, endpoints, seeded, options))
+            finally:
+                server.terminate()
+                server.wait()
+            done = len(latencies)
+            p50, p99 = (statistics.quantiles(latencies, n=100)[index] for index in (49, 98)) if done > 1 else (0, 0)
+            self.stdout.write(f'{mode:<6} {done:>9} {done / options["duration"]:>8.0f} {p50:>8.1f} {p99:>8.1f} {errors:>7}')
+
+    def prepare(self, rows):
+        call_command('migrate', verbosity=0)
+        user = User.objects.create(username='load', email='load@example.com')
+        Benchmark().grow_applications(user, rows)
+        rebuild_stats([user.pk])
+        job = JobApplication.objects.filter(user=user).first()
+        document = JobDocument.objects.create(
+            job=job, doc_types='RESUME', file=ContentFile(random.Random(0).randbytes(256 * 1024), name='resume.pdf'),
+        )
+        self.stdout.write(json.dumps({'token': str(AccessToken.for_user(user)), 'document': document.pk}))
+
+    def wait_for(self, port, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'Server exited with status {server.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Server did not start listening on port {port}')
+
+    async def load(self, port, endpoints, seeded, options):
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + options['duration']
+
+        def request(name, number):
+            method, path = ENDPOINTS[name]
+            body = json.dumps({'email': f'load{number}@example.com'}).encode() if method == 'POST' else b''
+            return (
+                f'{method} {path.format(**seeded)} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                f'Authorization: Bearer {seeded["token"]}\r\nAccept: application/json\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'
+            ).encode() + body
+
+        async def client(number):
+            nonlocal errors
+            connection = None
+            for sent in range(sys.maxsize):
+                if time.perf_counter() >= deadline:
+                    break
+                start = time.perf_counter()
+                try:
+                    if connection is None:
+                        connection = await asyncio.open_connection('127.0.0.1', port)
+                    reader, writer = connection
+                    writer.write(request(endpoints[(number + sent) % len(endpoints)], number * 100000 + sent))
+                    status, keep_alive = await read_response(reader)
+                except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                    status, keep_alive = 0, False
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += not 200 <= status < 300
+                if not keep_alive and connection is not None:
+                    connection[1].close()
+                    connection = None
+            if connection is not None:
+                connection[1].close()
+
+        await asyncio.gather(*(client(number) for number in range(options['clients'])))
+        return latencies, errors
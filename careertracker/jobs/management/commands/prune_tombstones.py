@@ -0,0 +1,16 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from jobs.sync import prune_tombstones
+
+class Command(BaseCommand):
+    help = 'Deletes sync tombstones older than SYNC_TOMBSTONE_DAYS in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.SYNC_TOMBSTONE_DAYS, help='Keep tombstones this many days.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        deleted = prune_tombstones(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones in {time.perf_counter() - started:.2f}s'))
@@ -0,0 +1,19 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from jobs.models import UploadSession
+from jobs.uploads import discard
+
+class Command(BaseCommand):
+    help = 'Deletes resumable document uploads that were never finished, along with their partial files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=24, help='Age in hours after which an upload counts as abandoned.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['older_than'])
+        purged = 0
+        for session in UploadSession.objects.filter(created_at__lt=cutoff).iterator():
+            discard(session)
+            purged += 1
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} abandoned uploads'))
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from jobs.models import UserJobStats
+from jobs.stats import rebuild_stats
+
+class Command(BaseCommand):
+    help = 'Recomputes the UserJobStats analytics rollup from JobApplication rows.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only rebuild these user ids.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users aggregated per query.')
+    
+    def handle(self, *args, **options):
+        user_ids = options['user_ids'] or list(User.objects.order_by('pk').values_list('pk', flat=True))
+        batch_size = options['batch_size']
+        
+        for start in range(0, len(user_ids), batch_size):
+            rebuild_stats(user_ids[start:start + batch_size])
+        
+        rows = UserJobStats.objects.filter(user_id__in=user_ids).count() if options['user_ids'] else UserJobStats.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {len(user_ids)} users ({rows} rollup rows)'))
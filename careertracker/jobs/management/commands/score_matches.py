@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from jobs.cache import invalidate_user
+from jobs.matching import score_user
+from jobs.models import JobApplication
+
+class Command(BaseCommand):
+    help = 'Computes resume_match for applications whose score is missing or out of date.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Scores written per UPDATE.')
+        parser.add_argument('--once', action='store_true', help='Score the stale applications and exit instead of polling.')
+        parser.add_argument('--poll', type=float, default=10, help='Seconds to sleep when nothing is stale.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            users = list(
+                JobApplication.objects.filter(resume_match__isnull=True).order_by()
+                .values_list('user_id', flat=True).distinct()
+            )
+            scored = 0
+            for user_id in users:
+                count = score_user(user_id, batch_size=options['batch_size'])
+                if count:
+                    invalidate_user(user_id)
+                scored += count
+            if scored:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(self.style.SUCCESS(
+                    f'Scored {scored} applications for {len(users)} users in {elapsed:.2f}s'
+                ))
+            if options['once']:
+                return
+            time.sleep(options['poll'])
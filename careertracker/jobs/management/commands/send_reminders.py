@@ -1,46 +1,59 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
+from jobs.cache import invalidate_user
 from jobs.models import Interview
+from outbox.mail import enqueue_emails, outgoing
 from datetime import timedelta
 
+def reminder_email(interview):
+    user = interview.job.user
+    company = interview.job.company
+    when = interview.interview_at.strftime('%Y-%m-%d %H:%M')
+    link = interview.meeting_link or 'Check details'
+    return outgoing(
+        subject=f'Reminder: Interview with {company} tomorrow!',
+        body=(
+            f'Hi {user.username},\n\n'
+            f'Good Luck! You have a {interview.type} interview with {company}\n'
+            f'Time: {when}\n'
+            f'Type: {interview.type}\n'
+            f'Link: {link}\n'
+            f'Prepare well!'
+        ),
+        from_email=settings.EMAIL_HOST_USER,
+        to=[user.email],
+    )
+
 class Command(BaseCommand):
-    help = 'Sends email reminders for interviews happening in the next 24 hrs.'
-    
-    def handle(self, *args, **kwargs):
+    help = 'Queues email reminders for interviews happening in the next 24 hrs; process_outbox sends them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Interviews claimed and flagged per transaction.')
+
+    def handle(self, *args, **options):
         now = timezone.now()
-        tomorrow = now + timedelta(hours=24)
-        upcoming_interviews = Interview.objects.filter(
-            interview_at__range=(now, tomorrow), remainder_sent=False
+        due = Interview.objects.filter(
+            interview_at__range=(now, now + timedelta(hours=24)), remainder_sent=False
         )
-        
-        count = 0
-        for interview in upcoming_interviews:
-            user = interview.job.user
-            
-            subject = f'Reminder: Interview with {interview.job.company} tomorrow!'
-            message = (
-                f'Hi {user.username},\n\n'
-                f'Good Luck! You have a {interview.type} interview with {interview.job.company}\n'
-                f'Time: {interview.interview_at.strftime('%Y-%m-%d %H:%M')}\n'
-                f'Type: {interview.type}\n'
-                f'Link: {interview.meeting_link or 'Check details'}\n'
-                f'Prepare well!'
+        pks = list(due.order_by('pk').values_list('pk', flat=True))
+        size = options['batch_size']
+        queued = sum(self.enqueue_batch(pks[start:start + size]) for start in range(0, len(pks), size))
+        self.stdout.write(self.style.SUCCESS(f'Successfully queued {queued} reminders'))
+
+    def enqueue_batch(self, pks):
+        with transaction.atomic():
+            # Queuing and flagging commit together, so each reminder is queued exactly once.
+            interviews = list(
+                Interview.objects.select_for_update(skip_locked=True, of=('self',))
+                .select_related('job__user')
+                .filter(pk__in=pks, remainder_sent=False)
             )
-            
-            try:
-                send_mail(
-                    subject, message, 
-                    settings.EMAIL_HOST_USER,
-                    [user.email],
-                    fail_silently=False
-                )
-                self.stdout.write(self.style.SUCCESS(f'Send email to {user.email}'))
-                count += 1
-                interview.remainder_sent = True
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Failed to send to {user.email}: {str(e)}'))
-        self.stdout.write(self.style.SUCCESS(f'Sucessfully sent {count} reminders'))
-            
-            
\ No newline at end of file
+            if not interviews:
+                return 0
+            enqueue_emails([reminder_email(interview) for interview in interviews])
+            Interview.objects.filter(pk__in=[interview.pk for interview in interviews]).update(remainder_sent=True, updated_at=timezone.now())
+            for user_id in {interview.job.user_id for interview in interviews}:
+                invalidate_user(user_id)
+        return len(interviews)
@@ -0,0 +1,148 @@
+import re
+from collections import Counter
+import numpy as np
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from users.models import Profile
+from .models import DocumentText, JobApplication, JobDocument
+
+# Application text the resume is compared against.
+MATCH_FIELDS = ('job_title', 'role_type', 'notes')
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]')
+# Skills are what the user chose to highlight, so they count more than resume prose.
+SKILL_WEIGHT = 3
+# Incremental passes reuse the document frequencies of the last full pass
+# until this share of the user's applications has changed since.
+REFIT_FRACTION = 0.1
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def corpus_key(user_id):
+    return f'jobs:match-corpus:{user_id}'
+
+
+def match_scores(job_texts, candidate_texts, candidate_of, corpus=None):
+    """
+    Cosine similarity between each job's TF-IDF vector and the TF-IDF vector
+    of the candidate text assigned to it (candidate_of[i] indexes
+    candidate_texts), as one sparse-by-dense matrix product. IDF comes from
+    corpus, a (documents, {term: document frequency}) pair, or else from
+    job_texts themselves. Returns the scores in [0, 1] and the corpus used.
+    """
+    vocabulary = {}
+    rows, columns, tf = [], [], []
+    for row, text in enumerate(job_texts):
+        # Counting in C first keeps the Python loop to distinct terms per job.
+        for term, n in Counter(tokenize(text)).items():
+            rows.append(row)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+            tf.append(n)
+    count, size = len(job_texts), len(vocabulary)
+    if corpus is None:
+        df = np.bincount(np.array(columns, dtype=np.int64), minlength=size)
+        corpus = (count, dict(zip(vocabulary, df.tolist())))
+    else:
+        df = np.array([corpus[1].get(term, 0) for term in vocabulary], dtype=np.int64)
+    if not size:
+        return np.zeros(count), corpus
+
+    # Term counts per (job, term) as one sparse COO array.
+    rows, columns, tf = np.array(rows), np.array(columns), np.array(tf)
+    idf = np.log((1 + corpus[0]) / (1 + df)) + 1
+    weights = (1 + np.log(tf)) * idf[columns]
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=count))
+
+    # Candidates are few, so they are dense rows over the same vocabulary;
+    # terms the jobs never use cannot contribute to a dot product.
+    candidates = np.zeros((len(candidate_texts), size))
+    for index, text in enumerate(candidate_texts):
+        terms = [vocabulary[term] for term in tokenize(text) if term in vocabulary]
+        if terms:
+            ids, counts = np.unique(terms, return_counts=True)
+            candidates[index, ids] = (1 + np.log(counts)) * idf[ids]
+    candidate_norms = np.linalg.norm(candidates, axis=1)
+    candidates /= np.where(candidate_norms, candidate_norms, 1)[:, None]
+
+    candidate_of = np.asarray(candidate_of)
+    dots = np.bincount(rows, weights=weights * candidates[candidate_of[rows], columns], minlength=count)
+    return np.divide(dots, norms, out=np.zeros(count), where=norms > 0), corpus
+
+
+def resume_texts(user_id):
+    """(latest resume text overall, {job_id: text of that job's own latest resume})."""
+    texts = dict(
+        DocumentText.objects.filter(blob__documents__job__user_id=user_id, error='')
+        .values_list('blob_id', 'text').distinct()
+    )
+    resumes = (
+        JobDocument.objects.filter(job__user_id=user_id, doc_types='RESUME', blob_id__in=texts)
+        .order_by('uploaded_at', 'id').values_list('job_id', 'blob_id')
+    )
+    per_job, latest = {}, ''
+    for job_id, blob_id in resumes:
+        per_job[job_id] = latest = texts[blob_id]
+    return latest, per_job
+
+
+def score_user(user_id, batch_size=1000):
+    """
+    Scores the user's stale applications. While few rows changed since the
+    last full pass only those are read, weighted by that pass's cached
+    document frequencies; otherwise every application is re-read to refit
+    them and any score that moved is rewritten. Returns the rows written.
+    """
+    counts = JobApplication.objects.filter(user_id=user_id).aggregate(
+        total=Count('id'), stale=Count('id', filter=Q(resume_match__isnull=True)),
+    )
+    if not counts['stale']:
+        return 0
+    corpus = cache.get(corpus_key(user_id))
+    incremental = corpus is not None and (
+        counts['stale'] + abs(counts['total'] - corpus[0]) <= counts['total'] * REFIT_FRACTION
+    )
+    skills = Profile.objects.filter(user_id=user_id).values_list('skills', flat=True).first() or ''
+    skills = ' '.join([skills.replace(',', ' ')] * SKILL_WEIGHT)
+    latest, per_job = resume_texts(user_id)
+
+    applications = JobApplication.objects.filter(user_id=user_id)
+    if incremental:
+        applications = applications.filter(resume_match__isnull=True)
+    ids, stored, job_texts, candidate_of = [], [], [], []
+    candidates = {None: 0}
+    candidate_texts = [f'{skills} {latest}']
+    for job_id, score, *fields in applications.values_list('id', 'resume_match', *MATCH_FIELDS).iterator():
+        ids.append(job_id)
+        stored.append(score)
+        job_texts.append(' '.join(value or '' for value in fields))
+        resume = per_job.get(job_id)
+        if resume not in candidates:
+            candidates[resume] = len(candidate_texts)
+            candidate_texts.append(f'{skills} {resume}')
+        candidate_of.append(candidates[resume])
+
+    scores, fitted = match_scores(job_texts, candidate_texts, candidate_of, corpus if incremental else None)
+    if not incremental:
+        cache.set(corpus_key(user_id), fitted, timeout=None)
+    scores = np.round(scores * 100, 1).tolist()
+
+    # Each UPDATE only lands if the row still holds what was read, so a row
+    # edited meanwhile keeps its NULL for the next pass.
+    table = JobApplication._meta.db_table
+    stale = [(score, job_id) for job_id, old, score in zip(ids, stored, scores) if old is None]
+    moved = [(score, job_id, old) for job_id, old, score in zip(ids, stored, scores) if old is not None and old != score]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql, params in (
+            (f'UPDATE {table} SET resume_match = %s WHERE id = %s AND resume_match IS NULL', stale),
+            (f'UPDATE {table} SET resume_match = %s WHERE id = %s AND resume_match = %s', moved),
+        ):
+            for start in range(0, len(params), batch_size):
+                cursor.executemany(sql, params[start:start + batch_size])
+    return len(stale) + len(moved)
+
+
+def mark_stale(**filters):
+    return JobApplication.objects.filter(**filters).exclude(resume_match__isnull=True).update(resume_match=None)
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-16 11:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_rename_file_types_jobdocument_doc_types'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['user', '-applied_at', 'id'], name='jobapp_user_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-16 12:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_stats(apps, schema_editor):
+    from jobs.stats import rollup_rows
+    JobApplication = apps.get_model('jobs', 'JobApplication')
+    UserJobStats = apps.get_model('jobs', 'UserJobStats')
+    UserJobStats.objects.bulk_create(rollup_rows(JobApplication.objects.all(), UserJobStats), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_jobapplication_user_recent_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserJobStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('status', 'Status'), ('source', 'Source'), ('confidence', 'Confidence'), ('role_type', 'Role type'), ('week', 'Week applied')], max_length=20)),
+                ('value', models.CharField(max_length=200)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'dimension', 'value'), name='unique_user_job_stat')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
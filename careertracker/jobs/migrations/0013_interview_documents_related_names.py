@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-16 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_userjobstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='interview',
+            name='job',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interviews', to='jobs.jobapplication'),
+        ),
+        migrations.AlterField(
+            model_name='jobdocument',
+            name='job',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='jobs.jobapplication'),
+        ),
+    ]
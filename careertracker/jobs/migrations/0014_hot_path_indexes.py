@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_interview_documents_related_names'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interview',
+            index=models.Index(fields=['job', '-interview_at'], name='interview_job_upcoming_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interview',
+            index=models.Index(condition=models.Q(('remainder_sent', False)), fields=['interview_at'], name='interview_unsent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['user', 'status', '-applied_at'], name='jobapp_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['user', 'source', '-applied_at'], name='jobapp_user_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['user', 'confidence', '-applied_at'], name='jobapp_user_confidence_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobdocument',
+            index=models.Index(fields=['job', '-uploaded_at'], name='jobdoc_job_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:03
+
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from jobs.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from jobs.search import uninstall_search_index
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0014_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:40
+
+import django.db.models.deletion
+import jobs.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdocument',
+            name='filename',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='jobdocument',
+            name='file',
+            field=models.FileField(storage=jobs.storage.document_storage, upload_to='job_documents/'),
+        ),
+        migrations.CreateModel(
+            name='DocumentBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField()),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('refcount', 0)), fields=['updated_at'], name='docblob_orphan_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='jobdocument',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documents', to='jobs.documentblob'),
+        ),
+    ]
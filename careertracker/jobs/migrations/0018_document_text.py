@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-17 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def install(apps, schema_editor):
+    from jobs.search import install_document_search_index
+    install_document_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from jobs.search import uninstall_document_search_index
+    uninstall_document_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0017_content_addressed_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(blank=True)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('extracted_at', models.DateTimeField(auto_now_add=True)),
+                ('blob', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='text', to='jobs.documentblob')),
+            ],
+        ),
+        migrations.RunPython(install, uninstall),
+    ]
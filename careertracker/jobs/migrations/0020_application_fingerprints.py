@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-17 15:20
+
+from django.conf import settings
+from django.db import migrations, models
+from jobs.fingerprints import link_key, title_key
+
+
+def backfill(apps, schema_editor):
+    JobApplication = apps.get_model('jobs', 'JobApplication')
+    batch = []
+    for job in JobApplication.objects.only('id', 'company', 'job_title', 'application_link').iterator(chunk_size=2000):
+        job.normalized_link = link_key(job.application_link)
+        job.title_fingerprint = title_key(job.company, job.job_title)
+        batch.append(job)
+        if len(batch) >= 2000:
+            JobApplication.objects.bulk_update(batch, ['normalized_link', 'title_fingerprint'])
+            batch = []
+    JobApplication.objects.bulk_update(batch, ['normalized_link', 'title_fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_resume_match'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='normalized_link',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='jobapplication',
+            name='title_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(condition=models.Q(('normalized_link', ''), _negated=True), fields=['user', 'normalized_link'], name='jobapp_user_link_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(condition=models.Q(('title_fingerprint', ''), _negated=True), fields=['user', 'title_fingerprint'], name='jobapp_user_title_fp_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    # Earlier history wasn't kept, so each application starts with its current
+    # status as of when it was applied.
+    JobApplication = apps.get_model('jobs', 'JobApplication')
+    StatusTransition = apps.get_model('jobs', 'StatusTransition')
+    batch = []
+    for user_id, job_id, status, applied_at in JobApplication.objects.values_list('user_id', 'id', 'status', 'applied_at').iterator(chunk_size=2000):
+        batch.append(StatusTransition(user_id=user_id, job_id=job_id, to_status=status, at=applied_at))
+        if len(batch) >= 2000:
+            StatusTransition.objects.bulk_create(batch)
+            batch = []
+    StatusTransition.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0020_application_fingerprints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('APPLIED', 'Applied'), ('GHOSTED', 'Ghosted'), ('INTERVIEW', 'Interview'), ('REPLIED', 'Replied'), ('OFFER', 'Offer'), ('REJECTED', 'Rejected')], max_length=10)),
+                ('to_status', models.CharField(choices=[('APPLIED', 'Applied'), ('GHOSTED', 'Ghosted'), ('INTERVIEW', 'Interview'), ('REPLIED', 'Replied'), ('OFFER', 'Offer'), ('REJECTED', 'Rejected')], max_length=10)),
+                ('at', models.DateTimeField()),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='jobs.jobapplication')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'job', 'at'], name='transition_user_job_idx'), models.Index(fields=['job', 'at'], name='transition_job_idx')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
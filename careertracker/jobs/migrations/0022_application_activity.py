@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:40
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def backfill(apps, schema_editor):
+    # The later of the last logged status change and the last interview.
+    JobApplication = apps.get_model('jobs', 'JobApplication')
+    StatusTransition = apps.get_model('jobs', 'StatusTransition')
+    Interview = apps.get_model('jobs', 'Interview')
+    changed = StatusTransition.objects.filter(job=OuterRef('pk')).order_by('-at').values('at')[:1]
+    interviewed = Interview.objects.filter(job=OuterRef('pk')).order_by('-interview_at').values('interview_at')[:1]
+    activity = Greatest(Coalesce(Subquery(changed), F('applied_at')), Coalesce(Subquery(interviewed), F('applied_at')))
+    ids = list(JobApplication.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), 2000):
+        JobApplication.objects.filter(pk__in=ids[start:start + 2000]).update(last_activity_at=activity)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0021_status_transitions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(condition=models.Q(('status', 'APPLIED')), fields=['last_activity_at', 'id'], name='jobapp_applied_activity_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-17 16:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0024_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobApplicationSearch',
+            fields=[
+                ('job', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='jobs.jobapplication')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'jobs_jobapplication_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-17 18:40
+
+from itertools import groupby
+from operator import itemgetter
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from jobs.history import summary_of
+
+
+def backfill(apps, schema_editor):
+    StatusTransition = apps.get_model('jobs', 'StatusTransition')
+    FunnelSummary = apps.get_model('jobs', 'FunnelSummary')
+    events = (
+        StatusTransition.objects.order_by('job_id', 'at', 'id')
+        .values_list('job_id', 'from_status', 'to_status', 'at').iterator(chunk_size=2000)
+    )
+    batch = []
+    for job_id, group in groupby(events, key=itemgetter(0)):
+        batch.append(FunnelSummary(job_id=job_id, summary=summary_of(event[1:] for event in group)))
+        if len(batch) >= 2000:
+            FunnelSummary.objects.bulk_create(batch)
+            batch = []
+    FunnelSummary.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0025_job_application_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FunnelSummary',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='funnel_summary', serialize=False, to='jobs.jobapplication')),
+                ('summary', models.BinaryField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['user', 'source', 'role_type'], name='jobapp_user_groups_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 import os
+import uuid
+from .fingerprints import link_key, title_key
+from .storage import blob_digest, document_storage
 
 # Create your models here.
 
@@ -49,10 +53,121 @@ class JobApplication(models.Model):
     contacts = models.CharField(max_length=200, null=True, blank=True)
     notes = models.TextField(null=True, blank=True)
     source = models.CharField(max_length=50, choices=SOURCE_TYPES, null=True, blank=True)
+    # 0-100 resume/skills similarity from jobs.matching; NULL until score_matches
+    # (re)computes it after a change.
+    resume_match = models.FloatField(null=True, blank=True)
+    # Duplicate detection keys from jobs.fingerprints, kept up to date by save()
+    FINGERPRINT_SOURCES = ('company', 'job_title', 'application_link')
+    normalized_link = models.CharField(max_length=500, blank=True, default='', editable=False)
+    title_fingerprint = models.CharField(max_length=40, blank=True, default='', editable=False)
+    # Last status change or interview; ghost_applications retires APPLIED rows
+    # that have gone quiet by it.
+    last_activity_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Moved by every write a client can see, for jobs/sync/. resume_match and
+    # last_activity_at are derived and rewritten without it.
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            # Serves the keyset seek in KeysetPagination: WHERE user_id = ? ORDER BY applied_at DESC, id
+            models.Index(fields=['user', '-applied_at', 'id'], name='jobapp_user_recent_idx'),
+            # filterset_fields lookups, still ordered by recency
+            models.Index(fields=['user', 'status', '-applied_at'], name='jobapp_user_status_idx'),
+            models.Index(fields=['user', 'source', '-applied_at'], name='jobapp_user_source_idx'),
+            models.Index(fields=['user', 'confidence', '-applied_at'], name='jobapp_user_confidence_idx'),
+            models.Index(fields=['user', '-resume_match'], name='jobapp_user_match_idx'),
+            # Work queue for score_matches
+            models.Index(fields=['user'], condition=models.Q(resume_match__isnull=True), name='jobapp_match_stale_idx'),
+            models.Index(fields=['user', 'normalized_link'], condition=~models.Q(normalized_link=''), name='jobapp_user_link_idx'),
+            models.Index(fields=['user', 'title_fingerprint'], condition=~models.Q(title_fingerprint=''), name='jobapp_user_title_fp_idx'),
+            # ghost_applications' range scan
+            models.Index(fields=['last_activity_at', 'id'], condition=models.Q(status='APPLIED'), name='jobapp_applied_activity_idx'),
+            models.Index(fields=['user', 'updated_at'], name='jobapp_user_updated_idx'),
+            # Covers the funnel's read, which groups by these and joins FunnelSummary on id.
+            models.Index(fields=['user', 'source', 'role_type'], name='jobapp_user_groups_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot of the stored row, so signal handlers can tell what a save changed.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        if not set(self.FINGERPRINT_SOURCES) & self.get_deferred_fields():
+            self.fill_fingerprints()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(self.FINGERPRINT_SOURCES) & set(update_fields):
+            kwargs['update_fields'] = update_fields = {*update_fields, 'normalized_link', 'title_fingerprint'}
+        loaded = getattr(self, '_loaded_values', {})
+        if 'status' in loaded and loaded['status'] != self.status and (update_fields is None or 'status' in update_fields):
+            self.last_activity_at = timezone.now()
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = {*update_fields, 'last_activity_at'}
+        if update_fields:
+            # auto_now is only written when it is among update_fields.
+            kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the old snapshot by now; roll it forward.
+        update_fields = kwargs.get('update_fields')
+        deferred = self.get_deferred_fields()
+        saved = [
+            field.attname for field in self._meta.concrete_fields
+            if field.attname not in deferred and (update_fields is None or field.name in update_fields)
+        ]
+        self._loaded_values = {**getattr(self, '_loaded_values', {}), **self.field_values(saved)}
+    
+    def field_values(self, names):
+        return {name: getattr(self, name) for name in names}
+    
+    def fill_fingerprints(self):
+        # Also called directly by code that writes with bulk_create.
+        self.normalized_link = link_key(self.application_link)
+        self.title_fingerprint = title_key(self.company, self.job_title)
     
     def __str__(self):
         return f'{self.user.first_name} {self.user.last_name} -> {self.job_title}'
 
+class JobApplicationSearch(models.Model):
+    # The SQLite FTS5 index over JobApplication (jobs.search), mapped so
+    # ranked searches can join it through the ORM. Its rank column is bm25.
+    job = models.OneToOneField(
+        JobApplication, primary_key=True, db_column='rowid', db_constraint=False,
+        on_delete=models.DO_NOTHING, related_name='search_entry',
+    )
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = 'jobs_jobapplication_fts'
+
+class DocumentBlob(models.Model):
+    # One stored file, shared by every JobDocument with the same content.
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            # gc_blobs only looks at unreferenced blobs
+            models.Index(fields=['updated_at'], condition=models.Q(refcount=0), name='docblob_orphan_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.sha256} ({self.refcount} refs)'
+
+class DocumentText(models.Model):
+    # Text extracted from a blob by extract_documents, indexed for job search.
+    blob = models.OneToOneField(DocumentBlob, on_delete=models.CASCADE, related_name='text')
+    text = models.TextField(blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    extracted_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f'{self.blob_id}: {len(self.text)} chars'
+
 class JobDocument(models.Model):
     FILE_TYPES = (
         ('RESUME', 'Resume'),
@@ -61,10 +176,41 @@ class JobDocument(models.Model):
         ('OTHERS', 'Others')
     )
     
-    job = models.ForeignKey(JobApplication, on_delete=models.CASCADE)
-    file = models.FileField(upload_to='job_documents/')
+    job = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='documents')
+    file = models.FileField(upload_to='job_documents/', storage=document_storage)
+    filename = models.CharField(max_length=255, blank=True)
+    blob = models.ForeignKey(DocumentBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='documents')
     doc_types = models.CharField(max_length=20,  choices=FILE_TYPES)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', '-uploaded_at'], name='jobdoc_job_recent_idx'),
+            # sync/ probes each of the user's applications for recent changes.
+            models.Index(fields=['job', 'updated_at'], name='jobdoc_job_updated_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the refcount signal release the old blob when the file is replaced.
+        instance._loaded_blob_id = instance.__dict__.get('blob_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # Store the content first: its hash decides the blob, and the
+            # stored name no longer carries the original filename.
+            self.filename = os.path.basename(self.file.name)
+            self.file.save(self.file.name, self.file.file, save=False)
+        self.blob_id = blob_digest(self.file.name)
+        if self.blob_id is not None:
+            DocumentBlob.objects.get_or_create(sha256=self.blob_id, defaults={'size': self.file.size})
+        super().save(*args, **kwargs)
+    
+    def download_name(self):
+        return self.filename or os.path.basename(self.file.name)
     
     def __str__(self):
         type_display = dict(self.FILE_TYPES).get(self.doc_types, self.doc_types)
@@ -80,7 +226,7 @@ class Interview(models.Model):
         ('OTHERS', 'Others')
     )
     
-    job = models.ForeignKey(JobApplication, on_delete=models.CASCADE)
+    job = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='interviews')
     interview_at = models.DateTimeField()
     interview_with = models.CharField(max_length=100)
     meeting_link = models.URLField(max_length=500)
@@ -88,7 +234,118 @@ class Interview(models.Model):
     remainder_sent = models.BooleanField(default=False)
     feedback = models.TextField(blank=True, null=True)
     rating = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(5)], default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', '-interview_at'], name='interview_job_upcoming_idx'),
+            # send_reminders only ever looks at interviews that still need a reminder
+            models.Index(fields=['interview_at'], condition=models.Q(remainder_sent=False), name='interview_unsent_idx'),
+            models.Index(fields=['job', 'updated_at'], name='interview_job_updated_idx'),
+        ]
     
     def __str__(self):
         return f'{self.job.company} -> {self.type}'
-    
\ No newline at end of file
+
+class CalendarFeed(models.Model):
+    # Secret token in the URL of a user's interview calendar (jobs.calendar),
+    # which calendar apps fetch without logging in. Rotating it revokes the old URL.
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='calendar_feed')
+    token = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f'{self.user_id} calendar'
+
+class UploadSession(models.Model):
+    # A resumable JobDocument upload: chunks are appended in order until
+    # `received` reaches `size`, then the file is checksummed and saved.
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    job = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='upload_sessions')
+    doc_types = models.CharField(max_length=20, choices=JobDocument.FILE_TYPES)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    received = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f'{self.filename} ({self.received}/{self.size})'
+
+class UserJobStats(models.Model):
+    DIMENSIONS = (
+        ('status', 'Status'),
+        ('source', 'Source'),
+        ('confidence', 'Confidence'),
+        ('role_type', 'Role type'),
+        ('week', 'Week applied'),
+    )
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='job_stats')
+    dimension = models.CharField(max_length=20, choices=DIMENSIONS)
+    value = models.CharField(max_length=200)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'dimension', 'value'], name='unique_user_job_stat'),
+        ]
+    
+    def __str__(self):
+        return f'{self.user_id} {self.dimension}={self.value}: {self.count}'
+
+class Tombstone(models.Model):
+    # A deleted application, interview or document, so sync/ can tell clients
+    # to drop it. Pruned by prune_tombstones after SYNC_TOMBSTONE_DAYS.
+    KINDS = (
+        ('job', 'Job application'),
+        ('interview', 'Interview'),
+        ('document', 'Document'),
+    )
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False, related_name='tombstones')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            # Also serves the user FK.
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.kind} {self.object_id} deleted'
+
+class StatusTransition(models.Model):
+    # Append-only history of JobApplication.status, written by jobs.history.
+    # from_status is '' for the status an application was created with.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False, related_name='status_transitions')
+    job = models.ForeignKey(JobApplication, on_delete=models.CASCADE, db_index=False, related_name='status_transitions')
+    from_status = models.CharField(max_length=10, choices=JobApplication.STATUS_TYPES, blank=True)
+    to_status = models.CharField(max_length=10, choices=JobApplication.STATUS_TYPES)
+    at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            # A user's events grouped by application in time order; also serves the user FK.
+            models.Index(fields=['user', 'job', 'at'], name='transition_user_job_idx'),
+            # Latest status per application, and the job FK.
+            models.Index(fields=['job', 'at'], name='transition_job_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.job_id}: {self.from_status or "-"} -> {self.to_status}'
+
+class FunnelSummary(models.Model):
+    # What the funnel needs from one application's StatusTransitions, rewritten
+    # by jobs.history.summarize() whenever one is logged. summary packs the
+    # numbers as float64s (layout in jobs.history) so the funnel reads one
+    # short column per application.
+    job = models.OneToOneField(JobApplication, on_delete=models.CASCADE, primary_key=True, related_name='funnel_summary')
+    summary = models.BinaryField()
+    
+    def __str__(self):
+        return f'{self.job_id} funnel summary'
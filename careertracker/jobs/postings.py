@@ -0,0 +1,427 @@
+import hashlib
+import html
+import json
+import re
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import cache
+from urllib.parse import urlsplit
+from .fingerprints import normalize_url
+from .models import JobApplication
+
+# Turns the HTML of a job posting into a JobApplication payload. Extraction
+# runs in order: the page's site rules, schema.org JobPosting JSON-LD, then
+# generic meta/<h1> heuristics; each field comes from the first that has it.
+# Everything is regular expressions compiled once, with no DOM built.
+
+TEXT_FIELDS = ('job_title', 'company', 'location', 'role_type', 'duration', 'notes')
+EXTRACTED_FIELDS = TEXT_FIELDS + ('salary_est',)
+REQUIRED_FIELDS = ('job_title', 'role_type', 'company', 'duration', 'location')
+DESCRIPTION_MAX_CHARS = 10_000
+
+SELECTOR_PART_RE = re.compile(
+    r'(?P<tag>^[a-z][\w-]*)|\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+)'
+    r'|\[(?P<attr>[\w:-]+)(?:(?P<op>[*^]?=)["\']?(?P<value>[^"\'\]]*)["\']?)?\]',
+    re.I,
+)
+SKIP_RE = re.compile(r'<(script|style|noscript|svg|template)\b.*?</\1\s*>|<!--.*?-->', re.I | re.S)
+BREAK_RE = re.compile(r'<(?:br|/?p|/?div|/?li|/?h[1-6]|/?tr|/?ul|/?ol|/?section)\b[^>]*>', re.I)
+TAG_RE = re.compile(r'<[^>]+>')
+SPACES_RE = re.compile(r'[ \t\r\f\v\xa0]+')
+LINES_RE = re.compile(r'\s*\n\s*')
+JSON_LD_RE = re.compile(
+    r'<script\b[^>]*\btype\s*=\s*["\']application/ld\+json["\'][^>]*>(.*?)</script\s*>', re.I | re.S,
+)
+NUMBER_RE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+VOID_TAGS = frozenset(('meta', 'link', 'img', 'input', 'br', 'hr', 'source', 'base'))
+
+EMPLOYMENT_TYPES = {
+    'FULL_TIME': ('Full Time', 'Permanent'),
+    'PART_TIME': ('Part Time', 'Permanent'),
+    'CONTRACTOR': ('Contract', 'Contract'),
+    'TEMPORARY': ('Temporary', 'Contract'),
+    'INTERN': ('Internship', 'Internship'),
+}
+SALARY_UNITS = {'YEAR': 1, 'MONTH': 12, 'WEEK': 52, 'HOUR': 2080}
+
+
+def text_of(fragment, multiline=False):
+    # Block tags break lines (or words); inline ones like <b> join their text.
+    fragment = BREAK_RE.sub('\n' if multiline else ' ', SKIP_RE.sub(' ', fragment))
+    text = SPACES_RE.sub(' ', html.unescape(TAG_RE.sub('', fragment)))
+    if multiline:
+        return LINES_RE.sub('\n', text).strip()
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=None)
+def closing_re(tag):
+    return re.compile(rf'<(/?){re.escape(tag)}(?=[\s/>])[^>]*?(/?)>', re.I)
+
+
+class Selector:
+    """
+    A small CSS selector subset compiled to regexes: compounds of tag, .class,
+    #id, [attr], [attr="v"], [attr*="v"] and [attr^="v"], joined by
+    descendant spaces, with an optional trailing @attr to read an attribute
+    instead of the text. Matching works on the raw markup, so `>` inside
+    attribute values or unbalanced tags can throw it off; rules list
+    fallbacks for that.
+    """
+
+    def __init__(self, selector):
+        self.selector = selector
+        selector, _, self.attribute = selector.partition('@')
+        self.steps = [self.compile(compound) for compound in selector.split()]
+        if self.attribute:
+            self.attribute_re = re.compile(rf'\s{re.escape(self.attribute)}\s*=\s*(["\'])(.*?)\1', re.I | re.S)
+
+    @staticmethod
+    def compile(compound):
+        tag, conditions, literals, position = r'[a-z][\w-]*', [], [], 0
+        for match in SELECTOR_PART_RE.finditer(compound):
+            if match.start() != position:
+                break
+            position = match.end()
+            literals.append(match['cls'] or match['id'] or match['value'] or match['attr'] or '')
+            if match['tag']:
+                tag = re.escape(match['tag'])
+            elif match['cls']:
+                conditions.append(rf'\sclass\s*=\s*["\'][^"\']*?(?<![\w-]){re.escape(match["cls"])}(?![\w-])')
+            elif match['id']:
+                conditions.append(rf'\sid\s*=\s*["\']{re.escape(match["id"])}["\']')
+            elif match['op'] is None:
+                conditions.append(rf'\s{re.escape(match["attr"])}(?=[\s=/>])')
+            else:
+                value = re.escape(match['value'])
+                value = {'=': rf'{value}["\']', '*=': rf'[^"\']*?{value}', '^=': value}[match['op']]
+                conditions.append(rf'\s{re.escape(match["attr"])}\s*=\s*["\']{value}')
+        if position != len(compound):
+            raise ValueError(f'Unsupported selector: {compound!r}')
+        lookaheads = ''.join(f'(?=[^>]*?{condition})' for condition in conditions)
+        return re.compile(rf'<({tag})(?=[\s/>]){lookaheads}[^>]*>', re.I), max(literals, key=len)
+
+    @staticmethod
+    def matches(step, scope):
+        pattern, literal = step
+        if not literal:
+            yield from pattern.finditer(scope)
+            return
+        # Scanning for the class/id/attribute text with str.find and only then
+        # trying the pattern on the enclosing tag is far cheaper than running
+        # the pattern's lookaheads at every tag of a large page.
+        position = 0
+        while (found := scope.find(literal, position)) != -1:
+            start = scope.rfind('<', 0, found)
+            match = pattern.match(scope, start) if start != -1 else None
+            if match is not None and match.end() > found:
+                yield match
+                position = match.end()
+            else:
+                position = found + len(literal)
+
+    @staticmethod
+    def element(page, match):
+        # Inner markup of the element opened by match, found by counting nested
+        # tags of the same name.
+        tag = match.group(1).lower()
+        if tag in VOID_TAGS or match.group(0).endswith('/>'):
+            return ''
+        depth = 1
+        for tag_match in closing_re(tag).finditer(page, match.end()):
+            if tag_match.group(1):
+                depth -= 1
+                if not depth:
+                    return page[match.end():tag_match.start()]
+            elif not tag_match.group(2):
+                depth += 1
+        return page[match.end():]
+
+    def find(self, page, multiline=False):
+        return self.search(page, 0, multiline)
+
+    def search(self, scope, step, multiline):
+        # Like querySelector, but an ancestor match without the rest of the
+        # chain inside it moves on to the next one instead of giving up.
+        for match in self.matches(self.steps[step], scope):
+            if step + 1 < len(self.steps):
+                value = self.search(self.element(scope, match), step + 1, multiline)
+            elif self.attribute:
+                value = self.attribute_re.search(match.group(0))
+                value = ' '.join(html.unescape(value.group(2)).split()) if value else ''
+            else:
+                value = text_of(self.element(scope, match), multiline)
+            if value:
+                return value
+        return ''
+
+
+class SiteRules:
+    # Per-site selectors: each field maps to candidates tried in order.
+    def __init__(self, name, source, **fields):
+        self.name, self.source = name, source
+        self.fields = {field: [Selector(selector) for selector in selectors] for field, selectors in fields.items()}
+
+    def extract(self, page, wanted):
+        values = {}
+        for field, selectors in self.fields.items():
+            for selector in selectors:
+                value = selector.find(page, multiline=field == 'notes')
+                if value:
+                    values[field] = value
+                    break
+        if 'salary' in values:
+            values['salary_est'] = parse_salary(values.pop('salary'))
+        return values
+
+
+SITES = {}
+
+
+def register_site(domains, name, source, **fields):
+    """
+    Adds extraction rules for postings on the given domains (subdomains
+    included). Fields are JobApplication fields, plus 'salary' for free text
+    like '12-18 Lacs P.A.'; values are lists of selectors.
+    """
+    rules = SiteRules(name, source, **fields)
+    for domain in domains:
+        SITES[domain.lower()] = rules
+    return rules
+
+
+def site_for(url):
+    host = (urlsplit(url).hostname or '').lower()
+    parts = host.split('.')
+    for start in range(len(parts) - 1):
+        rules = SITES.get('.'.join(parts[start:]))
+        if rules is not None:
+            return rules
+    return None
+
+
+register_site(
+    ['linkedin.com'], 'linkedin', 'LINKEDIN',
+    job_title=[
+        '.job-details-jobs-unified-top-card__job-title h1', '.jobs-unified-top-card__job-title h1', 'h1.topcard__title',
+    ],
+    company=[
+        '.job-details-jobs-unified-top-card__company-name a', '.jobs-unified-top-card__company-name a',
+        '.topcard__org-name-link',
+    ],
+    location=[
+        '.job-details-jobs-unified-top-card__bullet', '.jobs-unified-top-card__bullet', '.topcard__flavor--bullet',
+    ],
+    notes=['.jobs-description__content', '.description__text'],
+)
+register_site(
+    ['indeed.com'], 'indeed', 'JOB_PORTAL',
+    job_title=['h1[data-testid="jobsearch-JobInfoHeader-title"] span', 'h1.jobsearch-JobInfoHeader-title'],
+    company=[
+        '[data-testid="inlineHeader-companyName"] a', '[data-company-name]', '.jobsearch-InlineCompanyRating-companyName',
+    ],
+    location=['[data-testid="job-location"]', '[data-testid="inlineHeader-companyLocation"]'],
+    salary=['#salaryInfoAndJobType span'],
+    notes=['#jobDescriptionText', '.jobsearch-jobDescriptionText'],
+)
+register_site(
+    ['glassdoor.com', 'glassdoor.co.in', 'glassdoor.co.uk'], 'glassdoor', 'JOB_PORTAL',
+    job_title=['[data-test="job-title"]', 'h1[data-test="jobTitle"]'],
+    company=['[data-test="employer-name"]'],
+    location=['[data-test="location"]'],
+    notes=['[class*="JobDetails_jobDescription"]', '.desc'],
+)
+register_site(
+    ['naukri.com'], 'naukri', 'JOB_PORTAL',
+    job_title=['h1[class*="jd-header-title"]'],
+    company=['[class*="jd-header-comp-name"] a', '[class*="jd-header-comp-name"]'],
+    location=['[class*="jhc__location"]', '[class*="location"] a'],
+    salary=['[class*="jhc__salary"] span', '[class*="salary"] span'],
+    notes=['[class*="job-desc"]'],
+)
+
+
+def parse_salary(text, unit=None):
+    """First amount in text as a yearly whole number, or None."""
+    match = NUMBER_RE.search(text or '')
+    if match is None:
+        return None
+    amount = float(match.group(0).replace(',', ''))
+    lowered = text.lower()
+    if 'lac' in lowered or 'lakh' in lowered or 'lpa' in lowered:
+        amount *= 100_000
+    if unit is None:
+        unit = next((name for name in ('HOUR', 'WEEK', 'MONTH') if name.lower() in lowered), 'YEAR')
+    return int(amount * SALARY_UNITS.get(unit.upper(), 1))
+
+
+def json_ld_postings(page):
+    for match in JSON_LD_RE.finditer(page):
+        try:
+            data = json.loads(match.group(1), strict=False)
+        except ValueError:
+            continue
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(reversed(item))
+            elif isinstance(item, dict):
+                kind = item.get('@type')
+                if kind == 'JobPosting' or (isinstance(kind, list) and 'JobPosting' in kind):
+                    yield item
+                elif '@graph' in item:
+                    stack.append(item['@graph'])
+
+
+def name_of(value):
+    if isinstance(value, dict):
+        value = value.get('name')
+    return ' '.join(str(value).split()) if value else ''
+
+
+def as_list(value):
+    # schema.org allows one value or several for almost any property.
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def posting_location(posting):
+    places = []
+    for location in as_list(posting.get('jobLocation')):
+        # A Place's address may be text, a PostalAddress or a list of either.
+        for address in as_list(location.get('address') if isinstance(location, dict) else location):
+            if isinstance(address, str):
+                parts = [address]
+            elif isinstance(address, dict):
+                parts = [name_of(address.get(key)) for key in ('addressLocality', 'addressRegion', 'addressCountry')]
+            else:
+                continue
+            place = ', '.join(part for part in parts if part)
+            if place and place not in places:
+                places.append(place)
+    if posting.get('jobLocationType') == 'TELECOMMUTE':
+        places.insert(0, 'Remote')
+    return '; '.join(places)
+
+
+def from_json_ld(page, wanted):
+    posting = next(json_ld_postings(page), None)
+    if posting is None:
+        return {}
+    description = str(posting.get('description') or '')
+    if '&lt;' in description:
+        # Some sites HTML-escape the markup inside the JSON string as well.
+        description = html.unescape(description)
+    values = {
+        'job_title': name_of(posting.get('title')),
+        'company': name_of(posting.get('hiringOrganization')),
+        'location': posting_location(posting),
+        'notes': text_of(description, multiline=True),
+    }
+    kinds = [kind.upper() for kind in as_list(posting.get('employmentType')) if isinstance(kind, str)]
+    known = [EMPLOYMENT_TYPES[kind] for kind in kinds if kind in EMPLOYMENT_TYPES]
+    if known:
+        values['role_type'] = ', '.join(role for role, _ in known)
+        values['duration'] = known[0][1]
+    salary = posting.get('baseSalary')
+    if isinstance(salary, dict):
+        amount = salary.get('value')
+        unit = salary.get('unitText')
+        if isinstance(amount, dict):
+            unit = amount.get('unitText', unit)
+            amount = amount.get('value', amount.get('minValue'))
+        if amount is not None:
+            values['salary_est'] = parse_salary(str(amount), unit or 'YEAR')
+    return {field: value for field, value in values.items() if value}
+
+
+META_TITLE = Selector('meta[property="og:title"]@content')
+META_SITE = Selector('meta[property="og:site_name"]@content')
+META_DESCRIPTION = [Selector('meta[property="og:description"]@content'), Selector('meta[name="description"]@content')]
+HEADING, TITLE = Selector('h1'), Selector('title')
+
+
+def heading(page):
+    pattern, position = HEADING.steps[0][0], 0
+    while (match := pattern.search(page, position)) is not None:
+        # Scripts often carry markup in strings; skip past one holding this <h1>.
+        script = page.rfind('<script', position, match.start())
+        if script != -1 and page.find('</script', script, match.start()) == -1:
+            position = page.find('</script', match.end())
+            if position == -1:
+                break
+            continue
+        text = text_of(Selector.element(page, match))
+        if text:
+            return text
+        position = match.end()
+    return ''
+
+
+def from_page(page, wanted):
+    values = {}
+    if 'job_title' in wanted:
+        values['job_title'] = heading(page) or META_TITLE.find(page) or TITLE.find(page)
+    if 'company' in wanted:
+        values['company'] = META_SITE.find(page)
+    if 'notes' in wanted:
+        values['notes'] = next(filter(None, (selector.find(page) for selector in META_DESCRIPTION)), '')
+    return {field: value for field, value in values.items() if value}
+
+
+def extract_posting(url, page):
+    """
+    Returns the JobApplication payload for a posting page, the extractor each
+    field came from, and the required fields the page did not provide.
+    """
+    site = site_for(url)
+    extractors = [('json-ld', from_json_ld), ('page', from_page)]
+    if site is not None:
+        extractors.insert(0, (site.name, site.extract))
+    job = {
+        'application_link': url, 'source': site.source if site else 'OTHER',
+        'status': 'APPLIED', 'confidence': 'MEDIUM', 'salary_est': None,
+        **dict.fromkeys(TEXT_FIELDS, ''),
+    }
+    extracted_by = {}
+    for name, extract in extractors:
+        # Extractors get the fields still missing, so fallbacks skip work the
+        # earlier ones already did.
+        wanted = [field for field in EXTRACTED_FIELDS if field not in extracted_by]
+        if not wanted:
+            break
+        for field, value in extract(page, wanted).items():
+            if field not in extracted_by and value:
+                job[field] = value
+                extracted_by[field] = name
+
+    for field in TEXT_FIELDS + ('application_link',):
+        limit = JobApplication._meta.get_field(field).max_length
+        if field == 'notes':
+            limit = DESCRIPTION_MAX_CHARS
+        job[field] = job[field][:limit]
+    missing = [field for field in REQUIRED_FIELDS if not job[field]]
+    return job, extracted_by, missing
+
+
+def posting_for(user_id, url, page=None):
+    """
+    extract_posting() for the normalized URL as a response payload, cached per
+    user so one user's HTML never fills in another's form. A page is cached
+    under its own digest too, so changed HTML is extracted again, and the URL
+    alone answers with the latest extraction. Returns None when nothing is
+    cached and no page was given.
+    """
+    url = normalize_url(url)
+    url_key = f'jobs:extract:{user_id}:{hashlib.md5(url.encode()).hexdigest()}'
+    if page is None:
+        return cache.get(url_key)
+    page_key = f'{url_key}:{hashlib.md5(page.encode()).hexdigest()}'
+    result = cache.get(page_key)
+    if result is None:
+        job, extracted_by, missing = extract_posting(url, page)
+        result = {'job': job, 'extracted_by': extracted_by, 'missing': missing}
+    cache.set_many({page_key: result, url_key: result}, settings.JOB_EXTRACT_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,234 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+# Columns covered by the full-text index, with their relevance weight.
+SEARCH_WEIGHTS = {
+    'company': 'A',
+    'job_title': 'A',
+    'location': 'B',
+    'contacts': 'B',
+    'notes': 'C',
+}
+SEARCH_FIELDS = tuple(SEARCH_WEIGHTS)
+TABLE = 'jobs_jobapplication'
+FTS_TABLE = 'jobs_jobapplication_fts'
+BM25_WEIGHTS = {'A': 10.0, 'B': 5.0, 'C': 1.0}
+# Text extracted from uploaded documents has its own index; a job matches
+# when its own fields or any of its documents do.
+DOCUMENT_TABLE = 'jobs_documenttext'
+DOCUMENT_FTS_TABLE = 'jobs_documenttext_fts'
+DOCUMENT_JOBS = (
+    'SELECT jobs_jobdocument.job_id FROM jobs_jobdocument '
+    f'INNER JOIN {DOCUMENT_TABLE} ON {DOCUMENT_TABLE}.blob_id = jobs_jobdocument.blob_id WHERE '
+)
+# One IN over a UNION rather than two ORed INs, so the planner can still
+# drive the query from the matches instead of scanning every row.
+SQLITE_MATCH = (
+    f'{TABLE}.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s UNION '
+    f'{DOCUMENT_JOBS}{DOCUMENT_TABLE}.id IN (SELECT rowid FROM {DOCUMENT_FTS_TABLE} WHERE {DOCUMENT_FTS_TABLE} MATCH %s))'
+)
+POSTGRES_MATCH = (
+    f"({TABLE}.search_vector @@ to_tsquery('simple', %s)"
+    f" OR {TABLE}.id IN ({DOCUMENT_JOBS}{DOCUMENT_TABLE}.search_vector @@ to_tsquery('simple', %s)))"
+)
+
+
+def search_terms(text):
+    # Word characters only, so user input can never inject FTS/tsquery operators.
+    return re.findall(r'\w+', text.lower())
+
+
+def _install_sqlite(cursor):
+    # External-content FTS5 table: the index lives in the shadow table, the text
+    # stays in jobs_jobapplication, and triggers keep the two in step.
+    columns = ', '.join(SEARCH_FIELDS)
+    new = ', '.join(f'new.{name}' for name in SEARCH_FIELDS)
+    old = ', '.join(f'old.{name}' for name in SEARCH_FIELDS)
+    delete_old = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+    insert_new = f'INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new});'
+    weights = ', '.join(str(BM25_WEIGHTS[SEARCH_WEIGHTS[name]]) for name in SEARCH_FIELDS)
+
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+        f"{columns}, content='{TABLE}', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+    )
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN {insert_new} END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN {delete_old} END')
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON {TABLE} '
+        f'BEGIN {delete_old} {insert_new} END'
+    )
+    cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25({weights})')")
+    cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _install_sqlite_documents(cursor):
+    delete_old = f"INSERT INTO {DOCUMENT_FTS_TABLE}({DOCUMENT_FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);"
+    insert_new = f'INSERT INTO {DOCUMENT_FTS_TABLE}(rowid, text) VALUES (new.id, new.text);'
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {DOCUMENT_FTS_TABLE} USING fts5('
+        f"text, content='{DOCUMENT_TABLE}', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+    )
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {DOCUMENT_FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN {insert_new} END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {DOCUMENT_FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN {delete_old} END')
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {DOCUMENT_FTS_TABLE}_au AFTER UPDATE OF text ON {DOCUMENT_TABLE} '
+        f'BEGIN {delete_old} {insert_new} END'
+    )
+    cursor.execute(f"INSERT INTO {DOCUMENT_FTS_TABLE}({DOCUMENT_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _install_postgres(cursor):
+    vector = ' || '.join(
+        f"setweight(to_tsvector('simple', coalesce(NEW.{name}, '')), '{weight}')"
+        for name, weight in SEARCH_WEIGHTS.items()
+    )
+    cursor.execute(f'ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector')
+    cursor.execute(
+        f'CREATE OR REPLACE FUNCTION {TABLE}_search_vector_update() RETURNS trigger AS $$ '
+        f'BEGIN NEW.search_vector := {vector}; RETURN NEW; END $$ LANGUAGE plpgsql'
+    )
+    cursor.execute(f'DROP TRIGGER IF EXISTS {TABLE}_search_vector_trigger ON {TABLE}')
+    cursor.execute(
+        f'CREATE TRIGGER {TABLE}_search_vector_trigger BEFORE INSERT OR UPDATE OF {", ".join(SEARCH_FIELDS)} '
+        f'ON {TABLE} FOR EACH ROW EXECUTE FUNCTION {TABLE}_search_vector_update()'
+    )
+    # Backfill by firing the trigger on existing rows.
+    cursor.execute(f'UPDATE {TABLE} SET company = company WHERE search_vector IS NULL')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {TABLE}_search_idx ON {TABLE} USING gin (search_vector)')
+
+
+def _install_postgres_documents(cursor):
+    cursor.execute(
+        f'ALTER TABLE {DOCUMENT_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector '
+        f"GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED"
+    )
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {DOCUMENT_TABLE}_search_idx ON {DOCUMENT_TABLE} USING gin (search_vector)')
+
+
+def install_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            _install_sqlite(cursor)
+        elif connection.vendor == 'postgresql':
+            _install_postgres(cursor)
+
+
+def uninstall_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP TRIGGER IF EXISTS {TABLE}_search_vector_trigger ON {TABLE}')
+            cursor.execute(f'DROP FUNCTION IF EXISTS {TABLE}_search_vector_update()')
+            cursor.execute(f'ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector')
+
+
+def install_document_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            _install_sqlite_documents(cursor)
+        elif connection.vendor == 'postgresql':
+            _install_postgres_documents(cursor)
+
+
+def uninstall_document_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {DOCUMENT_FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {DOCUMENT_FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'ALTER TABLE {DOCUMENT_TABLE} DROP COLUMN IF EXISTS search_vector')
+
+
+def ensure_sqlite_triggers(connection):
+    # SQLite migrations that alter jobs_jobapplication copy it into a new table
+    # and drop the old one, taking the triggers with it.
+    if connection.vendor != 'sqlite':
+        return
+    indexes = [(TABLE, FTS_TABLE, install_search_index)]
+    if DOCUMENT_TABLE in connection.introspection.table_names():
+        indexes.append((DOCUMENT_TABLE, DOCUMENT_FTS_TABLE, install_document_search_index))
+    for table, fts_table, install in indexes:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s AND name LIKE %s",
+                [table, f'{fts_table}_%'],
+            )
+            installed = cursor.fetchone()[0]
+        if installed < 3:
+            install(connection)
+
+
+def apply_search(queryset, terms, ranked=False):
+    """
+    Restricts queryset to full-text matches, most relevant first when ranked.
+    Returns None when the database has no full-text index to use.
+    """
+    vendor = connections[queryset.db].vendor
+    # Search-as-you-type: only the word still being typed is a prefix.
+    *words, partial = terms
+    if vendor == 'sqlite':
+        match = ' '.join([*(f'"{word}"' for word in words), f'"{partial}"*'])
+        matched = queryset.filter(RawSQL(SQLITE_MATCH, (match, match), output_field=BooleanField()))
+        if not ranked:
+            return matched
+        document_matches = queryset.filter(RawSQL(
+            f'{TABLE}.id IN ({DOCUMENT_JOBS}{DOCUMENT_TABLE}.id IN '
+            f'(SELECT rowid FROM {DOCUMENT_FTS_TABLE} WHERE {DOCUMENT_FTS_TABLE} MATCH %s))',
+            (match,), output_field=BooleanField(),
+        ))
+        if document_matches.exists():
+            # bm25 per row re-runs MATCH for each job, so this path is only taken
+            # when a document matched; jobs matched only that way come last.
+            queryset = matched
+            rank = RawSQL(
+                f'COALESCE((SELECT rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {TABLE}.id), 0)',
+                (match,), output_field=FloatField(),
+            )
+        else:
+            # Joining the FTS table evaluates MATCH once and exposes bm25 as its rank
+            # column. Only worth it when ranking: under a recency ORDER BY the planner
+            # drives from jobs_jobapplication instead and re-runs MATCH per row. A
+            # correlated rank subquery would re-run it per row too.
+            rank = F('search_entry__rank')
+            queryset = queryset.filter(
+                search_entry__isnull=False,
+            ).filter(RawSQL(f'{FTS_TABLE} MATCH %s', (match,), output_field=BooleanField()))
+    elif vendor == 'postgresql':
+        query = ' & '.join([*words, f'{partial}:*'])
+        queryset = queryset.filter(RawSQL(POSTGRES_MATCH, (query, query), output_field=BooleanField()))
+        if not ranked:
+            return queryset
+        rank = RawSQL(f"-ts_rank({TABLE}.search_vector, to_tsquery('simple', %s))", (query,), output_field=FloatField())
+    else:
+        return None
+    return queryset.alias(search_rank=rank).order_by('search_rank', *queryset.query.order_by)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter backed by the database's full-text index (FTS5 on SQLite,
+    tsvector/GIN on Postgres) instead of icontains scans. Unpaginated results
+    without an explicit ordering come back most relevant first. Other
+    databases fall back to the stock icontains search.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = search_terms(' '.join(self.get_search_terms(request)))
+        if not terms:
+            return queryset
+        paginator = getattr(view, 'paginator', None)
+        paginated = paginator is not None and paginator.is_requested(request)
+        ordered = bool(request.query_params.get(filters.OrderingFilter.ordering_param))
+        matched = apply_search(queryset, terms, ranked=not (paginated or ordered))
+        if matched is None:
+            return super().filter_queryset(request, queryset, view)
+        return matched
@@ -1,5 +1,32 @@
+import os
+import re
+from django.conf import settings
 from rest_framework import serializers
-from .models import JobApplication, Interview, JobDocument
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.validators import ProhibitSurrogateCharactersValidator
+from .models import JobApplication, Interview, JobDocument, UploadSession
+
+
+def requested_fields(request):
+    # ?fields=id,company,status -> {'id', 'company', 'status'}; None when absent
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return {name.strip() for name in fields.split(',') if name.strip()}
+
+class SparseFieldsetMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = requested_fields(self.context.get('request'))
+        if requested is None:
+            return
+        unknown = requested - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({'fields': f'Unknown fields: {", ".join(sorted(unknown))}'})
+        for name in set(self.fields) - requested:
+            self.fields.pop(name)
 
 class InterviewSerializer(serializers.ModelSerializer):
     class Meta:
@@ -10,7 +37,7 @@ class JobDocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = JobDocument
         fields = '__all__'
-        read_only_fields = ['uploaded_at']
+        read_only_fields = ['uploaded_at', 'filename', 'blob']
 
     def validate_job(self, value):
         user = self.context['request'].user
@@ -18,10 +45,74 @@ class JobDocumentSerializer(serializers.ModelSerializer):
              raise serializers.ValidationError("You cannot upload documents to a job you do not own.")
         return value
         
-class JobApplicationSerializer(serializers.ModelSerializer):
+class UploadSessionSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source='received', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'job', 'doc_types', 'filename', 'size', 'sha256', 'offset', 'chunk_size', 'created_at']
+    
+    def get_chunk_size(self, obj):
+        return settings.DOCUMENT_UPLOAD_CHUNK_SIZE
+    
+    def validate_job(self, value):
+        if value.user != self.context['request'].user:
+            raise serializers.ValidationError("You cannot upload documents to a job you do not own.")
+        return value
+    
+    def validate_size(self, value):
+        if not 0 < value <= settings.DOCUMENT_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'Files must be between 1 byte and {settings.DOCUMENT_UPLOAD_MAX_SIZE} bytes.')
+        return value
+    
+    def validate_sha256(self, value):
+        value = value.lower()
+        if not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError('Expected a hex SHA-256 digest.')
+        return value
+    
+    def validate_filename(self, value):
+        return os.path.basename(value) or 'upload'
+
+class JobApplicationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     interviews = InterviewSerializer(many=True, read_only=True)
     documents = JobDocumentSerializer(many=True, read_only=True)
     class Meta:
         model = JobApplication
         fields = '__all__'
-        read_only_fields = ('user',)
+        read_only_fields = ('user', 'resume_match')
+
+class PageHTMLField(serializers.CharField):
+    # CharField checks for surrogates one character at a time, which costs more
+    # than extracting a large page; encoding the string finds them in C.
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.validators = [
+            validator for validator in self.validators if not isinstance(validator, ProhibitSurrogateCharactersValidator)
+        ]
+    
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        try:
+            value.encode('utf-8')
+        except UnicodeEncodeError:
+            raise serializers.ValidationError('Surrogate characters are not allowed.')
+        return value
+
+class JobPageSerializer(serializers.Serializer):
+    url = serializers.URLField(max_length=2000)
+    # Optional when the URL was extracted recently and is still cached.
+    html = PageHTMLField(required=False, trim_whitespace=False, max_length=settings.JOB_EXTRACT_MAX_HTML)
+
+class BulkMutationSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    changes = serializers.DictField(required=False)
+    
+    def validate_changes(self, value):
+        # Same rules as PATCH jobs/<pk>/, so bulk edits can't write anything a single edit couldn't.
+        serializer = JobApplicationSerializer(data=value, partial=True)
+        serializer.is_valid(raise_exception=True)
+        if not serializer.validated_data:
+            raise serializers.ValidationError('No editable fields given.')
+        return serializer.validated_data
@@ -0,0 +1,231 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+from users.models import Profile
+from .models import DocumentBlob, JobApplication, Interview, JobDocument, StatusTransition, Tombstone
+from .matching import MATCH_FIELDS, mark_stale
+from .stats import TRACKED_FIELDS, apply_stats_counts, apply_stats_delta, rebuild_stats, stat_keys
+from .cache import invalidate_user
+from .history import record_change, record_changed, record_created, summarize
+from .events import publish
+
+# Sent once per bulk import/update/delete of a user's applications, which skip
+# (or suppress) the per-row signals below. Args: user_id, ids, action
+# ('create', 'update' or 'delete') and fields, the names an update wrote.
+# An update that only moves statuses may pass moved, {(old, new): count}, so
+# the rollup shifts those counts instead of being rebuilt.
+bulk_changed = Signal()
+in_bulk_change = ContextVar('in_bulk_change', default=False)
+
+@contextmanager
+def bulk_change():
+    # Cascading QuerySet.delete() still sends post_delete per row; let bulk_changed
+    # do that work once instead.
+    token = in_bulk_change.set(True)
+    try:
+        yield
+    finally:
+        in_bulk_change.reset(token)
+
+def owner_id(instance):
+    if isinstance(instance, JobApplication):
+        return instance.user_id
+    if instance._meta.get_field('job').is_cached(instance):
+        return instance.job.user_id
+    # Several receivers ask about the same instance; look the owner up once.
+    if getattr(instance, '_owner_of_job', None) != instance.job_id:
+        instance._owner_id = JobApplication.objects.filter(pk=instance.job_id).values_list('user_id', flat=True).first()
+        instance._owner_of_job = instance.job_id
+    return instance._owner_id
+
+@receiver(post_save, sender=JobApplication)
+def update_stats_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if created:
+        apply_stats_delta(instance.user_id, set(), stat_keys(instance.field_values(TRACKED_FIELDS)))
+    elif loaded is None:
+        # Saved without being loaded first, so there is nothing to diff against.
+        rebuild_stats([instance.user_id])
+    else:
+        # Fields deferred at load time, or left out of update_fields, were not written by this save.
+        fields = [name for name in TRACKED_FIELDS if name in loaded and (update_fields is None or name in update_fields)]
+        apply_stats_delta(
+            instance.user_id,
+            stat_keys({name: loaded[name] for name in fields}),
+            stat_keys(instance.field_values(fields)),
+        )
+
+@receiver(post_delete, sender=JobApplication)
+def update_stats_on_delete(sender, instance, **kwargs):
+    if in_bulk_change.get():
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is not None and not set(TRACKED_FIELDS) <= set(loaded):
+        # Loaded with only() or defer(): the row is gone, so the missing values can't be read back.
+        rebuild_stats([instance.user_id])
+        return
+    apply_stats_delta(instance.user_id, stat_keys(loaded or instance.field_values(TRACKED_FIELDS)), set())
+
+@receiver(post_save, sender=JobApplication)
+@receiver(post_save, sender=Interview)
+@receiver(post_save, sender=JobDocument)
+@receiver(post_delete, sender=JobApplication)
+@receiver(post_delete, sender=Interview)
+@receiver(post_delete, sender=JobDocument)
+def invalidate_cached_responses(sender, instance, raw=False, **kwargs):
+    if raw or in_bulk_change.get():
+        return
+    user_id = owner_id(instance)
+    if user_id is not None:
+        invalidate_user(user_id)
+
+TOMBSTONE_KINDS = {JobApplication: 'job', Interview: 'interview', JobDocument: 'document'}
+
+@receiver(post_delete, sender=JobApplication)
+@receiver(post_delete, sender=Interview)
+@receiver(post_delete, sender=JobDocument)
+def record_tombstone(sender, instance, **kwargs):
+    if in_bulk_change.get():
+        return
+    user_id = owner_id(instance)
+    if user_id is not None:
+        Tombstone.objects.create(user_id=user_id, kind=TOMBSTONE_KINDS[sender], object_id=instance.pk)
+
+@receiver(bulk_changed, sender=JobApplication)
+def record_tombstones_after_bulk_delete(sender, user_id, ids, action, **kwargs):
+    # Interviews and documents that went with the applications get none;
+    # sync/ clients drop them along with their application.
+    if action == 'delete':
+        Tombstone.objects.bulk_create([Tombstone(user_id=user_id, kind='job', object_id=pk) for pk in ids])
+
+EVENT_KINDS = {JobApplication: 'job', Interview: 'interview'}
+
+@receiver(post_save, sender=JobApplication)
+@receiver(post_save, sender=Interview)
+@receiver(post_delete, sender=JobApplication)
+@receiver(post_delete, sender=Interview)
+def publish_change(sender, instance, signal, created=False, raw=False, **kwargs):
+    if raw or in_bulk_change.get():
+        return
+    user_id = owner_id(instance)
+    if user_id is not None:
+        action = 'delete' if signal is post_delete else 'create' if created else 'update'
+        publish(user_id, EVENT_KINDS[sender], action, [instance.pk])
+
+@receiver(bulk_changed, sender=JobApplication)
+def publish_bulk_change(sender, user_id, ids, action, **kwargs):
+    publish(user_id, 'job', action, ids)
+
+@receiver(bulk_changed, sender=JobApplication)
+def refresh_after_bulk_change(sender, user_id, ids, action, fields=(), moved=None, **kwargs):
+    tracked = set(fields) & set(TRACKED_FIELDS)
+    if action == 'update' and moved is not None and tracked == {'status'}:
+        changes = Counter()
+        for (old, new), count in moved.items():
+            changes['status', old] -= count
+            changes['status', new] += count
+        apply_stats_counts(user_id, changes)
+    elif action != 'update' or tracked:
+        rebuild_stats([user_id])
+    invalidate_user(user_id)
+
+@receiver(post_save, sender=JobApplication)
+def record_status_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if created:
+        record_created([instance])
+    elif loaded is None:
+        # No snapshot to diff against; compare with the last logged status.
+        record_changed(instance.user_id, [instance.pk])
+    elif 'status' in loaded and loaded['status'] != instance.status:
+        record_change(instance, loaded['status'])
+
+@receiver(bulk_changed, sender=JobApplication)
+def record_status_after_bulk_change(sender, user_id, ids, action, fields=(), **kwargs):
+    if action == 'create':
+        record_created(JobApplication.objects.filter(pk__in=ids).only('id', 'user_id', 'status', 'applied_at'))
+    elif action == 'update' and 'status' in fields:
+        record_changed(user_id, ids)
+
+@receiver(post_save, sender=StatusTransition)
+def summarize_on_save(sender, instance, raw=False, **kwargs):
+    # bulk_create() callers summarize what they logged themselves.
+    if not raw:
+        summarize([instance.job_id])
+
+@receiver(post_save, sender=Interview)
+def record_interview_activity(sender, instance, raw=False, **kwargs):
+    # An upcoming interview keeps its application active until it has happened.
+    if raw:
+        return
+    at = max(timezone.now(), instance.interview_at)
+    JobApplication.objects.filter(pk=instance.job_id, last_activity_at__lt=at).update(last_activity_at=at)
+
+@receiver(post_save, sender=JobApplication)
+def expire_match_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or created or instance.resume_match is None:
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None or any(name in loaded and loaded[name] != getattr(instance, name) for name in MATCH_FIELDS):
+        mark_stale(pk=instance.pk)
+        instance.resume_match = None
+
+@receiver(bulk_changed, sender=JobApplication)
+def expire_match_after_bulk_change(sender, user_id, ids, action, fields=(), **kwargs):
+    if action == 'update' and set(fields) & set(MATCH_FIELDS):
+        mark_stale(pk__in=ids)
+
+@receiver(post_save, sender=JobDocument)
+@receiver(post_delete, sender=JobDocument)
+def expire_match_on_resume_change(sender, instance, raw=False, **kwargs):
+    if raw or in_bulk_change.get() or instance.doc_types != 'RESUME':
+        return
+    user_id = owner_id(instance)
+    if user_id is not None:
+        mark_stale(user_id=user_id)
+
+@receiver(pre_save, sender=Profile)
+def remember_skills(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk:
+        instance._stored_skills = Profile.objects.filter(pk=instance.pk).values_list('skills', flat=True).first()
+
+@receiver(post_save, sender=Profile)
+def expire_match_on_skills_change(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    if getattr(instance, '_stored_skills', None) != instance.skills:
+        mark_stale(user_id=instance.user_id)
+        invalidate_user(instance.user_id)
+
+def refresh_blob_refcounts(digests):
+    # Recounted from the FK rather than incremented, so the counters heal
+    # themselves. updated_at only moves when a count changes, which makes it
+    # the time a blob became unreferenced for gc_blobs' grace period.
+    references = (
+        JobDocument.objects.filter(blob=OuterRef('pk')).order_by()
+        .values('blob').annotate(total=Count('pk')).values('total')
+    )
+    actual = Coalesce(Subquery(references), 0)
+    return (
+        DocumentBlob.objects.filter(pk__in=digests).alias(actual=actual)
+        .exclude(refcount=F('actual')).update(refcount=actual, updated_at=Now())
+    )
+
+@receiver(post_save, sender=JobDocument)
+@receiver(post_delete, sender=JobDocument)
+def update_blob_refcounts(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    digests = {instance.blob_id, getattr(instance, '_loaded_blob_id', None)} - {None}
+    if digests:
+        refresh_blob_refcounts(digests)
+    instance._loaded_blob_id = instance.blob_id
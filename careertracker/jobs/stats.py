@@ -0,0 +1,158 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from .models import JobApplication, UserJobStats
+
+# Dimensions with a fixed set of choices are pivoted into conditional counts,
+# the open-ended ones (role_type, week) are the GROUP BY keys. Either way the
+# whole breakdown comes back from a single query.
+PIVOTED_DIMENSIONS = {
+    'status': JobApplication.STATUS_TYPES,
+    'source': JobApplication.SOURCE_TYPES,
+    'confidence': JobApplication.CONFIDENCE_TYPES,
+}
+GROUPED_DIMENSIONS = ('role_type', 'week')
+DIMENSIONS = (*PIVOTED_DIMENSIONS, *GROUPED_DIMENSIONS)
+
+# JobApplication fields the rollup depends on
+TRACKED_FIELDS = (*PIVOTED_DIMENSIONS, 'role_type', 'applied_at')
+
+
+def aggregate_stats(applications):
+    """Per-user breakdowns ({user_id: {dimension: Counter}}) for a queryset, in one query."""
+    pivots = {
+        f'{dimension}_{value}': (dimension, value)
+        for dimension, choices in PIVOTED_DIMENSIONS.items()
+        for value, _ in choices
+    }
+    rows = (
+        applications
+        .annotate(week=TruncWeek('applied_at'))
+        .values('user_id', *GROUPED_DIMENSIONS)
+        .annotate(
+            total=Count('id'),
+            **{alias: Count('id', filter=Q(**{dimension: value})) for alias, (dimension, value) in pivots.items()},
+        )
+        .order_by()
+    )
+
+    stats = defaultdict(lambda: {dimension: Counter() for dimension in DIMENSIONS})
+    for row in rows:
+        breakdowns = stats[row['user_id']]
+        breakdowns['role_type'][row['role_type']] += row['total']
+        breakdowns['week'][row['week'].date().isoformat()] += row['total']
+        for alias, (dimension, value) in pivots.items():
+            if row[alias]:
+                breakdowns[dimension][value] += row[alias]
+    return stats
+
+
+def rollup_rows(applications, stats_model=UserJobStats):
+    # stats_model is swappable so data migrations can pass their historical model
+    return [
+        stats_model(user_id=user_id, dimension=dimension, value=value, count=count)
+        for user_id, breakdowns in aggregate_stats(applications).items()
+        for dimension, counter in breakdowns.items()
+        for value, count in counter.items()
+        if count
+    ]
+
+
+def rebuild_stats(user_ids):
+    """Recomputes the rollup from scratch for the given users."""
+    with transaction.atomic():
+        UserJobStats.objects.filter(user_id__in=user_ids).delete()
+        UserJobStats.objects.bulk_create(
+            rollup_rows(JobApplication.objects.filter(user_id__in=user_ids)), batch_size=1000,
+        )
+
+
+def week_of(moment):
+    day = timezone.localtime(moment).date()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def stat_keys(values):
+    """The (dimension, value) rollup rows an application with these field values counts towards."""
+    keys = {
+        (dimension, values[dimension])
+        for dimension in (*PIVOTED_DIMENSIONS, 'role_type')
+        if values.get(dimension) is not None
+    }
+    if values.get('applied_at') is not None:
+        keys.add(('week', week_of(values['applied_at'])))
+    return keys
+
+
+def apply_stats_delta(user_id, removed, added):
+    apply_stats_counts(user_id, {**{key: -1 for key in removed - added}, **{key: 1 for key in added - removed}})
+
+
+def apply_stats_counts(user_id, changes):
+    """Adds each {(dimension, value): delta} in changes to the user's rollup."""
+    for (dimension, value), delta in changes.items():
+        if not delta:
+            continue
+        rows = UserJobStats.objects.filter(user_id=user_id, dimension=dimension, value=value)
+        if rows.update(count=F('count') + delta) or delta < 0:
+            continue
+        stat, created = UserJobStats.objects.get_or_create(
+            user_id=user_id, dimension=dimension, value=value, defaults={'count': delta},
+        )
+        if not created:
+            rows.update(count=F('count') + delta)
+
+
+def rollup_rows_of(user):
+    return UserJobStats.objects.filter(user=user, count__gt=0).values_list('dimension', 'value', 'count')
+
+
+def breakdowns_of(rows):
+    breakdowns = {dimension: Counter() for dimension in DIMENSIONS}
+    for dimension, value, count in rows:
+        breakdowns[dimension][value] = count
+    return breakdowns
+
+
+def rollup_stats(user):
+    """Reads the precomputed breakdowns: one row per dimension value, not per application."""
+    return breakdowns_of(rollup_rows_of(user))
+
+
+async def arollup_stats(user):
+    return breakdowns_of([row async for row in rollup_rows_of(user)])
+
+
+def stats_payload(breakdowns):
+    """Shapes per-dimension counters into the JobAnalyticsView response."""
+    status = breakdowns['status']
+    total_applications = sum(status.values())
+
+    def rate(count):
+        return round((count / total_applications) * 100) if total_applications else 0
+
+    def breakdown(dimension):
+        return [{dimension: value, 'count': count} for value, count in breakdowns[dimension].most_common() if count]
+
+    return {
+        'total_applications': total_applications,
+        'status_breakdown': breakdown('status'),
+        'source_breakdown': breakdown('source'),
+        'confidence_breakdown': breakdown('confidence'),
+        'role_type_breakdown': breakdown('role_type'),
+        'weekly_applications': [
+            {'week': week, 'count': count} for week, count in sorted(breakdowns['week'].items()) if count
+        ],
+        'analytics': {
+            'offer_rate': rate(status['OFFER']),
+            'rejection_rate': rate(status['REJECTED']),
+            'interview_rate': rate(status['INTERVIEW']),
+            'total_offers': status['OFFER'],
+            'interview_count': status['INTERVIEW'],
+        },
+    }
@@ -0,0 +1,57 @@
+import hashlib
+import os
+import re
+import tempfile
+from django.core.files.storage import FileSystemStorage
+
+BLOB_DIR = 'blobs'
+BLOB_NAME_RE = re.compile(rf'^{BLOB_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/([0-9a-f]{{64}})$')
+
+
+def blob_name(digest):
+    # Two levels of 256 directories keep any one directory small.
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}'
+
+
+def blob_digest(name):
+    """The SHA-256 a stored file name refers to, or None for pre-dedup paths."""
+    match = BLOB_NAME_RE.match(name or '')
+    return match.group(1) if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct file once, named by the SHA-256 of its content. The
+    upload is hashed while it streams to a temporary file, which is renamed
+    into place, or dropped when that content is already stored. Files saved
+    under other names before this storage existed still open as usual.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The real name depends on the content and is only known in _save().
+        return name
+
+    def _save(self, name, content):
+        incoming = self.path(f'{BLOB_DIR}/incoming')
+        os.makedirs(incoming, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=incoming, delete=False) as temp:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                temp.write(chunk)
+        name = blob_name(digest.hexdigest())
+        path = self.path(name)
+        if os.path.exists(path):
+            os.unlink(temp.name)
+            # Refresh the mtime so gc_blobs treats a re-used blob as recent.
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp.name, self.file_permissions_mode)
+            os.replace(temp.name, path)
+        return name
+
+
+def document_storage():
+    return ContentAddressedStorage()
@@ -0,0 +1,90 @@
+from datetime import UTC, datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import shared_cache, user_version
+from .models import Interview, JobApplication, JobDocument, Tombstone
+from .serializers import JobDocumentSerializer
+
+# Delta sync for clients that keep a local copy of a user's applications,
+# interviews and documents. A sync token records the server time and the
+# user's data version (jobs.cache) at the last sync. With a shared cache, a
+# version that hasn't moved means nothing was written and the answer needs no
+# queries; a per-process cache only sees its own worker's writes, so there
+# the rows are always checked. The rows whose updated_at is past the token
+# come back, plus tombstones for deletes. Rows are upserted by id. An application's interviews and
+# documents go with it when it is deleted.
+
+# Rows that changed this long before the token are sent again, to allow for
+# clock skew between app servers and transactions that committed late.
+OVERLAP = timedelta(seconds=60)
+# Derived columns that are rewritten without moving updated_at.
+UNSYNCED_JOB_FIELDS = ('resume_match', 'last_activity_at')
+JOB_FIELDS = tuple(field.name for field in JobApplication._meta.concrete_fields if field.name not in UNSYNCED_JOB_FIELDS)
+INTERVIEW_FIELDS = tuple(field.name for field in Interview._meta.concrete_fields)
+DELETED_KEYS = {'job': 'jobs', 'interview': 'interviews', 'document': 'documents'}
+
+
+def sync_token(at, version):
+    return f'{int(at.timestamp() * 1_000_000)}.{version}'
+
+
+def parse_token(token):
+    """(time, version) from a sync token; ValidationError when it isn't one."""
+    try:
+        micros, version = token.split('.')
+        return datetime.fromtimestamp(int(micros) / 1_000_000, UTC), int(version)
+    except (ValueError, OverflowError, OSError):
+        raise serializers.ValidationError({'since': 'Invalid sync token.'})
+
+
+def changes_since(request, since=None):
+    """
+    The sync/ payload for request.user. Without since, or when since is older
+    than the tombstones are kept, everything comes back with full=True and
+    the client should replace its copy.
+    """
+    user_id = request.user.pk
+    version = user_version(user_id)
+    now = timezone.now()
+    deleted = {key: [] for key in DELETED_KEYS.values()}
+    payload = {'token': since, 'full': False, 'jobs': [], 'interviews': [], 'documents': [], 'deleted': deleted}
+    if since is not None:
+        since_at, since_version = parse_token(since)
+        if since_version == version and shared_cache():
+            # The old token stays, so the next window still starts at the last real sync.
+            return payload
+    full = since is None or since_at < now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    jobs = JobApplication.objects.filter(user_id=user_id)
+    interviews = Interview.objects.filter(job__user_id=user_id)
+    documents = JobDocument.objects.filter(job__user_id=user_id)
+    if not full:
+        after = since_at - OVERLAP
+        jobs, interviews, documents = (rows.filter(updated_at__gte=after) for rows in (jobs, interviews, documents))
+        tombstones = Tombstone.objects.filter(user_id=user_id, deleted_at__gte=after).order_by('id')
+        for kind, object_id in tombstones.values_list('kind', 'object_id'):
+            deleted[DELETED_KEYS[kind]].append(object_id)
+    payload.update(
+        token=sync_token(now, version),
+        full=full,
+        # Flat columns serialize the same through values() as through the
+        # model serializers, for a fraction of the cost; documents need the
+        # serializer for their file URL.
+        jobs=list(jobs.order_by('id').values(*JOB_FIELDS)),
+        interviews=list(interviews.order_by('id').values(*INTERVIEW_FIELDS)),
+        documents=JobDocumentSerializer(documents.order_by('id'), many=True, context={'request': request}).data,
+    )
+    return payload
+
+
+def prune_tombstones(days=None, batch_size=1000):
+    """Deletes tombstones older than days (SYNC_TOMBSTONE_DAYS) batch_size rows per statement; returns how many."""
+    cutoff = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS if days is None else days)
+    deleted = 0
+    while True:
+        ids = list(Tombstone.objects.filter(deleted_at__lt=cutoff).order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += Tombstone.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,44 @@
+import io
+import zipfile
+from pathlib import Path
+
+# Sample documents and pages shared by the tests and `manage.py benchmark`.
+# Documents are built in memory so no binary fixtures need to be checked in.
+
+# Saved job posting pages; index.json lists each one's URL and expected fields.
+PAGES_DIR = Path(__file__).resolve().parent / 'fixtures' / 'pages'
+
+
+def sample_docx(paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', '<?xml version="1.0"?><Types/>')
+        archive.writestr(
+            'word/document.xml',
+            '<?xml version="1.0"?><w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>',
+        )
+    return buffer.getvalue()
+
+
+def sample_pdf(lines):
+    # A single-page PDF with one Helvetica text line per entry.
+    text = ' '.join(f'({line}) Tj 0 -14 Td' for line in lines)
+    stream = f'BT /F1 11 Tf 50 780 Td {text} ET'.encode()
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    pdf, offsets = bytearray(b'%PDF-1.4\n'), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
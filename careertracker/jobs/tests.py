@@ -1,3 +1,1228 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import json
+import re
+import tempfile
+import time
+from collections import Counter
+from contextlib import suppress
+from io import StringIO
+from datetime import timedelta
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import Profile
+from .models import (
+    DocumentBlob, DocumentText, FunnelSummary, JobApplication, Interview, JobDocument, StatusTransition, Tombstone, UploadSession,
+    UserJobStats,
+)
+from .bulk import delete_rows, update_rows
+from .calendar import TOKEN_TIMEOUT
+from .checks import check_event_broker, check_shared_cache
+from .events import PostgresBroker, broker, events_app
+from .dedupe import duplicate_probes
+from .fingerprints import link_key, title_key
+from .history import funnel_stats, summary_rows
+from .pagination import KeysetPagination
+from .views import latest_per_job
+from .search import apply_search
+from .signals import bulk_changed
+from .stats import aggregate_stats, rebuild_stats, rollup_rows_of, stats_payload, week_of
+from .storage import blob_name
+from .testing import PAGES_DIR, sample_docx, sample_pdf
 
 # Create your tests here.
+
+def make_job(user, **fields):
+    values = {
+        'job_title': 'Backend Engineer', 'role_type': 'Full Time', 'company': 'Acme',
+        'duration': 'Permanent', 'status': 'APPLIED', 'location': 'Remote', 'confidence': 'MEDIUM',
+    }
+    values.update(fields)
+    return JobApplication.objects.create(user=user, **values)
+
+class JobApiTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='tester', email='tester@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+class JobListQueryCountTests(JobApiTestCase):
+    def add_jobs(self, count):
+        for i in range(count):
+            job = make_job(self.user, company=f'Company {i}')
+            Interview.objects.create(
+                job=job, interview_at=timezone.now(), interview_with='Recruiter',
+                meeting_link='https://meet.example.com/abc', type='HR',
+            )
+            JobDocument.objects.create(job=job, file='job_documents/resume.pdf', doc_types='RESUME')
+    
+    def assert_list_queries(self, url, expected):
+        cache.clear()
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+    
+    def test_list_query_count_is_constant(self):
+        # jobs + prefetched interviews + prefetched documents
+        for total in (1, 25):
+            self.add_jobs(total - JobApplication.objects.count())
+            response = self.assert_list_queries('/api/jobs/', 3)
+            self.assertEqual(len(response.data), total)
+            self.assertTrue(all(len(job['interviews']) == 1 for job in response.data))
+            self.assertTrue(all(len(job['documents']) == 1 for job in response.data))
+    
+    def test_sparse_fields_skip_unrequested_prefetches(self):
+        self.add_jobs(5)
+        self.assert_list_queries('/api/jobs/?fields=id,company', 1)
+        self.assert_list_queries('/api/jobs/?fields=id,interviews', 2)
+    
+    def test_detail_nests_interviews_and_documents(self):
+        self.add_jobs(1)
+        job = JobApplication.objects.get()
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/jobs/{job.pk}/')
+        self.assertEqual(len(response.data['interviews']), 1)
+        self.assertEqual(len(response.data['documents']), 1)
+
+class KeysetPaginationTests(JobApiTestCase):
+    def setUp(self):
+        super().setUp()
+        jobs = [make_job(self.user, company=f'Company {i}') for i in range(7)]
+        # Two groups with the same applied_at, so pages have to break ties on id.
+        now = timezone.now()
+        JobApplication.objects.filter(pk__in=[job.pk for job in jobs[:4]]).update(applied_at=now)
+        JobApplication.objects.filter(pk__in=[job.pk for job in jobs[4:]]).update(applied_at=now - timedelta(days=1))
+        self.expected = list(JobApplication.objects.order_by('-applied_at', 'id').values_list('id', flat=True))
+        make_job(User.objects.create(username='other'))
+    
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            ids.extend(job['id'] for job in response.data['results'])
+            url, pages = response.data['next'], pages + 1
+        return ids, pages
+    
+    def test_pages_seek_through_tied_sort_keys(self):
+        for size in (1, 3, 4, 7):
+            with self.subTest(page_size=size):
+                ids, pages = self.walk(f'/api/jobs/?page_size={size}')
+                self.assertEqual(ids, self.expected)
+                self.assertEqual(pages, -(-len(self.expected) // size))
+    
+    def test_cursor_round_trips(self):
+        paginator = KeysetPagination()
+        job = JobApplication.objects.get(pk=self.expected[2])
+        position = paginator.decode_cursor(paginator.encode_cursor(job))
+        self.assertEqual(position, [job.applied_at.isoformat(), job.pk])
+        page = JobApplication.objects.filter(paginator.seek_filter(position)).order_by(*paginator.ordering)
+        self.assertEqual([other.pk for other in page if other.user_id == self.user.pk], self.expected[3:])
+    
+    def test_invalid_cursors_are_rejected(self):
+        wrong_length = KeysetPagination().encode_cursor(JobApplication.objects.first())[:-4]
+        for cursor in ('not-a-cursor', 'bnVsbA==', 'WzEsIDIsIDNd', wrong_length):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f'/api/jobs/?cursor={cursor}').status_code, 404)
+    
+    def test_page_size_is_bounded(self):
+        paginator = KeysetPagination()
+        for size, expected in (('0', 1), ('-5', 1), ('abc', paginator.page_size), ('100000', paginator.max_page_size)):
+            with self.subTest(page_size=size):
+                request = Request(APIRequestFactory().get('/api/jobs/', {'page_size': size}))
+                self.assertEqual(paginator.get_page_size(request), expected)
+        self.assertEqual(len(self.client.get('/api/jobs/?page_size=0').data['results']), 1)
+    
+    def test_plain_list_without_pagination_params(self):
+        response = self.client.get('/api/jobs/')
+        self.assertEqual([job['id'] for job in response.data], self.expected)
+    
+    def test_ordering_cannot_be_combined_with_a_cursor(self):
+        self.assertEqual(self.client.get('/api/jobs/?page_size=2&ordering=company').status_code, 400)
+    
+    def test_sparse_fields(self):
+        response = self.client.get('/api/jobs/?page_size=2&fields=id,company')
+        self.assertEqual([set(job) for job in response.data['results']], [{'id', 'company'}] * 2)
+        self.assertEqual(self.walk('/api/jobs/?page_size=2&fields=company,id')[0], self.expected)
+        self.assertEqual(self.client.get('/api/jobs/?fields=id,nope').status_code, 400)
+
+
+class StatsAggregationTests(JobApiTestCase):
+    def add_jobs(self, user, count):
+        statuses, sources = JobApplication.STATUS_TYPES, JobApplication.SOURCE_TYPES
+        for i in range(count):
+            make_job(
+                user, status=statuses[i % len(statuses)][0], source=sources[i % 3][0],
+                confidence=('HIGH', 'LOW')[i % 2], role_type=('Full Time', 'Internship')[i % 2],
+            )
+    
+    def expected_breakdowns(self, user):
+        jobs = JobApplication.objects.filter(user=user)
+        expected = {dimension: Counter(jobs.values_list(dimension, flat=True)) for dimension in ('status', 'source', 'confidence', 'role_type')}
+        expected['week'] = Counter(week_of(applied_at) for applied_at in jobs.values_list('applied_at', flat=True))
+        return expected
+    
+    def test_breakdowns_come_from_one_query_for_any_number_of_rows(self):
+        other = User.objects.create(username='other')
+        for total in (1, 30):
+            self.add_jobs(self.user, total - JobApplication.objects.filter(user=self.user).count())
+            self.add_jobs(other, 2)
+            with self.assertNumQueries(1):
+                stats = aggregate_stats(JobApplication.objects.all())
+            for user in (self.user, other):
+                with self.subTest(total=total, user=user.username):
+                    self.assertEqual(stats[user.pk], self.expected_breakdowns(user))
+    
+    def test_payload(self):
+        breakdowns = {
+            'status': Counter({'APPLIED': 5, 'INTERVIEW': 2, 'OFFER': 1, 'REJECTED': 0}),
+            'source': Counter({'REFERRAL': 1, 'LINKEDIN': 7}),
+            'confidence': Counter({'HIGH': 8}),
+            'role_type': Counter({'Full Time': 8}),
+            'week': Counter({'2026-10-12': 3, '2026-10-05': 5, '2026-09-28': 0}),
+        }
+        payload = stats_payload(breakdowns)
+        self.assertEqual(payload['total_applications'], 8)
+        self.assertEqual(payload['status_breakdown'], [
+            {'status': 'APPLIED', 'count': 5}, {'status': 'INTERVIEW', 'count': 2}, {'status': 'OFFER', 'count': 1},
+        ])
+        self.assertEqual([row['source'] for row in payload['source_breakdown']], ['LINKEDIN', 'REFERRAL'])
+        self.assertEqual(payload['weekly_applications'], [{'week': '2026-10-05', 'count': 5}, {'week': '2026-10-12', 'count': 3}])
+        self.assertEqual(payload['analytics'], {
+            'offer_rate': 12, 'rejection_rate': 0, 'interview_rate': 25, 'total_offers': 1, 'interview_count': 2,
+        })
+        self.assertEqual(stats_payload({dimension: Counter() for dimension in breakdowns})['analytics']['offer_rate'], 0)
+    
+    def test_view_matches_the_aggregation(self):
+        self.add_jobs(self.user, 12)
+        expected = stats_payload(aggregate_stats(JobApplication.objects.filter(user=self.user))[self.user.pk])
+        data = self.client.get('/api/jobs/stats/').data
+        for key, value in expected.items():
+            with self.subTest(key=key):
+                if isinstance(value, list) and key != 'weekly_applications':
+                    # Equal counts may come back in either order.
+                    self.assertCountEqual(data[key], value)
+                else:
+                    self.assertEqual(data[key], value)
+
+
+class StatsRollupTests(JobApiTestCase):
+    """Each write keeps the incremental rollup equal to a rebuild from scratch."""
+    
+    def setUp(self):
+        super().setUp()
+        self.jobs = [
+            make_job(self.user, company=f'Company {i}', source=('LINKEDIN', 'REFERRAL')[i % 2], status=('APPLIED', 'REPLIED')[i % 2])
+            for i in range(4)
+        ]
+    
+    def assert_rollup_matches_rebuild(self):
+        rollup = sorted(rollup_rows_of(self.user))
+        rebuild_stats([self.user.pk])
+        self.assertEqual(rollup, sorted(rollup_rows_of(self.user)))
+        return dict(((dimension, value), count) for dimension, value, count in rollup)
+    
+    def test_status_change(self):
+        job = JobApplication.objects.get(pk=self.jobs[0].pk)
+        job.status = 'OFFER'
+        job.save()
+        self.assertEqual(self.assert_rollup_matches_rebuild()['status', 'OFFER'], 1)
+    
+    def test_source_and_week_change(self):
+        job = JobApplication.objects.get(pk=self.jobs[1].pk)
+        job.source, job.applied_at = 'COLLEGE', job.applied_at - timedelta(days=21)
+        job.save()
+        rollup = self.assert_rollup_matches_rebuild()
+        self.assertEqual(rollup['source', 'COLLEGE'], 1)
+        self.assertEqual(rollup['week', week_of(job.applied_at)], 1)
+    
+    def test_update_fields_only_counts_what_was_written(self):
+        job = JobApplication.objects.get(pk=self.jobs[0].pk)
+        job.status, job.source = 'OFFER', 'COLLEGE'
+        job.save(update_fields=['status'])
+        self.assertNotIn(('source', 'COLLEGE'), self.assert_rollup_matches_rebuild())
+    
+    def test_delete(self):
+        JobApplication.objects.get(pk=self.jobs[0].pk).delete()
+        self.jobs[1].delete()
+        self.assertEqual(sum(count for (dimension, _), count in self.assert_rollup_matches_rebuild().items() if dimension == 'status'), 2)
+    
+    def test_bulk_update_and_delete(self):
+        ids = [job.pk for job in self.jobs]
+        update_rows(self.user, ids[:3], {'status': 'GHOSTED'})
+        self.assertEqual(self.assert_rollup_matches_rebuild()['status', 'GHOSTED'], 3)
+        update_rows(self.user, ids[:2], {'source': 'OTHER', 'role_type': 'Internship'})
+        self.assertEqual(self.assert_rollup_matches_rebuild()['role_type', 'Internship'], 2)
+        delete_rows(self.user, ids[1:])
+        self.assertEqual(self.assert_rollup_matches_rebuild()['source', 'OTHER'], 1)
+    
+    def test_partially_loaded_instances(self):
+        job = JobApplication.objects.only('id', 'status').get(pk=self.jobs[0].pk)
+        job.status = 'INTERVIEW'
+        job.save()
+        self.assertEqual(self.assert_rollup_matches_rebuild()['status', 'INTERVIEW'], 1)
+        job = JobApplication.objects.only('id', 'user_id', 'source').get(pk=self.jobs[1].pk)
+        job.source = 'RECRUITER'
+        job.save()
+        self.assert_rollup_matches_rebuild()
+        JobApplication.objects.only('id', 'user_id', 'status').get(pk=self.jobs[2].pk).delete()
+        JobApplication.objects.defer('applied_at').get(pk=self.jobs[3].pk).delete()
+        self.assertEqual(self.assert_rollup_matches_rebuild(), {
+            ('status', 'INTERVIEW'): 1, ('status', 'REPLIED'): 1, ('source', 'LINKEDIN'): 1, ('source', 'RECRUITER'): 1,
+            ('confidence', 'MEDIUM'): 2, ('role_type', 'Full Time'): 2, ('week', week_of(self.jobs[0].applied_at)): 2,
+        })
+
+
+class CachedResponseTests(JobApiTestCase):
+    urls = ('/api/jobs/stats/', '/api/jobs/', '/api/jobs/?fields=id,company')
+    
+    def setUp(self):
+        super().setUp()
+        make_job(self.user, company='Acme')
+    
+    def test_revalidation_and_hits_skip_the_database(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                etag = response['ETag']
+                self.assertEqual(response['Cache-Control'], 'private, no-cache')
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                    cached = self.client.get(url)
+                self.assertEqual((cached.status_code, cached.data, cached['ETag']), (200, response.data, etag))
+    
+    def test_writes_move_the_etag_on(self):
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(User.objects.create(username='other'))
+        for url in self.urls:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code, 304)
+        
+        job = JobApplication.objects.get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/jobs/{job.pk}/', {'company': 'Globex', 'status': 'OFFER'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etags[url])
+        self.assertEqual(response.data[0]['company'], 'Globex')
+        self.assertEqual(self.client.get('/api/jobs/stats/').data['analytics']['total_offers'], 1)
+    
+    def test_several_workers_need_a_shared_cache(self):
+        with override_settings(WEB_CONCURRENCY=2):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['jobs.E001'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/0'}}
+        with override_settings(WEB_CONCURRENCY=2, CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+        self.assertEqual(check_shared_cache(None), [])
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'query plans are only checked on SQLite and Postgres')
+class HotPathQueryPlanTests(TestCase):
+    """Fails when a hot query can no longer be answered from an index."""
+    
+    def setUp(self):
+        self.user = User.objects.create(username='planner', email='planner@example.com')
+        if connection.vendor == 'postgresql':
+            # Tiny test tables make a seq scan the cheapest plan; only pick one if there is no index at all.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+    
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+    
+    def sequential_scans(self, queryset):
+        plan = self.plan(queryset)
+        if connection.vendor == 'postgresql':
+            return re.findall(r'Seq Scan on (\w+)', plan)
+        tables = set(connection.introspection.table_names())
+        # FTS5 lookups show up as "SCAN <fts table> VIRTUAL TABLE INDEX ..."; those are index probes
+        return [table for table in re.findall(r'\bSCAN (\w+)\b(?! VIRTUAL TABLE)', plan) if table in tables]
+    
+    def assert_indexed(self, queryset):
+        self.assertEqual(self.sequential_scans(queryset), [], str(queryset.query))
+    
+    def test_job_list(self):
+        self.assert_indexed(JobApplication.objects.filter(user=self.user).order_by('-applied_at'))
+    
+    def test_job_list_keyset_page(self):
+        seek = KeysetPagination().seek_filter([timezone.now().isoformat(), 1])
+        self.assert_indexed(JobApplication.objects.filter(user=self.user).filter(seek).order_by(*KeysetPagination.ordering))
+    
+    def test_job_list_filters(self):
+        for field, value in (('status', 'OFFER'), ('source', 'LINKEDIN'), ('confidence', 'HIGH')):
+            with self.subTest(field=field):
+                self.assert_indexed(JobApplication.objects.filter(user=self.user, **{field: value}).order_by('-applied_at'))
+    
+    def test_full_text_search(self):
+        for ranked in (False, True):
+            with self.subTest(ranked=ranked):
+                queryset = JobApplication.objects.filter(user=self.user).order_by('-applied_at')
+                self.assert_indexed(apply_search(queryset, ['kafka', 'stre'], ranked=ranked))
+    
+    def test_interview_list(self):
+        self.assert_indexed(Interview.objects.filter(job__user=self.user).order_by('-interview_at'))
+    
+    def test_document_list(self):
+        self.assert_indexed(JobDocument.objects.filter(job__user=self.user))
+    
+    def test_nested_prefetch(self):
+        self.assert_indexed(latest_per_job(Interview.objects.filter(job_id__in=[1, 2]), 10, '-interview_at', 'id'))
+    
+    def test_due_reminders(self):
+        now = timezone.now()
+        self.assert_indexed(Interview.objects.filter(interview_at__range=(now, now + timedelta(hours=24)), remainder_sent=False))
+    
+    def test_stats_rollup(self):
+        self.assert_indexed(UserJobStats.objects.filter(user=self.user, count__gt=0))
+    
+    def test_sync_changes(self):
+        since = timezone.now()
+        for queryset in (
+            JobApplication.objects.filter(user=self.user, updated_at__gte=since),
+            Interview.objects.filter(job__user=self.user, updated_at__gte=since),
+            JobDocument.objects.filter(job__user=self.user, updated_at__gte=since),
+            Tombstone.objects.filter(user=self.user, deleted_at__gte=since),
+        ):
+            with self.subTest(model=queryset.model.__name__):
+                self.assert_indexed(queryset.order_by('id'))
+    
+    def test_funnel_summaries(self):
+        # The application side is read off the index alone.
+        self.assertIn('jobapp_user_groups_idx', self.plan(summary_rows(self.user.pk)))
+        self.assert_indexed(summary_rows(self.user.pk))
+    
+    def test_duplicate_probes(self):
+        probes = duplicate_probes(self.user, 'Backend Engineer', 'Acme', 'https://jobs.example.com/1')
+        for (match, queryset), index in zip(probes, ('jobapp_user_link_idx', 'jobapp_user_title_fp_idx'), strict=True):
+            with self.subTest(match=match):
+                self.assertIn(index, self.plan(queryset))
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'full-text search needs SQLite FTS5 or Postgres')
+class FullTextSearchTests(JobApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.kafka = make_job(self.user, company='Streamly', job_title='Kafka Engineer', notes='Rust services')
+        self.notes = make_job(self.user, company='Acme', job_title='Platform Engineer', notes='Some kafka on the side')
+        self.rust = make_job(self.user, company='Oxide', job_title='Rust Developer', location='Zürich')
+        make_job(User.objects.create(username='other'), company='Kafka Corp')
+    
+    def search(self, query, **params):
+        response = self.client.get('/api/jobs/', {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if 'page_size' in params else response.data
+        return [job['id'] for job in results]
+    
+    def test_matches_whole_words_and_a_trailing_prefix(self):
+        self.assertCountEqual(self.search('kafka'), [self.kafka.pk, self.notes.pk])
+        self.assertCountEqual(self.search('kaf'), [self.kafka.pk, self.notes.pk])
+        self.assertEqual(self.search('kafka rust'), [self.kafka.pk])
+        self.assertEqual(self.search('zurich'), [self.rust.pk])
+        # Tokens, not substrings: only the last word may be partial.
+        self.assertEqual(self.search('afka'), [])
+        self.assertEqual(self.search('kaf rust'), [])
+        self.assertEqual(self.search('"kafka" OR *'), [])
+    
+    def test_ranked_by_weighted_columns_unless_paginated_or_ordered(self):
+        self.assertEqual(self.search('kafka'), [self.kafka.pk, self.notes.pk])
+        newest_first = sorted([self.kafka, self.notes], key=lambda job: (-job.applied_at.timestamp(), job.pk))
+        self.assertEqual(self.search('kafka', page_size=10), [job.pk for job in newest_first])
+        self.assertEqual(self.search('kafka', ordering='company'), [self.notes.pk, self.kafka.pk])
+    
+    def test_index_follows_updates_and_deletes(self):
+        job = JobApplication.objects.get(pk=self.rust.pk)
+        job.job_title, job.notes = 'Elixir Developer', 'kafka streams'
+        job.save()
+        self.assertEqual(self.search('rust'), [self.kafka.pk])
+        self.assertCountEqual(self.search('elixir kafka'), [self.rust.pk])
+        JobApplication.objects.filter(pk=self.kafka.pk).update(company='Renamed')
+        self.assertEqual(self.search('streamly'), [])
+        self.assertEqual(self.search('renamed'), [self.kafka.pk])
+        self.notes.delete()
+        delete_rows(self.user, [self.kafka.pk])
+        self.assertEqual(self.search('kafka'), [self.rust.pk])
+        # A row reusing a deleted id must not inherit its index entry.
+        make_job(self.user, company='Fresh')
+        self.assertEqual(self.search('platform'), [])
+
+class BulkImportExportTests(JobApiTestCase):
+    header = 'job_title,role_type,company,duration,status,location,confidence,source,salary_est\n'
+    
+    def upload(self, name, content):
+        return self.client.post('/api/jobs/bulk/', {'file': SimpleUploadedFile(name, content.encode())}, format='multipart')
+    
+    def test_csv_import_creates_rows_and_refreshes_stats(self):
+        rows = ''.join(f'Engineer {i},Full Time,Acme,Permanent,APPLIED,Remote,HIGH,LINKEDIN,\n' for i in range(1200))
+        response = self.upload('jobs.csv', self.header + rows)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 1200)
+        self.assertEqual(JobApplication.objects.filter(user=self.user, salary_est=None).count(), 1200)
+        self.assertEqual(self.client.get('/api/jobs/stats/').data['total_applications'], 1200)
+    
+    def test_invalid_rows_are_reported_and_nothing_is_created(self):
+        lines = [
+            {'job_title': 'Engineer', 'role_type': 'Full Time', 'company': 'Acme', 'duration': 'Permanent',
+             'status': 'APPLIED', 'location': 'Remote', 'confidence': 'LOW'},
+            {'job_title': 'Engineer', 'status': 'NOPE'},
+        ]
+        content = '\n'.join(json.dumps(line) for line in lines) + '\nnot json\n'
+        response = self.upload('jobs.ndjson', content)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+        self.assertIn('status', response.data['errors'][0]['errors'])
+        self.assertFalse(JobApplication.objects.exists())
+    
+    def test_export_streams_only_own_rows(self):
+        make_job(self.user, company='Mine')
+        make_job(User.objects.create(username='other'), company='Theirs')
+        response = self.client.get('/api/jobs/bulk/export/ndjson/')
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['company'] for row in rows], ['Mine'])
+        
+        response = self.client.get('/api/jobs/bulk/export/csv/')
+        exported = b''.join(response.streaming_content).decode()
+        self.assertEqual(self.upload('jobs.csv', exported).data, {'created': 1})
+
+class BulkMutationTests(JobApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.jobs = [make_job(self.user, company=f'Company {i}') for i in range(5)]
+        self.other = make_job(User.objects.create(username='other'))
+        Interview.objects.create(job=self.jobs[0], interview_at=timezone.now(), type='HR')
+        self.ids = [job.pk for job in self.jobs[:3]] + [self.other.pk]
+    
+    def receive(self, signal):
+        received = []
+        def receiver(sender, **kwargs):
+            received.append(kwargs.get('user_id') or kwargs['instance'].pk)
+        signal.connect(receiver, sender=JobApplication, weak=False)
+        self.addCleanup(signal.disconnect, receiver, sender=JobApplication)
+        return received
+    
+    def bulk(self, method, ids, **data):
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)('/api/jobs/bulk/', {'ids': ids, **data}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response, len(queries)
+    
+    def test_bulk_update_is_scoped_and_refreshes_stats(self):
+        self.client.get('/api/jobs/stats/')
+        bulk_calls, saves = self.receive(bulk_changed), self.receive(post_save)
+        response, _ = self.bulk('patch', self.ids, changes={'status': 'GHOSTED'})
+        self.assertEqual(bulk_calls, [self.user.pk])
+        self.assertEqual(saves, [])
+        self.assertEqual(response.data['ids'], self.ids[:3])
+        self.assertEqual(JobApplication.objects.get(pk=self.other.pk).status, 'APPLIED')
+        stats = self.client.get('/api/jobs/stats/').data['status_breakdown']
+        self.assertEqual(stats, [{'status': 'GHOSTED', 'count': 3}, {'status': 'APPLIED', 'count': 2}])
+    
+    def test_bulk_update_validates_changes(self):
+        response = self.client.patch('/api/jobs/bulk/', {'ids': self.ids, 'changes': {'status': 'NOPE'}}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.data['changes'])
+    
+    def test_queries_do_not_grow_with_the_selection(self):
+        many = [make_job(self.user, company=f'More {i}').pk for i in range(20)]
+        Interview.objects.create(job_id=many[0], interview_at=timezone.now(), type='HR')
+        for method, data in (('patch', {'changes': {'status': 'OFFER'}}), ('delete', {})):
+            with self.subTest(method=method):
+                self.assertEqual(self.bulk(method, self.ids[:1], **data)[1], self.bulk(method, many, **data)[1])
+    
+    def test_bulk_delete(self):
+        bulk_calls = self.receive(bulk_changed)
+        response, _ = self.bulk('delete', self.ids)
+        self.assertEqual(bulk_calls, [self.user.pk])
+        # post_delete still fires per row, but its receivers leave the work to bulk_changed.
+        self.assertCountEqual(Tombstone.objects.filter(kind='job').values_list('object_id', flat=True), self.ids[:3])
+        self.assertEqual(response.data['ids'], self.ids[:3])
+        self.assertEqual(JobApplication.objects.filter(user=self.user).count(), 2)
+        self.assertTrue(JobApplication.objects.filter(pk=self.other.pk).exists())
+        self.assertFalse(Interview.objects.exists())
+        self.assertEqual(self.client.get('/api/jobs/stats/').data['total_applications'], 2)
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), DOCUMENT_UPLOAD_TEMP_DIR=tempfile.mkdtemp(), DOCUMENT_UPLOAD_CHUNK_SIZE=1024)
+class ChunkedUploadTests(JobApiTestCase):
+    content = bytes(range(256)) * 10
+    
+    def start(self, content=None, sha256=None):
+        content = content or self.content
+        response = self.client.post('/api/jobs/documents/uploads/', {
+            'job': make_job(self.user).pk, 'doc_types': 'RESUME', 'filename': 'resume.pdf',
+            'size': len(content), 'sha256': sha256 or hashlib.sha256(content).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return f'/api/jobs/documents/uploads/{response.data["id"]}/'
+    
+    def send(self, url, offset, chunk):
+        return self.client.generic('PATCH', url, chunk, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+    
+    def test_token_users_can_upload_to_their_jobs(self):
+        # Through ClaimsJWTAuthentication, whose user is built from the token's claims.
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.start()
+        response = self.client.post('/api/jobs/documents/', {
+            'job': make_job(self.user).pk, 'doc_types': 'RESUME', 'file': SimpleUploadedFile('resume.pdf', self.content),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+    
+    def test_resumable_upload_then_ranged_download(self):
+        url = self.start()
+        self.assertEqual(self.send(url, 0, self.content[:1024]).data, {'offset': 1024})
+        # A retried or out-of-order chunk is rejected with the offset to resume from.
+        response = self.send(url, 0, self.content[:1024])
+        self.assertEqual((response.status_code, response.data['offset']), (409, 1024))
+        self.assertEqual(self.client.get(url).data['offset'], 1024)
+        self.send(url, 1024, self.content[1024:2048])
+        response = self.send(url, 2048, self.content[2048:])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertFalse(UploadSession.objects.exists())
+        
+        download = f'/api/jobs/documents/{response.data["id"]}/download/'
+        response = self.client.get(download)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        response = self.client.get(download, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+        self.assertEqual(self.client.get(download, HTTP_RANGE='bytes=99999-').status_code, 416)
+        
+        with override_settings(DOCUMENT_DOWNLOAD_OFFLOAD='x-accel-redirect'):
+            response = self.client.get(download)
+        digest = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/blobs/{digest[:2]}/{digest[2:4]}/{digest}')
+        self.assertIn('resume.pdf', response['Content-Disposition'])
+    
+    def test_repeat_upload_skips_the_transfer(self):
+        url = self.start()
+        self.send(url, 0, self.content[:1024])
+        self.send(url, 1024, self.content[1024:2048])
+        first = self.send(url, 2048, self.content[2048:]).data
+        response = self.client.post('/api/jobs/documents/uploads/', {
+            'job': make_job(self.user).pk, 'doc_types': 'RESUME', 'filename': 'resume-v2.pdf',
+            'size': len(self.content), 'sha256': hashlib.sha256(self.content).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['document']['blob'], first['blob'])
+        self.assertEqual(DocumentBlob.objects.get().refcount, 2)
+    
+    def test_checksum_mismatch_discards_the_upload(self):
+        url = self.start(content=b'abc', sha256='0' * 64)
+        response = self.send(url, 0, b'abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(JobDocument.objects.exists())
+    
+    def test_cannot_upload_to_someone_elses_job(self):
+        other = make_job(User.objects.create(username='other'))
+        response = self.client.post('/api/jobs/documents/uploads/', {
+            'job': other.pk, 'doc_types': 'RESUME', 'filename': 'x.pdf', 'size': 3, 'sha256': 'a' * 64,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ContentAddressedStorageTests(JobApiTestCase):
+    def upload(self, job, content=b'%PDF same resume'):
+        return self.client.post('/api/jobs/documents/', {
+            'job': job.pk, 'doc_types': 'RESUME', 'file': SimpleUploadedFile('resume.pdf', content),
+        }, format='multipart')
+    
+    def test_identical_uploads_share_one_blob(self):
+        first, second = make_job(self.user), make_job(self.user)
+        names = {self.upload(first).data['file'], self.upload(second).data['file']}
+        self.assertEqual(len(names), 1)
+        blob = DocumentBlob.objects.get()
+        self.assertEqual((blob.refcount, blob.size), (2, len(b'%PDF same resume')))
+        self.assertEqual(set(JobDocument.objects.values_list('filename', flat=True)), {'resume.pdf'})
+        
+        first.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.refcount, 1)
+    
+    def test_gc_removes_unreferenced_blobs_only(self):
+        kept, dropped = make_job(self.user), make_job(self.user)
+        self.upload(kept, b'kept')
+        self.upload(dropped, b'dropped')
+        dropped.delete()
+        storage = JobDocument._meta.get_field('file').storage
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('gc_blobs', grace=-1, stdout=StringIO())
+        self.assertEqual(DocumentBlob.objects.get().sha256, hashlib.sha256(b'kept').hexdigest())
+        self.assertTrue(storage.exists(JobDocument.objects.get().file.name))
+        self.assertFalse(storage.exists(blob_name(hashlib.sha256(b'dropped').hexdigest())))
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class DocumentTextSearchTests(JobApiTestCase):
+    def test_extracted_text_makes_jobs_searchable(self):
+        samples = {
+            'resume.pdf': sample_pdf(['Built Kafka pipelines']),
+            'cover.docx': sample_docx(['Dear Acme,', 'I love Postgres.']),
+            'notes.txt': b'Rust   compilers\n',
+            'photo.bin': b'\0\1\2binary',
+        }
+        jobs = {}
+        for name, content in samples.items():
+            jobs[name] = make_job(self.user, company=f'Company {name}')
+            JobDocument(job=jobs[name], doc_types='RESUME', file=ContentFile(content, name=name)).save()
+        
+        call_command('extract_documents', once=True, workers=1, stdout=StringIO())
+        texts = dict(DocumentText.objects.values_list('blob__documents__filename', 'text'))
+        self.assertEqual(texts['cover.docx'], 'Dear Acme, I love Postgres.')
+        self.assertEqual(DocumentText.objects.exclude(error='').get().blob.documents.get().filename, 'photo.bin')
+        
+        for query, name in [('kafka', 'resume.pdf'), ('postgres', 'cover.docx'), ('compil', 'notes.txt')]:
+            for url in (f'/api/jobs/?search={query}', f'/api/jobs/?search={query}&page_size=10'):
+                response = self.client.get(url)
+                results = response.data['results'] if 'results' in response.data else response.data
+                self.assertEqual([job['id'] for job in results], [jobs[name].pk], url)
+    
+    def test_own_fields_rank_above_document_matches(self):
+        in_document = make_job(self.user, company='Acme')
+        JobDocument(job=in_document, doc_types='RESUME', file=ContentFile(b'kafka', name='r.txt')).save()
+        in_fields = make_job(self.user, company='Kafka Inc')
+        call_command('extract_documents', once=True, workers=1, stdout=StringIO())
+        ids = [job['id'] for job in self.client.get('/api/jobs/?search=kafka').data]
+        self.assertEqual(ids, [in_fields.pk, in_document.pk])
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ResumeMatchTests(JobApiTestCase):
+    def score(self):
+        call_command('score_matches', once=True, stdout=StringIO())
+    
+    def test_scores_rank_jobs_by_skills_and_sort(self):
+        profile = Profile.objects.create(user=self.user, skills='Django, Postgres, Python')
+        python = make_job(self.user, job_title='Python Developer', notes='Django and Postgres services')
+        java = make_job(self.user, job_title='Java Developer', notes='Spring microservices')
+        self.score()
+        python.refresh_from_db()
+        java.refresh_from_db()
+        self.assertGreater(python.resume_match, java.resume_match)
+        ids = [job['id'] for job in self.client.get('/api/jobs/?ordering=-resume_match').data]
+        self.assertEqual(ids, [python.pk, java.pk])
+        
+        # Only the rows a change touched are rescored.
+        with self.assertNumQueries(1):
+            self.score()
+        profile.skills = 'Java, Spring'
+        profile.save()
+        self.assertEqual(JobApplication.objects.filter(resume_match__isnull=True).count(), 2)
+        self.score()
+        java.refresh_from_db()
+        python.refresh_from_db()
+        self.assertGreater(java.resume_match, python.resume_match)
+    
+    def test_edits_expire_only_changed_scores(self):
+        Profile.objects.create(user=self.user, skills='Python')
+        edited, untouched = make_job(self.user, notes='Python'), make_job(self.user, notes='Go')
+        self.score()
+        
+        self.client.patch(f'/api/jobs/{edited.pk}/', {'company': 'Renamed'}, format='json')
+        self.assertFalse(JobApplication.objects.filter(resume_match__isnull=True).exists())
+        response = self.client.patch(f'/api/jobs/{edited.pk}/', {'notes': 'Rust'}, format='json')
+        self.assertIsNone(response.data['resume_match'])
+        self.client.patch('/api/jobs/bulk/', {'ids': [untouched.pk], 'changes': {'status': 'REPLIED'}}, format='json')
+        self.assertEqual(list(JobApplication.objects.filter(resume_match__isnull=True).values_list('pk', flat=True)), [edited.pk])
+        
+        JobDocument(job=untouched, doc_types='RESUME', file=ContentFile(b'Go and Rust', name='cv.txt')).save()
+        self.assertEqual(JobApplication.objects.filter(resume_match__isnull=True).count(), 2)
+
+class JobExtractTests(JobApiTestCase):
+    def test_fixture_pages(self):
+        pages = json.loads((PAGES_DIR / 'index.json').read_text())
+        for name, page in pages.items():
+            response = self.client.post('/api/jobs/extract/', {'url': page['url'], 'html': (PAGES_DIR / name).read_text()}, format='json')
+            self.assertEqual(response.status_code, 200, name)
+            job = response.data['job']
+            self.assertEqual({field: job[field] for field in page['expected']}, page['expected'], name)
+        
+        # Ready to save once the fields the page lacked are filled in.
+        job = {**job, 'role_type': 'Full Time', 'duration': 'Permanent', 'location': 'New York'}
+        self.assertEqual(response.data['missing'], ['role_type', 'duration', 'location'])
+        self.assertEqual(self.client.post('/api/jobs/', job, format='json').status_code, 201)
+    
+    def test_results_are_cached_per_url(self):
+        html = (PAGES_DIR / 'linkedin.html').read_text()
+        url = 'https://www.linkedin.com/jobs/view/3912345678/'
+        self.assertEqual(self.client.post('/api/jobs/extract/', {'url': url}, format='json').status_code, 400)
+        first = self.client.post('/api/jobs/extract/', {'url': f'{url}?trk=flagship&utm_source=x#top', 'html': html}, format='json')
+        self.assertEqual(first.data['job']['application_link'], url)
+        self.assertEqual(first.data['extracted_by']['job_title'], 'linkedin')
+        
+        with self.assertNumQueries(0):
+            second = self.client.post('/api/jobs/extract/', {'url': url}, format='json')
+        self.assertEqual(second.data, first.data)
+        other = User.objects.create(username='other', email='other@example.com')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.post('/api/jobs/extract/', {'url': url}, format='json').status_code, 400)
+    
+    def test_changed_html_is_extracted_again(self):
+        html = (PAGES_DIR / 'linkedin.html').read_text()
+        url = 'https://www.linkedin.com/jobs/view/3912345678/'
+        first = self.client.post('/api/jobs/extract/', {'url': url, 'html': html}, format='json').data['job']['job_title']
+        edited = html.replace(first, 'Staff Data Engineer')
+        self.assertNotEqual(edited, html)
+        response = self.client.post('/api/jobs/extract/', {'url': url, 'html': edited}, format='json')
+        self.assertEqual(response.data['job']['job_title'], 'Staff Data Engineer')
+        self.assertEqual(self.client.post('/api/jobs/extract/', {'url': url}, format='json').data, response.data)
+        self.assertEqual(self.client.post('/api/jobs/extract/', {'url': url, 'html': html}, format='json').data['job']['job_title'], first)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class DuplicateApplicationTests(JobApiTestCase):
+    payload = {
+        'job_title': 'Sr. Backend Engineer (Remote)', 'role_type': 'Full Time', 'company': 'ACME, Inc.',
+        'duration': 'Permanent', 'status': 'APPLIED', 'location': 'Remote', 'confidence': 'MEDIUM',
+    }
+    
+    def test_fingerprints_ignore_formatting(self):
+        self.assertEqual(title_key('Acme Inc.', 'Sr. Backend Engineer (Remote)'), title_key('ACME', 'Backend Engineer, Senior'))
+        self.assertNotEqual(title_key('Acme', 'Backend Engineer'), title_key('Acme', 'Frontend Engineer'))
+        self.assertEqual(title_key('', 'Backend Engineer'), '')
+        self.assertEqual(
+            link_key('https://www.linkedin.com/jobs/view/42/?trk=feed&utm_source=x#apply'),
+            link_key('http://linkedin.com/jobs/view/42'),
+        )
+    
+    def test_create_detects_duplicates(self):
+        existing = make_job(self.user, company='Acme', job_title='Senior Backend Engineer')
+        response = self.client.post('/api/jobs/', self.payload, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual((response.data['match'], response.data['duplicate']['id']), ('title', existing.pk))
+        
+        response = self.client.post('/api/jobs/?on_duplicate=return', self.payload, format='json')
+        self.assertEqual((response.status_code, response.data['id']), (200, existing.pk))
+        self.assertEqual(self.client.post('/api/jobs/?on_duplicate=create', self.payload, format='json').status_code, 201)
+        self.assertEqual(self.client.post('/api/jobs/?on_duplicate=skip', self.payload, format='json').status_code, 400)
+        
+        # The same posting under a different title is caught by its link, and other users are unaffected.
+        existing.application_link = 'https://boards.example.com/acme/7?utm_source=mail'
+        existing.save(update_fields=['application_link'])
+        response = self.client.post('/api/jobs/', {**self.payload, 'job_title': 'Platform Engineer', 'application_link': 'https://boards.example.com/acme/7/'}, format='json')
+        self.assertEqual((response.status_code, response.data['match']), (409, 'application_link'))
+        self.client.force_authenticate(User.objects.create(username='other', email='other@example.com'))
+        self.assertEqual(self.client.post('/api/jobs/', self.payload, format='json').status_code, 201)
+    
+    def test_dedupe_command_merges_related_rows(self):
+        keeper = make_job(self.user, company='Acme', job_title='Backend Engineer', notes='Referred by Sam')
+        copy = make_job(self.user, company='Acme Inc', job_title='Backend Engineer', status='INTERVIEW',
+                        application_link='https://acme.example.com/jobs/1', notes='Recruiter call booked')
+        # Linked to the copy only through its URL.
+        relinked = make_job(self.user, company='Acme Corp', job_title='Backend Developer II',
+                            application_link='https://acme.example.com/jobs/1?ref=mail')
+        unrelated = make_job(self.user, company='Acme', job_title='Data Engineer')
+        Interview.objects.create(job=copy, interview_at=timezone.now(), interview_with='Sam', meeting_link='https://meet.example.com/x', type='HR')
+        JobDocument.objects.create(job=relinked, file=ContentFile(b'cover letter', name='cover.txt'), doc_types='COVER LETTER')
+        
+        output = StringIO()
+        call_command('dedupe_applications', dry_run=True, stdout=output)
+        self.assertIn('Would merge 2 duplicates into 1 applications', output.getvalue())
+        self.assertEqual(JobApplication.objects.count(), 4)
+        
+        call_command('dedupe_applications', stdout=StringIO())
+        self.assertEqual(set(JobApplication.objects.values_list('pk', flat=True)), {keeper.pk, unrelated.pk})
+        keeper.refresh_from_db()
+        self.assertEqual((keeper.status, keeper.application_link), ('INTERVIEW', 'https://acme.example.com/jobs/1'))
+        self.assertEqual(keeper.notes, 'Referred by Sam\n\nRecruiter call booked')
+        self.assertEqual(keeper.interviews.count(), 1)
+        self.assertEqual(keeper.documents.count(), 1)
+    
+    def test_dedupe_keeps_status_history(self):
+        keeper = make_job(self.user, company='Acme', job_title='Backend Engineer')
+        copy = make_job(self.user, company='Acme Inc', job_title='Backend Engineer')
+        self.client.patch(f'/api/jobs/{copy.pk}/', {'status': 'INTERVIEW'}, format='json')
+        moved = set(copy.status_transitions.values_list('pk', flat=True))
+        
+        call_command('dedupe_applications', stdout=StringIO())
+        self.assertFalse(StatusTransition.objects.filter(job_id=copy.pk).exists())
+        self.assertLessEqual(moved, set(keeper.status_transitions.values_list('pk', flat=True)))
+        self.assertEqual(keeper.status_transitions.order_by('-at', '-id').first().to_status, 'INTERVIEW')
+        self.assertEqual([stage['reached'] for stage in funnel_stats(self.user.pk)['funnel']['stages']], [1, 1, 1, 0])
+
+
+class StatusHistoryTests(JobApiTestCase):
+    def history(self, job):
+        return list(job.status_transitions.order_by('at', 'id').values_list('from_status', 'to_status'))
+    
+    def test_status_changes_are_logged(self):
+        job = make_job(self.user)
+        job.notes = 'Followed up'
+        job.save()
+        self.client.patch(f'/api/jobs/{job.pk}/', {'status': 'INTERVIEW'}, format='json')
+        self.client.patch('/api/jobs/bulk/', {'ids': [job.pk], 'changes': {'status': 'OFFER'}}, format='json')
+        self.client.patch('/api/jobs/bulk/', {'ids': [job.pk], 'changes': {'status': 'OFFER'}}, format='json')
+        self.assertEqual(self.history(job), [('', 'APPLIED'), ('APPLIED', 'INTERVIEW'), ('INTERVIEW', 'OFFER')])
+    
+    def test_funnel_without_history(self):
+        self.assertEqual(self.client.get('/api/jobs/stats/funnel/').data['funnel']['applications'], 0)
+        make_job(self.user)
+        cache.clear()
+        funnel = self.client.get('/api/jobs/stats/funnel/').data['funnel']
+        self.assertEqual((funnel['stages'][0]['reached'], funnel['days_in_stage']), (1, {}))
+    
+    def test_funnel(self):
+        def advance(job, *steps):
+            previous = job.status
+            for days, status in steps:
+                StatusTransition.objects.create(
+                    user=self.user, job=job, from_status=previous, to_status=status, at=job.applied_at + timedelta(days=days),
+                )
+                previous = status
+        
+        advance(make_job(self.user, source='LINKEDIN'), (4, 'INTERVIEW'), (10, 'OFFER'))
+        advance(make_job(self.user, source='REFERRAL'), (2, 'REJECTED'))
+        make_job(self.user, source='LINKEDIN', role_type='Internship')
+        
+        data = self.client.get('/api/jobs/stats/funnel/').data
+        funnel = data['funnel']
+        self.assertEqual(funnel['applications'], 3)
+        self.assertEqual(
+            [(stage['status'], stage['reached'], stage['conversion']) for stage in funnel['stages']],
+            [('APPLIED', 3, 33), ('REPLIED', 1, 100), ('INTERVIEW', 1, 100), ('OFFER', 1, None)],
+        )
+        self.assertEqual(funnel['stages'][2]['days_to_reach'], {'count': 1, 'p50': 4.0, 'p75': 4.0, 'p90': 4.0})
+        self.assertEqual(funnel['days_in_stage']['APPLIED'], {'count': 2, 'p50': 3.0, 'p75': 3.5, 'p90': 3.8})
+        self.assertEqual(funnel['days_in_stage']['INTERVIEW']['p50'], 6.0)
+        self.assertEqual(set(data['by_source']), {'LINKEDIN', 'REFERRAL'})
+        self.assertEqual(data['by_source']['LINKEDIN']['stages'][3]['reached'], 1)
+        self.assertEqual(data['by_role_type']['Internship']['applications'], 1)
+    
+    def test_funnel_reads_summaries_kept_with_the_log(self):
+        job = make_job(self.user)
+        self.client.patch('/api/jobs/bulk/', {'ids': [job.pk], 'changes': {'status': 'INTERVIEW'}}, format='json')
+        imported = 'job_title,role_type,company,duration,status,location,confidence\nSRE,Full Time,Globex,Permanent,REPLIED,Remote,LOW\n'
+        self.client.post('/api/jobs/bulk/', {'file': SimpleUploadedFile('jobs.csv', imported.encode())}, format='multipart')
+        with self.assertNumQueries(1):
+            funnel = funnel_stats(self.user.pk)['funnel']
+        self.assertEqual([stage['reached'] for stage in funnel['stages']], [2, 2, 1, 0])
+        self.assertEqual(funnel['days_in_stage']['APPLIED']['count'], 1)
+        
+        job.delete()
+        self.assertEqual(FunnelSummary.objects.count(), 1)
+
+
+class GhostApplicationsTests(JobApiTestCase):
+    def test_stale_applied_rows_are_ghosted(self):
+        old = timezone.now() - timedelta(days=45)
+        stale = [make_job(self.user, company=f'Quiet {i}') for i in range(3)]
+        interviewing = make_job(self.user, company='Scheduled')
+        rejected = make_job(self.user, status='REJECTED')
+        fresh = make_job(self.user)
+        JobApplication.objects.exclude(pk=fresh.pk).update(last_activity_at=old)
+        Interview.objects.create(job=interviewing, interview_at=timezone.now() + timedelta(days=2), type='HR')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('ghost_applications', '--days', '30', '--batch-size', '2', stdout=StringIO())
+        statuses = dict(JobApplication.objects.values_list('pk', 'status'))
+        self.assertEqual({pk for pk, status in statuses.items() if status == 'GHOSTED'}, {job.pk for job in stale})
+        self.assertEqual((statuses[rejected.pk], statuses[fresh.pk], statuses[interviewing.pk]), ('REJECTED', 'APPLIED', 'APPLIED'))
+        self.assertEqual(stale[0].status_transitions.latest('at').from_status, 'APPLIED')
+        stats = self.client.get('/api/jobs/stats/').data['status_breakdown']
+        self.assertEqual(stats, [{'status': 'GHOSTED', 'count': 3}, {'status': 'APPLIED', 'count': 2}, {'status': 'REJECTED', 'count': 1}])
+    
+    def test_status_changes_count_as_activity(self):
+        job = make_job(self.user)
+        JobApplication.objects.filter(pk=job.pk).update(last_activity_at=timezone.now() - timedelta(days=45))
+        job.refresh_from_db()
+        job.notes = 'Still waiting'
+        job.save()
+        self.assertLess(JobApplication.objects.get(pk=job.pk).last_activity_at, timezone.now() - timedelta(days=40))
+        for url, data in (('/api/jobs/bulk/', {'ids': [job.pk], 'changes': {'status': 'REPLIED'}}), (f'/api/jobs/{job.pk}/', {'status': 'APPLIED'})):
+            JobApplication.objects.filter(pk=job.pk).update(last_activity_at=timezone.now() - timedelta(days=45))
+            self.client.patch(url, data, format='json')
+            self.assertGreater(JobApplication.objects.get(pk=job.pk).last_activity_at, timezone.now() - timedelta(minutes=1), url)
+        call_command('ghost_applications', stdout=StringIO())
+        self.assertEqual(JobApplication.objects.get(pk=job.pk).status, 'APPLIED')
+
+
+class SyncTests(JobApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.first, self.second = make_job(self.user, company='Initech'), make_job(self.user, company='Globex')
+        self.interview = Interview.objects.create(
+            job=self.first, interview_at=timezone.now() + timedelta(days=1), interview_with='Bill',
+            meeting_link='https://meet.example.com/1', type='HR',
+        )
+        # Out of the overlap window, so later syncs only return what the test changes.
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        JobApplication.objects.update(updated_at=an_hour_ago)
+        Interview.objects.update(updated_at=an_hour_ago)
+    
+    def sync(self, since=None):
+        response = self.client.get('/api/jobs/sync/', {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def test_only_changes_since_the_token_come_back(self):
+        first = self.sync()
+        self.assertTrue(first['full'])
+        self.assertEqual([job['id'] for job in first['jobs']], [self.first.pk, self.second.pk])
+        self.assertNotIn('resume_match', first['jobs'][0])
+        self.assertEqual([interview['id'] for interview in first['interviews']], [self.interview.pk])
+        with mock.patch('jobs.sync.shared_cache', return_value=True), self.assertNumQueries(0):
+            self.assertEqual(self.sync(first['token'])['token'], first['token'])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/jobs/{self.second.pk}/', {'notes': 'Follow up Friday'}, format='json')
+            self.client.delete(f'/api/jobs/interviews/{self.interview.pk}/')
+        second = self.sync(first['token'])
+        self.assertFalse(second['full'])
+        self.assertEqual([(job['id'], job['notes']) for job in second['jobs']], [(self.second.pk, 'Follow up Friday')])
+        self.assertEqual(second['interviews'], [])
+        self.assertEqual(second['deleted'], {'jobs': [], 'interviews': [self.interview.pk], 'documents': []})
+    
+    def test_per_process_cache_always_checks_the_rows(self):
+        token = self.sync()['token']
+        # Written on another worker, whose version bump this one's cache never sees.
+        JobApplication.objects.filter(pk=self.first.pk).update(notes='Sent portfolio', updated_at=timezone.now())
+        changes = self.sync(token)
+        self.assertEqual([(job['id'], job['notes']) for job in changes['jobs']], [(self.first.pk, 'Sent portfolio')])
+        self.assertNotEqual(changes['token'], token)
+    
+    def test_bulk_writes_move_the_token(self):
+        token = self.sync()['token']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/jobs/bulk/', {'ids': [self.first.pk], 'changes': {'status': 'REPLIED'}}, format='json')
+            self.client.delete('/api/jobs/bulk/', {'ids': [self.second.pk]}, format='json')
+        changes = self.sync(token)
+        self.assertEqual([(job['id'], job['status']) for job in changes['jobs']], [(self.first.pk, 'REPLIED')])
+        self.assertEqual(changes['deleted']['jobs'], [self.second.pk])
+    
+    def test_stale_and_invalid_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=45))
+        stale = f'{int((timezone.now() - timedelta(days=45)).timestamp() * 1_000_000)}.1'
+        self.assertTrue(self.sync(stale)['full'])
+        self.assertEqual(self.client.get('/api/jobs/sync/', {'since': 'yesterday'}).status_code, 400)
+        call_command('prune_tombstones', stdout=StringIO())
+        self.assertFalse(Tombstone.objects.exists())
+
+
+class InterviewCalendarTests(JobApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = make_job(self.user, company='Acme, Inc.')
+        self.interview = Interview.objects.create(
+            job=self.job, interview_at=timezone.now() + timedelta(days=3), interview_with='Dana; CTO',
+            meeting_link='https://meet.example.com/abc', type='TECHNICAL',
+        )
+        self.feed_url = self.client.get('/api/jobs/interviews/calendar/').data['url']
+        self.calendar = Client()
+    
+    def test_polls_revalidate_without_queries(self):
+        response = self.calendar.get(self.feed_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn(f'UID:interview-{self.interview.pk}@careertracker\r\n', body)
+        self.assertIn('SUMMARY:Technical interview: Acme\\, Inc.\r\n', body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(self.calendar.get(self.feed_url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+            self.assertEqual(self.calendar.get(self.feed_url, headers={'If-Modified-Since': response['Last-Modified']}).status_code, 304)
+            self.assertEqual(self.calendar.get(self.feed_url).content, response.content)
+    
+    def test_only_calendar_changes_move_the_validators(self):
+        first = self.calendar.get(self.feed_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/jobs/{self.job.pk}/', {'notes': 'Prep system design'}, format='json')
+        self.assertEqual(self.calendar.get(self.feed_url, headers={'If-None-Match': first['ETag']}).status_code, 304)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/jobs/interviews/{self.interview.pk}/', {'type': 'MANAGERIAL'}, format='json')
+        second = self.calendar.get(self.feed_url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertIn('SUMMARY:Managerial interview', second.content.decode())
+    
+    def test_rotating_revokes_the_old_url(self):
+        self.assertEqual(self.client.get('/api/jobs/interviews/calendar/').data['url'], self.feed_url)
+        rotated = self.client.post('/api/jobs/interviews/calendar/')
+        self.assertEqual(rotated.status_code, 201)
+        self.assertEqual(self.calendar.get(self.feed_url).status_code, 404)
+        self.assertEqual(self.calendar.get(rotated.data['url']).status_code, 200)
+    
+    def test_rotation_reaches_other_workers(self):
+        # Each worker with its own cache: this one has the old token cached,
+        # the rotation happens on another.
+        self.assertEqual(self.calendar.get(self.feed_url).status_code, 200)
+        other_worker = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'other-worker'}}
+        with override_settings(CACHES=other_worker):
+            cache.clear()
+            rotated = self.client.post('/api/jobs/interviews/calendar/')
+            self.assertEqual(self.calendar.get(self.feed_url).status_code, 404)
+            self.assertEqual(self.calendar.get(rotated.data['url']).status_code, 200)
+        with mock.patch('time.time', return_value=time.time() + TOKEN_TIMEOUT + 1):
+            self.assertEqual(self.calendar.get(self.feed_url).status_code, 404)
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='tester', email='tester@example.com')
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+    
+    async def request(self, query='', headers=None):
+        """Starts events_app the way an ASGI server would; returns (status, headers, client inbox, outbox, task)."""
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': '/api/jobs/events/', 'raw_path': b'/api/jobs/events/', 'query_string': query.encode(), 'root_path': '',
+            'headers': [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+            'client': ('127.0.0.1', 5000), 'server': ('testserver', 80),
+        }
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        inbox.put_nowait({'type': 'http.request', 'body': b'', 'more_body': False})
+        task = asyncio.create_task(events_app(scope, inbox.get, outbox.put))
+        start = await asyncio.wait_for(outbox.get(), 5)
+        return start['status'], dict(start['headers']), inbox, outbox, task
+    
+    async def open_stream(self, query='', headers=None):
+        status, headers, inbox, outbox, task = await self.request(query, headers)
+        self.assertEqual((status, headers[b'content-type']), (200, b'text/event-stream'))
+        # The subscription is live once the first chunk is out.
+        self.assertEqual(await self.chunk(outbox), b'retry: 3000\n\n')
+        return inbox, outbox, task
+    
+    async def chunk(self, outbox):
+        return (await asyncio.wait_for(outbox.get(), 5))['body']
+    
+    def write(self, action, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            return action(*args)
+    
+    async def test_committed_changes_reach_the_users_streams(self):
+        inbox, outbox, task = await self.open_stream(headers={**self.headers, 'Origin': 'http://localhost:5173'})
+        other = await User.objects.acreate(username='other', email='other@example.com')
+        await sync_to_async(self.write)(make_job, other)
+        job = await sync_to_async(self.write)(make_job, self.user)
+        self.assertEqual(await self.chunk(outbox), (
+            f'event: change\ndata: {{"kind": "job", "action": "create", "ids": [{job.pk}]}}\n\n'
+        ).encode())
+        
+        ticket = (await self.async_client.post('/api/jobs/events/ticket/', headers=self.headers)).json()['ticket']
+        _, second, _ = await self.open_stream(f'ticket={ticket}')
+        await sync_to_async(self.write)(delete_rows, self.user, [job.pk])
+        for events in (outbox, second):
+            self.assertIn(b'"action": "delete"', await self.chunk(events))
+        
+        # Leaving unsubscribes.
+        streams = len(broker().streams[self.user.pk])
+        inbox.put_nowait({'type': 'http.disconnect'})
+        await asyncio.wait_for(task, 5)
+        self.assertEqual(len(broker().streams[self.user.pk]), streams - 1)
+    
+    @override_settings(EVENT_HEARTBEAT=0.01)
+    async def test_idle_streams_get_heartbeats(self):
+        _, outbox, _ = await self.open_stream(headers=self.headers)
+        self.assertEqual(await self.chunk(outbox), b':\n\n')
+    
+    async def test_requires_a_token_or_ticket(self):
+        for query, headers in (('', None), ('ticket=forged', None), ('', {'Authorization': 'Bearer nonsense'})):
+            with self.subTest(query=query, headers=headers):
+                status, _, _, outbox, _ = await self.request(query, headers)
+                self.assertEqual(status, 401)
+                self.assertIn(b'detail', await self.chunk(outbox))
+    
+    def test_several_workers_want_a_cross_process_broker(self):
+        with override_settings(WEB_CONCURRENCY=2, EVENT_BROKER='jobs.events.InProcessBroker'):
+            self.assertEqual([warning.id for warning in check_event_broker(None)], ['jobs.W001'])
+        with override_settings(WEB_CONCURRENCY=2, EVENT_BROKER='jobs.events.PostgresBroker'):
+            self.assertEqual(check_event_broker(None), [])
+
+
+# NOTIFY is only delivered on commit, which TestCase never does.
+@skipUnless(connection.vendor == 'postgresql', 'LISTEN/NOTIFY needs Postgres')
+class PostgresBrokerTests(TransactionTestCase):
+    async def test_notify_reaches_listeners(self):
+        postgres = PostgresBroker()
+        event = {'kind': 'job', 'action': 'update', 'ids': [1]}
+        async with postgres.subscribe(42) as queue:
+            # The listener connects in the background; publish until it hears one.
+            async with asyncio.timeout(10):
+                while queue.empty():
+                    await sync_to_async(postgres.publish)(42, event)
+                    await asyncio.sleep(0.1)
+        postgres.listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await postgres.listener
+        self.assertEqual(queue.get_nowait(), event)
+
+
+@override_settings(ROOT_URLCONF='careertracker.asgi_urls', MEDIA_ROOT=tempfile.mkdtemp())
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='tester', email='tester@example.com')
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}', 'Accept': 'application/json'}
+    
+    async def test_requires_a_valid_token(self):
+        response = await self.async_client.get('/api/jobs/stats/')
+        self.assertEqual((response.status_code, response['WWW-Authenticate']), (401, 'Bearer realm="api"'))
+        response = await self.async_client.get('/api/jobs/', headers={'Authorization': 'Bearer nonsense'})
+        self.assertEqual((response.status_code, response.json()['code']), (401, 'token_not_valid'))
+    
+    async def test_cached_views_match_the_sync_ones(self):
+        await sync_to_async(make_job)(self.user, status='OFFER')
+        for url in ('/api/jobs/stats/', '/api/jobs/?fields=id,company,status'):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url, headers=self.headers)
+                with override_settings(ROOT_URLCONF='careertracker.urls'):
+                    expected = await self.async_client.get(url, headers=self.headers)
+                self.assertEqual(response.json(), expected.json())
+                
+                # Hits come from the cache: a write that skips invalidation goes unseen.
+                await JobApplication.objects.filter(user=self.user).aupdate(status='REJECTED')
+                hit = await self.async_client.get(url, headers=self.headers)
+                revalidated = await self.async_client.get(url, headers={**self.headers, 'If-None-Match': hit['ETag']})
+                await JobApplication.objects.filter(user=self.user).aupdate(status='OFFER')
+                self.assertEqual((hit.content, hit['ETag']), (response.content, response['ETag']))
+                self.assertEqual(revalidated.status_code, 304)
+        
+        response = await self.async_client.post('/api/jobs/', {
+            'job_title': 'Data Engineer', 'role_type': 'Full Time', 'company': 'Initech', 'duration': 'Permanent',
+            'status': 'APPLIED', 'location': 'Remote', 'confidence': 'LOW',
+        }, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+    
+    async def test_document_download_streams_asynchronously(self):
+        content = bytes(range(256)) * 1024
+        job = await sync_to_async(make_job)(self.user)
+        document = await sync_to_async(JobDocument.objects.create)(
+            job=job, file=ContentFile(content, name='resume.pdf'), doc_types='RESUME',
+        )
+        url = f'/api/jobs/documents/{document.pk}/download/'
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertTrue(response.is_async)
+        self.assertEqual((response['Content-Length'], response['Content-Disposition']), (str(len(content)), 'attachment; filename="resume.pdf"'))
+        self.assertEqual(b''.join([part async for part in response.streaming_content]), content)
+        
+        response = await self.async_client.get(url, headers={**self.headers, 'Range': 'bytes=1000-1999'})
+        self.assertEqual((response.status_code, response['Content-Range']), (206, f'bytes 1000-1999/{len(content)}'))
+        self.assertEqual(b''.join([part async for part in response.streaming_content]), content[1000:2000])
+        
+        other = await User.objects.acreate(username='other', email='other@example.com')
+        response = await self.async_client.get(url, headers={'Authorization': f'Bearer {AccessToken.for_user(other)}'})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,180 @@
+import hashlib
+import mimetypes
+import re
+from pathlib import Path
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files import File
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+from .models import JobDocument
+
+COPY_BUFFER = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class ChunkError(Exception):
+    pass
+
+
+def part_path(session):
+    return Path(settings.DOCUMENT_UPLOAD_TEMP_DIR) / f'{session.pk}.part'
+
+
+def append_chunk(session, stream, length):
+    """
+    Appends length bytes from stream to the session's part file, copying in
+    small buffers so a chunk is never held in memory. The caller holds the
+    session row lock and saves the new offset.
+    """
+    path = part_path(session)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'ab') as part:
+        # Drop anything past the committed offset, e.g. from a chunk whose request died midway.
+        part.truncate(session.received)
+        part.seek(session.received)
+        remaining = length
+        while remaining:
+            data = stream.read(min(COPY_BUFFER, remaining))
+            if not data:
+                raise ChunkError('Request body ended before Content-Length bytes were received.')
+            part.write(data)
+            remaining -= len(data)
+    session.received += length
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for block in iter(lambda: part.read(COPY_BUFFER), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def assemble(session):
+    """Verifies the finished part file and turns it into a JobDocument."""
+    path = part_path(session)
+    try:
+        if file_sha256(path) != session.sha256.lower():
+            raise ChunkError('Checksum mismatch, the upload was corrupted. Start a new upload.')
+        document = JobDocument(job=session.job, doc_types=session.doc_types, filename=session.filename)
+        with open(path, 'rb') as part:
+            document.file.save(session.filename, File(part), save=True)
+    finally:
+        path.unlink(missing_ok=True)
+    return document
+
+
+def reuse_blob(session):
+    """
+    Completes an upload without any bytes when the user already stored the
+    same content. Limited to their own documents, so a bare hash never grants
+    access to someone else's file.
+    """
+    existing = JobDocument.objects.filter(job__user=session.user, blob_id=session.sha256).first()
+    if existing is None or not existing.file.storage.exists(existing.file.name):
+        return None
+    document = JobDocument(job=session.job, doc_types=session.doc_types, filename=session.filename)
+    document.file.name = existing.file.name
+    document.save()
+    return document
+
+
+def discard(session):
+    part_path(session).unlink(missing_ok=True)
+    session.delete()
+
+
+class RangeFile:
+    # Reads at most `length` bytes from `start`, for a 206 response body.
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file, self.remaining = file, length
+
+    def __iter__(self):
+        while self.remaining > 0:
+            data = self.file.read(min(COPY_BUFFER, self.remaining))
+            if not data:
+                break
+            self.remaining -= len(data)
+            yield data
+
+
+class AsyncRangeFile(RangeFile):
+    # Django's ASGI handler reads a sync iterator into memory whole before
+    # sending it, so async views stream through this instead. Responses use
+    # a sync iterator whenever there is one, hence no __iter__.
+    __iter__ = None
+
+    async def __aiter__(self):
+        read = sync_to_async(self.file.read, thread_sensitive=False)
+        while self.remaining > 0:
+            data = await read(min(COPY_BUFFER, self.remaining))
+            if not data:
+                break
+            self.remaining -= len(data)
+            yield data
+
+
+def byte_range(header, size):
+    """
+    Parses a single-range Range header into (start, end) inclusive. Returns
+    None for no or unsupported ranges (served in full) and raises ValueError
+    when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # bytes=-500: the final 500 bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def document_response(request, document, asynchronous=False):
+    """
+    Streams a document, honouring Range, or hands the transfer to the front
+    proxy when DOCUMENT_DOWNLOAD_OFFLOAD is set so no worker is held for it.
+    asynchronous streams the body through an async iterator, for ASGI views.
+    """
+    name = document.download_name()
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    offload = settings.DOCUMENT_DOWNLOAD_OFFLOAD
+    if offload:
+        response = HttpResponse(content_type=content_type)
+        if offload == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = settings.DOCUMENT_ACCEL_REDIRECT_PREFIX + document.file.name
+        else:
+            response['X-Sendfile'] = document.file.path
+        response['Content-Disposition'] = content_disposition_header(True, name)
+        return response
+
+    size = document.file.size
+    try:
+        requested = byte_range(request.headers.get('Range'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = document.file.open('rb')
+    if requested is None and not asynchronous:
+        response = FileResponse(file, as_attachment=True, filename=name)
+    else:
+        # FileResponse only sets its headers itself for whole files it reads.
+        start, end = requested or (0, size - 1)
+        body = (AsyncRangeFile if asynchronous else RangeFile)(file, start, end - start + 1)
+        response = FileResponse(body, status=200 if requested is None else 206, content_type=content_type)
+        if requested is not None:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = content_disposition_header(True, name)
+        response._resource_closers.append(file.close)
+    response['Accept-Ranges'] = 'bytes'
+    return response
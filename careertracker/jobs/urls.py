@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 from django.conf import settings
 from django.conf.urls.static import static
@@ -6,9 +6,20 @@ from django.conf.urls.static import static
 urlpatterns = [
     path('', views.JobListView.as_view(), name='job_list'),
     path('<int:pk>/', views.JobDetailView.as_view(), name='job_detail'),
+    path('bulk/', views.JobBulkView.as_view(), name='job_bulk'),
+    re_path(r'^bulk/export/(?P<kind>csv|ndjson)/$', views.JobBulkExportView.as_view(), name='job_bulk_export'),
+    path('extract/', views.JobExtractView.as_view(), name='job_extract'),
+    path('sync/', views.JobSyncView.as_view(), name='job_sync'),
+    path('events/ticket/', views.JobEventsTicketView.as_view(), name='job_events_ticket'),
     path('stats/', views.JobAnalyticsView.as_view(), name='job_analytics'),
+    path('stats/funnel/', views.JobFunnelView.as_view(), name='job_funnel'),
     path('interviews/', views.InterviewListView.as_view(), name='interviews_list'),
     path('interviews/<int:pk>/', views.InterviewDetailView.as_view(), name='interview_detail'),
+    path('interviews/calendar/', views.InterviewCalendarView.as_view(), name='interview_calendar'),
+    path('interviews/calendar/<str:token>.ics', views.interview_calendar_feed, name='interview_calendar_feed'),
     path('documents/', views.JobDocumentListView.as_view(), name='document_list'),
     path("documents/<int:pk>/", views.JobDocumentDetailView.as_view(), name='document_detail'),
+    path('documents/<int:pk>/download/', views.JobDocumentDownloadView.as_view(), name='document_download'),
+    path('documents/uploads/', views.UploadSessionListView.as_view(), name='upload_session_list'),
+    path('documents/uploads/<uuid:pk>/', views.UploadSessionDetailView.as_view(), name='upload_session_detail'),
 ]
@@ -1,27 +1,78 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import generics, filters
+from rest_framework import generics, filters, status
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from .models import JobApplication, Interview, JobDocument
-from .serializers import JobApplicationSerializer, InterviewSerializer, JobDocumentSerializer
-from django.db.models import Count
+from .models import JobApplication, Interview, JobDocument, UploadSession
+from .serializers import (
+    JobApplicationSerializer, InterviewSerializer, JobDocumentSerializer, BulkMutationSerializer, UploadSessionSerializer,
+    JobPageSerializer, requested_fields,
+)
+from .pagination import KeysetPagination
+from .stats import rollup_stats, stats_payload
+from .history import funnel_stats
+from .cache import CachedResponseMixin
+from .calendar import calendar_body, feed_for, feed_user
+from .sync import changes_since
+from .events import stream_ticket
+from .search import FullTextSearchFilter, SEARCH_FIELDS
+from .bulk import FORMATS, delete_rows, export_rows, import_rows, read_rows, update_rows, upload_format
+from .dedupe import find_duplicate
+from .postings import posting_for
+from .uploads import ChunkError, append_chunk, assemble, discard, document_response, reuse_blob
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OrderBy, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 
 # Create your views here.
 
-class JobListView(generics.ListCreateAPIView):
+def latest_per_job(queryset, limit, *ordering):
+    # ROW_NUMBER() per job rather than a slice, so the rows still land in the
+    # related manager's cache that job.interviews / job.documents read from.
+    order_by = [OrderBy(F(name.lstrip('-')), descending=name.startswith('-')) for name in ordering]
+    rank = Window(RowNumber(), partition_by=F('job_id'), order_by=order_by)
+    return queryset.annotate(rank=rank).filter(rank__lte=limit).order_by(*ordering)
+
+def prefetch_nested(queryset, limit, fields=None):
+    # Nested interviews/documents come from one extra query each, capped per job.
+    lookups = [
+        Prefetch('interviews', queryset=latest_per_job(Interview.objects.all(), limit, '-interview_at', 'id')),
+        Prefetch('documents', queryset=latest_per_job(JobDocument.objects.all(), limit, '-uploaded_at', 'id')),
+    ]
+    return queryset.prefetch_related(*(
+        lookup for lookup in lookups if fields is None or lookup.prefetch_through in fields
+    ))
+
+class JobListView(CachedResponseMixin, generics.ListCreateAPIView):
     serializer_class = JobApplicationSerializer
     permission_classes = [IsAuthenticated]
     
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['status', 'source', 'confidence', 'role_type']
-    search_fields = ['company', 'job_title', 'location', 'contacts', 'notes']
+    search_fields = SEARCH_FIELDS
     ordering_fields = ['applied_at', 'salary_est', 'resume_match', 'confidence']
     
     ordering = ['-applied_at']
+    pagination_class = KeysetPagination
+    nested_limit = 10
     
     def get_queryset(self):
-        return JobApplication.objects.filter(user=self.request.user).order_by('-applied_at')
+        queryset = JobApplication.objects.filter(user=self.request.user).order_by('-applied_at')
+        fields = requested_fields(self.request)
+        if fields is not None:
+            # Only load the columns the client asked for (plus the cursor keys),
+            # so list views skip wide columns like notes entirely.
+            columns = {field.name for field in JobApplication._meta.concrete_fields}
+            queryset = queryset.only('id', 'applied_at', *(fields & columns))
+        return prefetch_nested(queryset, self.nested_limit, fields)
     
     def create(self, request, *args, **kwargs):
         print("📥 Incoming Data:", request.data)
@@ -29,6 +80,22 @@ class JobListView(generics.ListCreateAPIView):
         if not serializer.is_valid():
             print("❌ Validation Errors:", serializer.errors)
             return Response(serializer.errors, status=400)
+        # ?on_duplicate=error (default) answers 409 with the tracked copy,
+        # return hands back that copy instead, and create skips the check.
+        on_duplicate = request.query_params.get('on_duplicate', 'error')
+        if on_duplicate not in ('error', 'return', 'create'):
+            return Response({'on_duplicate': 'Expected error, return or create.'}, status=400)
+        if on_duplicate != 'create':
+            data = serializer.validated_data
+            duplicate, match = find_duplicate(request.user, data.get('job_title'), data.get('company'), data.get('application_link'))
+            if duplicate is not None:
+                existing = self.get_serializer(prefetch_nested(JobApplication.objects.filter(pk=duplicate.pk), self.nested_limit).get())
+                if on_duplicate == 'return':
+                    return Response(existing.data, status=200)
+                return Response(
+                    {'detail': 'This application is already tracked.', 'match': match, 'duplicate': existing.data},
+                    status=status.HTTP_409_CONFLICT,
+                )
         self.perform_create(serializer)
         return Response(serializer.data, status=201)
 
@@ -38,49 +105,90 @@ class JobListView(generics.ListCreateAPIView):
 class JobDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = JobApplicationSerializer
     permission_classes = [IsAuthenticated]
+    nested_limit = 100
     
     def get_queryset(self):
-        return JobApplication.objects.filter(user=self.request.user)
+        queryset = JobApplication.objects.filter(user=self.request.user)
+        return prefetch_nested(queryset, self.nested_limit, requested_fields(self.request))
 
-class JobAnalyticsView(APIView):
+class JobBulkView(APIView):
     permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, MultiPartParser]
     
-    def get(self, request):
-        user = request.user
-        total_applications = JobApplication.objects.filter(user=user).count()
-        status_breakdown = (
-            JobApplication.objects.filter(user=user)
-            .values('status')
-            .annotate(count=Count('status'))
-            .order_by('-count')
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': 'Upload a .csv or .ndjson file.'}, status=status.HTTP_400_BAD_REQUEST)
+        kind = upload_format(upload)
+        if kind is None:
+            return Response({'file': 'Unsupported file type, expected CSV or NDJSON.'}, status=status.HTTP_400_BAD_REQUEST)
+        created, errors = import_rows(request.user, read_rows(upload, kind))
+        if errors:
+            return Response({'created': 0, 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'created': created}, status=status.HTTP_201_CREATED)
+    
+    def patch(self, request):
+        serializer = BulkMutationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = serializer.validated_data.get('changes')
+        if not changes:
+            return Response({'changes': 'This field is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'ids': update_rows(request.user, serializer.validated_data['ids'], changes)})
+    
+    def delete(self, request):
+        serializer = BulkMutationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'ids': delete_rows(request.user, serializer.validated_data['ids'])})
+
+class JobBulkExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, kind):
+        response = StreamingHttpResponse(
+            export_rows(JobApplication.objects.filter(user=request.user), kind), content_type=FORMATS[kind],
         )
-        
-        total_offers = JobApplication.objects.filter(user=user, status='OFFER').count()
-        interview_count = JobApplication.objects.filter(user=user, status='INTERVIEW').count()
-        rejection_count = JobApplication.objects.filter(user=user, status='REJECTED').count()
-        
-        if total_applications > 0:
-            offer_rate = round((total_offers / total_applications) * 100)
-            rejection_rate = round((rejection_count / total_applications) * 100)
-            interview_rate = round((interview_count / total_applications) * 100)
-        else:
-            offer_rate = 0
-            rejection_rate = 0
-            interview_rate = 0
-        
-        return Response({
-            'total_applications': total_applications,
-            'status_breakdown': status_breakdown,
-            'analytics': {
-                'offer_rate': offer_rate,
-                'rejection_rate': rejection_rate,
-                'interview_rate': interview_rate,
-                'total_offers': total_offers,
-                'interview_count': interview_count
-            }
-        })
-
-class InterviewListView(generics.ListCreateAPIView):
+        response['Content-Disposition'] = f'attachment; filename="applications.{kind}"'
+        return response
+
+class JobExtractView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = JobPageSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        result = posting_for(request.user.pk, data['url'], data.get('html'))
+        if result is None:
+            return Response({'html': 'This page has not been extracted yet, send its HTML.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+class JobAnalyticsView(CachedResponseMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def list(self, request):
+        return Response(stats_payload(rollup_stats(request.user)))
+
+class JobSyncView(APIView):
+    """Applications, interviews and documents changed since the ?since= token; see jobs.sync."""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        return Response(changes_since(request, request.query_params.get('since') or None))
+
+class JobEventsTicketView(APIView):
+    """A ticket for EventSource, which can't send the bearer token: events/?ticket=<ticket> (ASGI only)."""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        return Response({'ticket': stream_ticket(request.user.pk), 'expires_in': settings.EVENT_TICKET_MAX_AGE})
+
+class JobFunnelView(CachedResponseMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def list(self, request):
+        return Response(funnel_stats(request.user.pk))
+
+class InterviewListView(CachedResponseMixin, generics.ListCreateAPIView):
     serializer_class = InterviewSerializer
     permission_classes = [IsAuthenticated]
     
@@ -97,6 +205,35 @@ class InterviewDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return Interview.objects.filter(job__user=self.request.user)
 
+class InterviewCalendarView(APIView):
+    """GET the user's interview calendar URL, POST to replace it with a new one."""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        return Response(self.feed_url(request, feed_for(request.user)))
+    
+    def post(self, request):
+        return Response(self.feed_url(request, feed_for(request.user, rotate=True)), status=status.HTTP_201_CREATED)
+    
+    def feed_url(self, request, feed):
+        return {'url': request.build_absolute_uri(reverse('interview_calendar_feed', args=[feed.token]))}
+
+@require_safe
+def interview_calendar_feed(request, token):
+    # Plain Django view: calendar apps send no credentials and accept only
+    # text/calendar, and every poll should stay as cheap as the cache reads.
+    user_id = feed_user(token)
+    if user_id is None:
+        raise Http404('Unknown calendar.')
+    body, etag, last_modified = calendar_body(user_id)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 class JobDocumentListView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = JobDocumentSerializer
@@ -120,3 +257,80 @@ class JobDocumentDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def get_queryset(self):
         return JobDocument.objects.filter(job__user=self.request.user)
+
+class JobDocumentDownloadView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, pk):
+        document = get_object_or_404(JobDocument, pk=pk, job__user=request.user)
+        return document_response(request, document)
+
+class UploadSessionListView(generics.CreateAPIView):
+    """
+    Opens an upload session. When the user has already uploaded a file with
+    the same SHA-256, the document is created straight away and returned as
+    {"document": ...} with no chunks to send.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = UploadSessionSerializer
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            session = serializer.save(user=request.user)
+            document = reuse_blob(session)
+            if document is None:
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+            session.delete()
+        return Response({'document': JobDocumentSerializer(document, context={'request': request}).data}, status=status.HTTP_201_CREATED)
+
+class UploadSessionDetailView(APIView):
+    """
+    GET reports how many bytes have arrived, so an interrupted upload can
+    resume. PATCH appends one chunk, sent as the raw body with Upload-Offset
+    set to the current offset; the final chunk verifies the SHA-256 and
+    returns the new document. DELETE abandons the upload.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get_session(self, pk, lock=False):
+        sessions = UploadSession.objects.filter(user=self.request.user)
+        if lock:
+            sessions = sessions.select_for_update()
+        return get_object_or_404(sessions, pk=pk)
+    
+    def get(self, request, pk):
+        return Response(UploadSessionSerializer(self.get_session(pk)).data)
+    
+    def patch(self, request, pk):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response({'detail': 'Upload-Offset and Content-Length headers are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            session = self.get_session(pk, lock=True)
+            if offset != session.received:
+                return Response({'detail': 'Offset mismatch.', 'offset': session.received}, status=status.HTTP_409_CONFLICT)
+            if not 0 < length <= settings.DOCUMENT_UPLOAD_CHUNK_SIZE or offset + length > session.size:
+                return Response({'detail': 'Chunk is empty, too large or past the end of the file.'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                append_chunk(session, request.stream, length)
+            except ChunkError as e:
+                return Response({'detail': str(e), 'offset': offset}, status=status.HTTP_400_BAD_REQUEST)
+            if session.received < session.size:
+                session.save(update_fields=['received'])
+                return Response({'offset': session.received})
+            try:
+                document = assemble(session)
+            except ChunkError as e:
+                discard(session)
+                return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            session.delete()
+        return Response(JobDocumentSerializer(document, context={'request': request}).data, status=status.HTTP_201_CREATED)
+    
+    def delete(self, request, pk):
+        discard(self.get_session(pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
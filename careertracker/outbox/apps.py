@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class OutboxConfig(AppConfig):
+    name = 'outbox'
+    default_auto_field = 'django.db.models.BigAutoField'
@@ -0,0 +1,51 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.utils import timezone
+from .models import OutgoingEmail
+
+def outgoing(subject, body, to, from_email=None):
+    return OutgoingEmail(
+        subject=subject, body=body, to=list(to),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+def enqueue_email(subject, body, to, from_email=None):
+    """Queues an email for the process_outbox worker instead of sending it in the request."""
+    email = outgoing(subject, body, to, from_email)
+    email.save()
+    return email
+
+async def aenqueue_email(subject, body, to, from_email=None):
+    email = outgoing(subject, body, to, from_email)
+    await email.asave()
+    return email
+
+def enqueue_emails(emails, batch_size=1000):
+    # emails: unsaved OutgoingEmail rows built with outgoing()
+    return OutgoingEmail.objects.bulk_create(emails, batch_size=batch_size)
+
+def as_message(email):
+    return EmailMessage(subject=email.subject, body=email.body, from_email=email.from_email or None, to=email.to)
+
+def retry_delay(attempts):
+    # 30s, 1m, 2m, 4m ... capped at an hour
+    return timedelta(seconds=min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600))
+
+def next_attempt(attempts):
+    return timezone.now() + retry_delay(attempts)
+
+def prune_finished(batch_size=1000):
+    """
+    Deletes SENT and FAILED emails older than OUTBOX_RETENTION_HOURS,
+    batch_size rows per statement; returns how many. Bodies hold plaintext
+    OTP codes, so finished mail isn't kept around.
+    """
+    cutoff = timezone.now() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+    finished = OutgoingEmail.objects.filter(status__in=('SENT', 'FAILED'), created_at__lt=cutoff)
+    deleted = 0
+    while True:
+        ids = list(finished.order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += OutgoingEmail.objects.filter(pk__in=ids).delete()[0]
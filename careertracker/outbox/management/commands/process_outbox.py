@@ -0,0 +1,116 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.utils import timezone
+from outbox.mail import as_message, next_attempt, prune_finished
+from outbox.models import OutgoingEmail
+
+class Command(BaseCommand):
+    help = 'Sends queued emails from the outbox, retrying failures with exponential backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Emails claimed per transaction and sent over one SMTP connection.')
+        parser.add_argument('--workers', type=int, default=1, help='Batches sent in parallel, each over its own SMTP connection.')
+        parser.add_argument('--once', action='store_true', help='Drain the due emails and exit instead of polling.')
+        parser.add_argument('--poll', type=float, default=5, help='Seconds to sleep when the outbox is empty.')
+        parser.add_argument('--prune-every', type=float, default=3600, help='Seconds between deletes of finished emails.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        self.batch_size = options['batch_size']
+        workers = options['workers']
+        if workers > 1 and connections[OutgoingEmail.objects.db].vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite allows a single writer; falling back to one worker'))
+            workers = 1
+
+        pruned_at = None
+        while True:
+            started = time.perf_counter()
+            if pruned_at is None or started - pruned_at >= options['prune_every']:
+                pruned = prune_finished()
+                pruned_at = started
+                if pruned:
+                    self.stdout.write(self.style.SUCCESS(f'Deleted {pruned} finished emails'))
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(lambda _: self.drain_in_thread(), range(workers)))
+            else:
+                results = [self.drain()]
+            elapsed = time.perf_counter() - started
+            sent = sum(worker_sent for worker_sent, _ in results)
+            failed = sum(worker_failed for _, worker_failed in results)
+            if sent or failed:
+                rate = sent / elapsed if elapsed else 0
+                self.stdout.write(self.style.SUCCESS(
+                    f'Sent {sent} emails ({failed} failed) in {elapsed:.2f}s, {rate:.0f} emails/s'
+                ))
+            if options['once']:
+                return
+            time.sleep(options['poll'])
+
+    def drain_in_thread(self):
+        try:
+            return self.drain()
+        finally:
+            connections.close_all()
+
+    def drain(self):
+        sent = failed = 0
+        while True:
+            batch_sent, batch_failed = self.send_batch()
+            if not batch_sent and not batch_failed:
+                return sent, failed
+            sent += batch_sent
+            failed += batch_failed
+
+    def send_batch(self):
+        now = timezone.now()
+        sent, failed = [], []
+        with transaction.atomic():
+            # Rows another worker has claimed are skipped rather than sent twice.
+            emails = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(status='PENDING', available_at__lte=now)
+                .order_by('available_at')[:self.batch_size]
+            )
+            if not emails:
+                return 0, 0
+
+            try:
+                mail = get_connection()
+                mail.open()
+            except Exception as e:
+                # Nothing went out: the whole batch is retried like a failed send.
+                self.stdout.write(self.style.ERROR(f'Could not connect to the mail server: {str(e)}'))
+                for email in emails:
+                    self.fail(email, e)
+                failed = emails
+            else:
+                # Already open, so entering only arranges the close.
+                with mail:
+                    for email in emails:
+                        try:
+                            mail.send_messages([as_message(email)])
+                        except Exception as e:
+                            self.fail(email, e)
+                            failed.append(email)
+                            self.stdout.write(self.style.ERROR(f'Failed to send to {", ".join(email.to)}: {str(e)}'))
+                            continue
+                        sent.append(email.pk)
+                        if self.verbosity > 1:
+                            self.stdout.write(self.style.SUCCESS(f'Sent email to {", ".join(email.to)}'))
+
+            OutgoingEmail.objects.filter(pk__in=sent).update(status='SENT', sent_at=timezone.now(), last_error='')
+            OutgoingEmail.objects.bulk_update(failed, ['attempts', 'last_error', 'status', 'available_at'])
+        return len(sent), len(failed)
+
+    def fail(self, email, error):
+        email.attempts += 1
+        email.last_error = str(error)
+        if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            email.status = 'FAILED'
+        else:
+            email.available_at = next_attempt(email.attempts)
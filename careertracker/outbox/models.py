@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils import timezone
+
+# Create your models here.
+
+class OutgoingEmail(models.Model):
+    STATUS_TYPES = (
+        ('PENDING', 'Pending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    )
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_TYPES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # Workers only ever poll pending rows that are due.
+            models.Index(fields=['available_at'], condition=models.Q(status='PENDING'), name='outbox_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.to)} ({self.status})'
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from jobs.models import Interview, JobApplication
+from .models import OutgoingEmail
+
+# Create your tests here.
+
+def process_outbox():
+    call_command('process_outbox', once=True, stdout=StringIO())
+
+class OutboxTests(TestCase):
+    def test_send_otp_queues_instead_of_sending(self):
+        response = APIClient().post('/api/users/send-otp/', {'email': 'new@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.get().to, ['new@example.com'])
+
+        process_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(OutgoingEmail.objects.get().status, 'SENT')
+
+    def test_reminders_are_queued_once(self):
+        user = User.objects.create(username='tester', email='tester@example.com')
+        job = JobApplication.objects.create(
+            user=user, job_title='Backend Engineer', role_type='Full Time', company='Acme',
+            duration='Permanent', status='INTERVIEW', location='Remote', confidence='MEDIUM',
+        )
+        Interview.objects.create(job=job, interview_at=timezone.now() + timedelta(hours=2), type='TECHNICAL')
+
+        call_command('send_reminders', stdout=StringIO())
+        call_command('send_reminders', stdout=StringIO())
+        process_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['tester@example.com'])
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_give_up(self):
+        email = OutgoingEmail.objects.create(subject='Hi', body='Hello', to=['a@example.com'])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            process_outbox()
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('PENDING', 1))
+            self.assertGreater(email.available_at, timezone.now())
+
+            OutgoingEmail.objects.update(available_at=timezone.now())
+            process_outbox()
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('FAILED', 2, 'down'))
+
+    def test_unreachable_server_backs_off_the_batch(self):
+        emails = [OutgoingEmail.objects.create(subject='Hi', body='Hello', to=[f'{n}@example.com']) for n in range(2)]
+        with mock.patch('outbox.management.commands.process_outbox.get_connection', side_effect=ConnectionRefusedError('refused')):
+            process_outbox()
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('PENDING', 1, 'refused'))
+            self.assertGreater(email.available_at, timezone.now())
+        
+        OutgoingEmail.objects.update(available_at=timezone.now())
+        process_outbox()
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(OUTBOX_RETENTION_HOURS=24)
+    def test_finished_emails_are_pruned(self):
+        old = timezone.now() - timedelta(hours=25)
+        for status in ('SENT', 'FAILED', 'PENDING'):
+            email = OutgoingEmail.objects.create(subject='OTP', body='Your otp is 123456', to=['a@example.com'], status=status)
+            OutgoingEmail.objects.filter(pk=email.pk).update(created_at=old)
+        recent = OutgoingEmail.objects.create(subject='OTP', body='Your otp is 654321', to=['b@example.com'], status='SENT')
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            process_outbox()
+        self.assertEqual(sorted(OutgoingEmail.objects.values_list('status', flat=True)), ['PENDING', 'SENT'])
+        self.assertTrue(OutgoingEmail.objects.filter(pk=recent.pk).exists())
@@ -0,0 +1,59 @@
+import json
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, ParseError
+from .authentication import ClaimsJWTAuthentication
+
+# DRF only runs synchronously, so the async views served under ASGI are plain
+# Django views. These helpers give them the same JWT auth, error bodies and
+# request parsing as the DRF views they stand in for.
+
+jwt_authentication = ClaimsJWTAuthentication()
+
+
+def error_response(detail, status, headers=None):
+    return JsonResponse(detail if isinstance(detail, dict) else {'detail': detail}, status=status, headers=headers)
+
+
+async def authenticate(request):
+    """(user, None) for a valid bearer token, else (None, the 401 DRF would send)."""
+    try:
+        result = await sync_to_async(jwt_authentication.authenticate)(request)
+        if result is None:
+            raise NotAuthenticated()
+    except (AuthenticationFailed, NotAuthenticated) as error:
+        return None, error_response(error.detail, 401, {'WWW-Authenticate': jwt_authentication.authenticate_header(request)})
+    request.user = result[0]
+    return result[0], None
+
+
+def request_data(request):
+    """The JSON or form body, as DRF's default parsers would read it."""
+    if request.content_type != 'application/json':
+        return request.POST
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError as error:
+        raise ParseError(f'JSON parse error - {error}')
+
+
+def async_api_view(methods, authenticated=True):
+    """@api_view for async views: method check, JWT auth and APIException handling."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return error_response(f'Method "{request.method}" not allowed.', 405, {'Allow': ', '.join(methods)})
+            if authenticated:
+                _, error = await authenticate(request)
+                if error is not None:
+                    return error
+            try:
+                return await view(request, *args, **kwargs)
+            except APIException as error:
+                headers = {'Retry-After': '%d' % error.wait} if getattr(error, 'wait', None) else None
+                return error_response(error.detail, error.status_code, headers)
+        return csrf_exempt(wrapper)
+    return decorator
@@ -0,0 +1,33 @@
+from django.http import JsonResponse
+from rest_framework.exceptions import Throttled
+from .async_api import async_api_view, request_data
+from .otp import asend_code, averify_code
+from .throttles import SEND_BUCKETS, VERIFY_BUCKETS, athrottle_wait
+
+# Async versions of send_otp and verify_otp for the ASGI routes. They answer
+# exactly like the views in views.py; users.otp does the work for both.
+
+
+@async_api_view(['POST'], authenticated=False)
+async def send_otp(request):
+    data = request_data(request)
+    email = data.get('email')
+    if not email or not isinstance(email, str):
+        return JsonResponse({'error': 'Email is required'}, status=400)
+    wait = await athrottle_wait(SEND_BUCKETS, request, data)
+    if wait:
+        raise Throttled(wait)
+    await asend_code(email)
+    
+    return JsonResponse({'message': 'otp sent'})
+
+
+@async_api_view(['POST'], authenticated=False)
+async def verify_otp(request):
+    data = request_data(request)
+    wait = await athrottle_wait(VERIFY_BUCKETS, request, data)
+    if wait:
+        raise Throttled(wait)
+    tokens, error = await averify_code(data.get('email'), data.get('otp'))
+    
+    return JsonResponse(tokens if error is None else {'error': error})
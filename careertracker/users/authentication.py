@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import ClaimsUser
+
+ACTIVE, INACTIVE, MISSING = 'active', 'inactive', 'missing'
+
+
+def status_key(user_id):
+    return f'users:status:{user_id}'
+
+
+def user_status(user_id):
+    """
+    ACTIVE, INACTIVE or MISSING, cached for JWT_USER_STATUS_TTL seconds, so
+    deactivating or deleting a user takes effect within that window.
+    """
+    key = status_key(user_id)
+    status = cache.get(key)
+    if status is None:
+        is_active = User.objects.filter(pk=user_id).values_list('is_active', flat=True).first()
+        status = MISSING if is_active is None else ACTIVE if is_active else INACTIVE
+        if settings.JWT_USER_STATUS_TTL:
+            cache.set(key, status, settings.JWT_USER_STATUS_TTL)
+    return status
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the verified token's user id instead of
+    loading the user: request.user is a ClaimsUser holding just the id, which
+    is all that filter(user=request.user) needs. Only the user's active
+    status is checked, from a small TTL cache.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN or api_settings.USER_ID_FIELD != 'id':
+            # Both need the stored row.
+            return super().get_user(validated_token)
+        try:
+            # for_user() stores the id as a string; the claims user needs the
+            # column's type to compare equal to rows loaded from the database.
+            user_id = ClaimsUser._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError) as error:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from error
+
+        status = user_status(user_id)
+        if status == MISSING:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if status == INACTIVE and api_settings.CHECK_USER_IS_ACTIVE:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return ClaimsUser.from_db(router.db_for_read(ClaimsUser), ['id'], [user_id])
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from users.otp import sweep_expired
+
+class Command(BaseCommand):
+    help = 'Deletes expired one-time passwords in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement.')
+        parser.add_argument('--once', action='store_true', help='Sweep once and exit instead of polling.')
+        parser.add_argument('--poll', type=float, default=300, help='Seconds to sleep between sweeps.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            deleted = sweep_expired(options['batch_size'])
+            if deleted:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Deleted {deleted} expired OTPs in {time.perf_counter() - started:.2f}s'
+                ))
+            if options['once']:
+                return
+            time.sleep(options['poll'])
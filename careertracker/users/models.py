@@ -8,6 +8,13 @@ class EmailOTP(models.Model):
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # verify_otp reads the newest code for an email; sweep_otps deletes by age.
+            models.Index(fields=['email', '-created_at'], name='otp_email_recent_idx'),
+            models.Index(fields=['created_at'], name='otp_created_idx'),
+        ]
+    
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     first_name = models.CharField(max_length=50, blank=True)
@@ -24,4 +31,19 @@ class Profile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return self.user.email
\ No newline at end of file
+        return self.user.email
+
+class ClaimsUser(User):
+    """
+    The user behind a verified access token (users.authentication): only the
+    id is loaded, and the first read of any other field fetches the rest of
+    the row in one query instead of one column at a time.
+    """
+    class Meta:
+        proxy = True
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
@@ -0,0 +1,81 @@
+import secrets
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+from django.utils.timezone import now
+from rest_framework_simplejwt.tokens import RefreshToken
+from outbox.mail import enqueue_email
+from .models import EmailOTP
+
+# The OTP login, shared by the views in views.py and their async counterparts
+# in async_views, which only parse, throttle and answer. Each email keeps only
+# its latest code, so verifying reads one row off the (email, created_at)
+# index and sending can't grow the table past one row per email that the
+# throttles let through; sweep_otps clears the expired ones.
+
+OTP_LIFETIME = timedelta(minutes=5)
+
+
+def new_otp():
+    return str(100000 + secrets.randbelow(900000))
+
+
+def otp_email(email, otp):
+    """enqueue_email() arguments for the one-time password mail."""
+    return {
+        'subject': 'OTP for CareerTracker',
+        'body': f'Your otp is {otp}',
+        'from_email': 'udaykirangorli2005@gmail.com',
+        'to': [email],
+    }
+
+
+def token_pair(user):
+    refresh = RefreshToken.for_user(user)
+    return {'access': str(refresh.access_token), 'refresh': str(refresh)}
+
+
+def send_code(email):
+    """Replaces the email's code with a new one and queues the mail, which commits with it."""
+    otp = new_otp()
+    with transaction.atomic():
+        EmailOTP.objects.filter(email=email).delete()
+        EmailOTP.objects.create(email=email, otp=otp)
+        enqueue_email(**otp_email(email, otp))
+
+
+def verify_code(email, otp):
+    """(token pair, None) when otp is the email's current code, else (None, the error)."""
+    if not isinstance(email, str):
+        return None, 'Invalid OTP'
+    record = EmailOTP.objects.filter(email=email).order_by('-created_at').first()
+    if not record or not constant_time_compare(record.otp, str(otp)):
+        return None, 'Invalid OTP'
+    if record.created_at < now() - OTP_LIFETIME:
+        record.delete()
+        return None, 'Expired OTP'
+    user, created = User.objects.get_or_create(email=email, username=email)
+    EmailOTP.objects.filter(email=email).delete()
+    return token_pair(user), None
+
+
+# One thread hop for the whole exchange, rather than one per async ORM call.
+async def asend_code(email):
+    await sync_to_async(send_code)(email)
+
+
+async def averify_code(email, otp):
+    return await sync_to_async(verify_code)(email, otp)
+
+
+def sweep_expired(batch_size=1000):
+    """Deletes expired codes batch_size rows per statement; returns how many."""
+    cutoff = now() - OTP_LIFETIME
+    deleted = 0
+    while True:
+        ids = list(EmailOTP.objects.filter(created_at__lt=cutoff).order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += EmailOTP.objects.filter(pk__in=ids).delete()[0]
@@ -1,3 +1,146 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils.timezone import now
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from outbox.models import OutgoingEmail
+from .authentication import ClaimsJWTAuthentication
+from .models import EmailOTP
+from .otp import OTP_LIFETIME
 
 # Create your tests here.
+
+@override_settings(ROOT_URLCONF='careertracker.asgi_urls')
+class AsyncOtpTests(TestCase):
+    def setUp(self):
+        cache.clear()
+    
+    async def test_send_and_verify(self):
+        response = await self.async_client.post('/api/users/send-otp/', {'email': 'new@example.com'}, content_type='application/json')
+        self.assertEqual(response.json(), {'message': 'otp sent'})
+        otp = (await EmailOTP.objects.aget(email='new@example.com')).otp
+        email = await OutgoingEmail.objects.aget()
+        self.assertEqual((email.to, email.body), (['new@example.com'], f'Your otp is {otp}'))
+        
+        wrong = '000000' if otp != '000000' else '111111'
+        response = await self.async_client.post('/api/users/verify-otp/', {'email': 'new@example.com', 'otp': wrong}, content_type='application/json')
+        self.assertEqual(response.json(), {'error': 'Invalid OTP'})
+        response = await self.async_client.post('/api/users/verify-otp/', {'email': 'new@example.com', 'otp': otp}, content_type='application/json')
+        self.assertEqual(set(response.json()), {'access', 'refresh'})
+        self.assertTrue(await User.objects.filter(email='new@example.com').aexists())
+        self.assertFalse(await EmailOTP.objects.filter(email='new@example.com').aexists())
+    
+    async def test_rejects_bad_requests(self):
+        response = await self.async_client.get('/api/users/send-otp/')
+        self.assertEqual((response.status_code, response['Allow']), (405, 'POST'))
+        response = await self.async_client.post('/api/users/send-otp/', '{"email"', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post('/api/users/send-otp/', {'email': 123}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post('/api/users/verify-otp/', {'email': [1], 'otp': '1'}, content_type='application/json')
+        self.assertEqual(response.json(), {'error': 'Invalid OTP'})
+
+
+THROTTLE_RATES = {'otp_ip': '4/hour', 'otp_email': '2/hour', 'otp_verify': '3/hour'}
+
+@override_settings(OTP_THROTTLE_RATES=THROTTLE_RATES)
+class OtpStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+    
+    def send(self, email, ip='10.0.0.1'):
+        return self.client.post('/api/users/send-otp/', {'email': email}, format='json', REMOTE_ADDR=ip)
+    
+    def verify(self, email, otp, ip='10.0.0.1'):
+        return self.client.post('/api/users/verify-otp/', {'email': email, 'otp': otp}, format='json', REMOTE_ADDR=ip)
+    
+    def test_only_the_latest_code_is_kept(self):
+        self.send('a@example.com')
+        first = EmailOTP.objects.get(email='a@example.com').otp
+        self.send('a@example.com')
+        latest = EmailOTP.objects.get(email='a@example.com').otp
+        if first != latest:
+            self.assertEqual(self.verify('a@example.com', first).data, {'error': 'Invalid OTP'})
+        self.assertEqual(set(self.verify('a@example.com', latest).data), {'access', 'refresh'})
+        
+        EmailOTP.objects.create(email='b@example.com', otp='123456')
+        EmailOTP.objects.filter(email='b@example.com').update(created_at=now() - OTP_LIFETIME - timedelta(seconds=1))
+        self.assertEqual(self.verify('b@example.com', '123456', ip='10.0.0.2').data, {'error': 'Expired OTP'})
+    
+    def test_throttles_per_email_and_per_ip(self):
+        self.assertEqual(self.send('a@example.com').status_code, 200)
+        self.assertEqual(self.send('a@example.com').status_code, 200)
+        response = self.send('a@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(EmailOTP.objects.filter(email='a@example.com').count(), 1)
+        
+        # The fourth request from the address empties its bucket, whatever the email.
+        self.assertEqual(self.send('b@example.com').status_code, 200)
+        self.assertEqual(self.send('c@example.com').status_code, 429)
+        self.assertEqual(self.send('c@example.com', ip='10.0.0.2').status_code, 200)
+        
+        for attempt in range(3):
+            self.assertEqual(self.verify('c@example.com', '000000', ip=f'10.0.1.{attempt}').data, {'error': 'Invalid OTP'})
+        self.assertEqual(self.verify('c@example.com', '000000', ip='10.0.1.9').status_code, 429)
+    
+    def test_non_text_emails_are_turned_away(self):
+        for email in (123, ['a@example.com'], {'address': 'a@example.com'}):
+            with self.subTest(email=email):
+                self.assertEqual(self.send(email).status_code, 400)
+                response = self.verify(email, '123456')
+                self.assertEqual((response.status_code, response.data), (200, {'error': 'Invalid OTP'}))
+        self.assertFalse(EmailOTP.objects.exists())
+    
+    def test_sweeper_deletes_expired_codes_in_batches(self):
+        EmailOTP.objects.bulk_create(EmailOTP(email=f'{n}@example.com', otp='123456') for n in range(5))
+        EmailOTP.objects.filter(email__in=['0@example.com', '1@example.com', '2@example.com']).update(created_at=now() - OTP_LIFETIME * 2)
+        call_command('sweep_otps', '--once', '--batch-size', '2', stdout=open('/dev/null', 'w'))
+        self.assertEqual(sorted(EmailOTP.objects.values_list('email', flat=True)), ['3@example.com', '4@example.com'])
+    
+    def test_verify_reads_one_index_entry(self):
+        plan = EmailOTP.objects.filter(email='a@example.com').order_by('-created_at')[:1].explain()
+        self.assertIn('otp_email_recent_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='claims', email='claims@example.com', first_name='Ada')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+    
+    def test_reads_skip_the_user_query(self):
+        with self.assertNumQueries(2):
+            # cold: the active-status check, then the page itself
+            self.client.get('/api/jobs/?fields=id,company')
+        with self.assertNumQueries(1):
+            self.client.get('/api/jobs/?fields=id,job_title')
+    
+    def test_other_fields_load_in_one_query(self):
+        user = ClaimsJWTAuthentication().get_user(AccessToken.for_user(self.user))
+        self.assertEqual((user, user.pk), (self.user, self.user.pk))
+        with self.assertNumQueries(1):
+            self.assertEqual((user.username, user.email, user.first_name), ('claims', 'claims@example.com', 'Ada'))
+    
+    def test_inactive_and_deleted_users_are_refused(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/api/jobs/')
+        self.assertEqual((response.status_code, response.data['code']), (401, 'user_inactive'))
+        
+        # The status is cached until JWT_USER_STATUS_TTL runs out.
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        self.assertEqual(self.client.get('/api/jobs/').status_code, 401)
+        cache.clear()
+        self.assertEqual(self.client.get('/api/jobs/').status_code, 200)
+        
+        self.user.delete()
+        cache.clear()
+        response = self.client.get('/api/jobs/')
+        self.assertEqual((response.status_code, response.data['code']), (401, 'user_not_found'))
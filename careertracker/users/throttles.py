@@ -0,0 +1,79 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+# Token buckets for the OTP endpoints, kept in the cache. A rate "N/period"
+# allows a burst of N and refills continuously at N per period. Two requests
+# racing on one bucket can both spend its last token; the limits are about
+# volume, not exact counts. A per-process cache would give every worker its
+# own buckets, which is why jobs.E001 requires a shared one with several.
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+class TokenBucket:
+    def __init__(self, scope):
+        self.scope = scope
+        self.capacity, self.period = parse_rate(settings.OTP_THROTTLE_RATES[scope])
+
+    def key(self, ident):
+        return f'users:throttle:{self.scope}:{ident}'
+
+    def spend(self, state, now):
+        """The new state, and 0 if a token was spent or else the seconds until one is due."""
+        tokens, updated = state or (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated) * self.capacity / self.period)
+        if tokens >= 1:
+            return (tokens - 1, now), 0
+        return (tokens, now), (1 - tokens) * self.period / self.capacity
+
+    def take(self, ident):
+        # An idle bucket is full again after one period, so it can expire then.
+        state, wait = self.spend(cache.get(self.key(ident)), time.time())
+        cache.set(self.key(ident), state, self.period)
+        return wait
+
+    async def atake(self, ident):
+        state, wait = self.spend(await cache.aget(self.key(ident)), time.time())
+        await cache.aset(self.key(ident), state, self.period)
+        return wait
+
+
+def email_ident(request, data):
+    # None skips the bucket: JSON can send any type, and the view turns away what isn't text.
+    email = data.get('email')
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+def ip_ident(request, data):
+    return BaseThrottle().get_ident(request)
+
+
+# Checked in order; the first empty bucket turns the request away.
+SEND_BUCKETS = (('otp_ip', ip_ident), ('otp_email', email_ident))
+VERIFY_BUCKETS = (('otp_ip', ip_ident), ('otp_verify', email_ident))
+
+
+def throttle_wait(buckets, request, data):
+    """0 if every bucket had a token, else the seconds until the empty one refills."""
+    for scope, ident in buckets:
+        key = ident(request, data)
+        wait = key is not None and TokenBucket(scope).take(key)
+        if wait:
+            return wait
+    return 0
+
+
+async def athrottle_wait(buckets, request, data):
+    for scope, ident in buckets:
+        key = ident(request, data)
+        wait = key is not None and await TokenBucket(scope).atake(key)
+        if wait:
+            return wait
+    return 0
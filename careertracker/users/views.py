@@ -1,15 +1,12 @@
-import random
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.core.mail import send_mail
-from .models import EmailOTP, Profile
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.utils.timezone import now
-from datetime import timedelta
-from django.contrib.auth.models import User
+from .models import Profile
 from rest_framework import generics, permissions
 from .serializers import ProfileSerializer
+from .otp import send_code, verify_code
 from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import Throttled
+from .throttles import SEND_BUCKETS, VERIFY_BUCKETS, throttle_wait
 
 # Create your views here.
 
@@ -17,39 +14,24 @@ from rest_framework.permissions import AllowAny
 @permission_classes([AllowAny])
 def send_otp(request):
     email = request.data.get('email')
-    otp = str(random.randint(100000, 999999))
-    EmailOTP.objects.create(email=email, otp=otp)
-    
-    send_mail(
-        subject='OTP for CareerTracker',
-        message=f'Your otp is {otp}',
-        from_email='udaykirangorli2005@gmail.com',
-        recipient_list=[email],
-    )
+    if not email or not isinstance(email, str):
+        return Response({'error': 'Email is required'}, status=400)
+    wait = throttle_wait(SEND_BUCKETS, request, request.data)
+    if wait:
+        raise Throttled(wait)
+    send_code(email)
     
     return Response({'message': 'otp sent'})
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def verify_otp(request):
-    email = request.data.get('email')
-    otp = request.data.get('otp')
-    
-    record = EmailOTP.objects.filter(email=email, otp=otp).last()
-    if not record:
-        return Response({'error': 'Invalid OTP'})
-    if record.created_at < now() - timedelta(minutes=5):
-        record.delete()
-        return Response({'error': 'Expired OTP'})
-    
-    user, created = User.objects.get_or_create(email=email, username=email)
-    refresh = RefreshToken.for_user(user)
-    
-    EmailOTP.objects.filter(email=email).delete()
+    wait = throttle_wait(VERIFY_BUCKETS, request, request.data)
+    if wait:
+        raise Throttled(wait)
+    tokens, error = verify_code(request.data.get('email'), request.data.get('otp'))
     
-    return Response({'access': str(refresh.access_token),
-                    'refresh': str(refresh)
-    })
+    return Response(tokens if error is None else {'error': error})
 
 class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = ProfileSerializer
@@ -19,6 +19,7 @@ interface Job {
 
 export default function Dashboard() {
     const [jobs, setJobs] = useState<Job[]>([]);
+    const [nextPage, setNextPage] = useState<string | null>(null);
     const [loading, setLoading] = useState(false);
     const [opened, { open, close }] = useDisclosure(false);
     const [editingJob, setEditingJob] = useState<Job | null>(null);
@@ -43,11 +44,15 @@ export default function Dashboard() {
     const fetchJobs = async (searchVal = search, statusVal = statusFilter) => {
         setLoading(true);
         try {
-            const params: Record<string, string> = {};
+            const params: Record<string, string> = {
+                page_size: '50',
+                fields: 'id,company,job_title,status,applied_at',
+            };
             if (searchVal.trim()) params.search = searchVal.trim();
             if (statusVal) params.status = statusVal;
             const response = await api.get('jobs/', { params });
-            setJobs(response.data);
+            setJobs(response.data.results);
+            setNextPage(response.data.next);
         } catch (error: any) {
             console.error('Failed to fetch jobs', error);
             if (error.response?.status === 401) {
@@ -58,6 +63,17 @@ export default function Dashboard() {
         }
     };
 
+    const loadMore = async () => {
+        if (!nextPage) return;
+        try {
+            const response = await api.get(nextPage);
+            setJobs((prev) => [...prev, ...response.data.results]);
+            setNextPage(response.data.next);
+        } catch (error) {
+            notifications.show({title: 'Error', message: 'Failed to load more jobs', color: 'red'});
+        }
+    };
+
     useEffect(() => {
         fetchJobs();
     }, []);
@@ -86,6 +102,11 @@ export default function Dashboard() {
             close();
             fetchJobs();
         }catch (error: any) {
+            if (error.response?.status === 409) {
+                const existing = error.response.data.duplicate;
+                notifications.show({title: 'Already tracked', message: `${existing.job_title} at ${existing.company} is already on your board`, color: 'yellow'});
+                return;
+            }
             notifications.show({title: 'Error', message: 'Operation failed', color: 'red'});
         }
     };
@@ -221,6 +242,11 @@ export default function Dashboard() {
             </Table.Tbody>
           </Table>
         )}
+        {!loading && nextPage && (
+          <Group justify="center" mt="md">
+            <Button variant="light" onClick={loadMore}>Load more</Button>
+          </Group>
+        )}
       </Paper>
     </Container>
     </>
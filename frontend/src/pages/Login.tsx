@@ -37,7 +37,7 @@ export default function Login() {
         }catch (error: any) {
             notifications.show({
                 title: 'Error',
-                message: error.response?.data?.error || 'Failed to send OTP',
+                message: error.response?.data?.error || error.response?.data?.detail || 'Failed to send OTP',
                 color: 'red',
             });
         }
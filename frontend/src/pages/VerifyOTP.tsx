@@ -45,7 +45,7 @@ export default function VerifyOTP() {
         }catch (error: any) {
             notifications.show({
                 title: 'Verification Failed',
-                message: error.response?.data?.error || 'Invalid or expired OTP',
+                message: error.response?.data?.error || error.response?.data?.detail || 'Invalid or expired OTP',
                 color: 'red',
             });
         }finally {